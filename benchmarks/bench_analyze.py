@@ -0,0 +1,204 @@
+"""
+评估接口压测
+
+以固定并发度压测 /api/evaluation/analyze，统计 p50/p95/p99 延迟、吞吐量，
+并根据 Server-Timing 响应头给出各阶段（prompt构建、LLM评分、图表渲染、LLM总结）的耗时分布。
+
+用法：
+    # 自动启动本地星火模拟服务和评估服务
+    python -m benchmarks.bench_analyze --spawn --concurrency 1 8 32 --requests 200
+
+    # 压测已启动的服务
+    python -m benchmarks.bench_analyze --base-url http://127.0.0.1:8000 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+import numpy as np
+
+# 允许以脚本方式直接运行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.stage_timer import parse_server_timing
+
+STAGES = ["prompt_build", "llm_scores", "llm_fused", "chart_render", "llm_summary"]
+
+
+def build_payload(index: int) -> dict:
+    """构造压测请求体，每条内容不同，避免命中LLM缓存"""
+    return {
+        "resume_match_score": 60 + index % 40,
+        "interview_qa_pairs": [
+            {"question": "请介绍一下你的项目经验", "answer": f"我参与开发过多个Web应用项目（样本{index}）..."},
+            {"question": "你如何处理线上故障", "answer": "先止损再定位根因，最后复盘并完善监控。"}
+        ],
+        "voice_emotion_analysis": {"positive": 0.7, "neutral": 0.2, "negative": 0.1},
+        "body_language_analysis": {"confidence": 0.8, "engagement": 0.75, "nervousness": 0.2},
+        "text_description": f"候选人{index}整体表现稳定"
+    }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99}
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int, offset: int,
+                    params: dict) -> dict:
+    """以指定并发度发送total个请求"""
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {name: [] for name in STAGES}
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/evaluation/analyze",
+                    json=build_payload(offset + index),
+                    params=params,
+                    headers={"X-Stage-Timing": "true"}
+                )
+                elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+
+            latencies.append(elapsed)
+            timings = parse_server_timing(response.headers.get("server-timing", ""))
+            for name, seconds in timings.items():
+                stages.setdefault(name, []).append(seconds)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "latency": percentiles(latencies),
+        "stages": {name: percentiles(values) for name, values in stages.items() if values},
+    }
+
+
+def print_report(result: dict):
+    latency = result["latency"]
+    print(f"\n并发 {result['concurrency']:>3} | 请求 {result['requests']} | 失败 {result['errors']} | "
+          f"吞吐 {result['rps']:.2f} req/s | "
+          f"p50 {latency['p50']:.0f}ms  p95 {latency['p95']:.0f}ms  p99 {latency['p99']:.0f}ms")
+    print(f"  {'阶段':<14}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for name, values in result["stages"].items():
+        print(f"  {name:<14}{values['p50']:>10.1f}{values['p95']:>10.1f}{values['p99']:>10.1f}")
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0):
+    """等待就绪检查通过（预热完成且星火API可连通），避免首批计时请求包含冷启动开销"""
+    deadline = time.time() + timeout
+    status = "unreachable"
+    while time.time() < deadline:
+        try:
+            response = httpx.get(f"{base_url}/api/evaluation/ready", timeout=1.0)
+            if response.status_code == 200:
+                return
+            status = response.json().get("status", response.status_code)
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"评估服务未能在{timeout}秒内就绪（{status}）: {base_url}")
+
+
+def spawn_services(args) -> List[subprocess.Popen]:
+    """启动本地星火模拟服务和评估服务"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    stub = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.spark_stub",
+        "--port", str(args.stub_port),
+        "--token-rate", str(args.token_rate),
+        "--first-token-delay", str(args.first_token_delay),
+        "--error-rate", str(args.error_rate),
+    ], cwd=root)
+
+    env = dict(os.environ)
+    env.update({
+        "SPARK_API_URL": f"ws://127.0.0.1:{args.stub_port}/v1/x1",
+        "SPARK_APP_ID": env.get("SPARK_APP_ID") or "bench",
+        "SPARK_API_KEY": env.get("SPARK_API_KEY") or "bench",
+        "SPARK_API_SECRET": env.get("SPARK_API_SECRET") or "bench",
+        "LLM_CACHE_ENABLED": "false",
+    })
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+    ], cwd=root, env=env)
+    return [stub, server]
+
+
+async def run(args):
+    params = {}
+    if args.chart_format:
+        params["chart_format"] = args.chart_format
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        if args.warmup:
+            await run_level(client, 1, args.warmup, 0, params)
+
+        offset = args.warmup
+        for concurrency in args.concurrency:
+            result = await run_level(client, concurrency, args.requests, offset, params)
+            offset += args.requests
+            print_report(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评估接口压测")
+    parser.add_argument("--base-url", default=None, help="评估服务地址，默认在--spawn时为本地启动的服务")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="每个并发度的请求数")
+    parser.add_argument("--warmup", type=int, default=2, help="预热请求数")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--chart-format", choices=["png", "svg"], default=None)
+    parser.add_argument("--spawn", action="store_true", help="自动启动星火模拟服务和评估服务")
+    parser.add_argument("--port", type=int, default=8001, help="--spawn时评估服务端口")
+    parser.add_argument("--stub-port", type=int, default=8765, help="--spawn时模拟服务端口")
+    parser.add_argument("--token-rate", type=float, default=50.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    processes = []
+    if args.spawn:
+        processes = spawn_services(args)
+        args.base_url = args.base_url or f"http://127.0.0.1:{args.port}"
+        wait_until_ready(args.base_url)
+    elif not args.base_url:
+        args.base_url = "http://127.0.0.1:8000"
+
+    try:
+        asyncio.run(run(args))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
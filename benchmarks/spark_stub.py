@@ -0,0 +1,150 @@
+"""
+本地星火API模拟服务
+
+按星火WebSocket帧协议（header.code/status、payload.choices.text）流式返回评分或总结JSON，
+可配置出字速率、首字延迟和错误注入，用于在不访问线上服务的情况下压测评估接口。
+
+用法：
+    python -m benchmarks.spark_stub --port 8765 --token-rate 50 --first-token-delay 0.8
+然后以 SPARK_API_URL=ws://127.0.0.1:8765/v1/x1 启动评估服务。
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+
+import websockets
+
+from src.models.evaluation_models import SCORE_DIMENSIONS
+
+TRAILING_TEXT = "\n\n以上评分综合考虑了面试者在各个维度上的表现，仅供参考。"
+
+
+class SparkStub:
+    def __init__(self, token_rate: float = 50.0, first_token_delay: float = 0.5, chunk_chars: int = 4,
+                 error_rate: float = 0.0, error_code: int = 11202, drop_rate: float = 0.0,
+                 trailing_text: bool = True, seed: int = None):
+        self.token_rate = token_rate
+        self.first_token_delay = first_token_delay
+        self.chunk_chars = chunk_chars
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.drop_rate = drop_rate
+        self.trailing_text = trailing_text
+        self.random = random.Random(seed)
+        # idle 为未发送请求就关闭的连接（连接池回收的预建连接、就绪探测的握手），不计入请求数
+        self.stats = {"requests": 0, "completed": 0, "errors": 0, "drops": 0, "cancelled": 0, "idle": 0}
+
+    def build_answer(self, system_prompt: str) -> str:
+        """根据系统提示词判断调用类型，生成对应格式的回答"""
+        answer = {}
+        if "skill_match" in system_prompt:
+            answer.update({key: self.random.randint(55, 95) for key in SCORE_DIMENSIONS})
+        if "recommendations" in system_prompt:
+            answer["summary"] = "面试者综合表现良好，技能与岗位较为匹配，沟通表达清晰，仍有进一步提升空间。"
+            answer["recommendations"] = ["加强系统设计能力", "提升表达的条理性", "持续关注行业新技术"]
+        text = json.dumps(answer, ensure_ascii=False, indent=2)
+        if self.trailing_text:
+            text += TRAILING_TEXT
+        return text
+
+    async def handler(self, ws, path=None):
+        sid = uuid.uuid4().hex[:16]
+        try:
+            raw = await ws.recv()
+        except websockets.ConnectionClosed:
+            self.stats["idle"] += 1
+            return
+
+        self.stats["requests"] += 1
+        try:
+            request = json.loads(raw)
+            messages = request["payload"]["message"]["text"]
+            system_prompt = "".join(m["content"] for m in messages if m["role"] == "system")
+        except Exception as e:
+            await ws.send(json.dumps({"header": {"code": 10163, "message": f"参数错误: {e}", "sid": sid, "status": 2}}))
+            self.stats["errors"] += 1
+            return
+
+        await asyncio.sleep(self.first_token_delay)
+
+        # 错误注入：返回错误帧（默认11202为秒级流控超限）
+        if self.random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            await ws.send(json.dumps({"header": {"code": self.error_code, "message": "模拟错误", "sid": sid, "status": 2}}))
+            return
+
+        text = self.build_answer(system_prompt)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        drop_at = self.random.randrange(len(chunks)) if self.random.random() < self.drop_rate else None
+        interval = 1.0 / self.token_rate if self.token_rate > 0 else 0
+
+        try:
+            for seq, chunk in enumerate(chunks):
+                if seq == drop_at:
+                    # 错误注入：生成中途断开连接
+                    self.stats["drops"] += 1
+                    await ws.close()
+                    return
+
+                status = 2 if seq == len(chunks) - 1 else (0 if seq == 0 else 1)
+                frame = {
+                    "header": {"code": 0, "message": "Success", "sid": sid, "status": status},
+                    "payload": {
+                        "choices": {
+                            "status": status,
+                            "seq": seq,
+                            "text": [{"content": chunk, "role": "assistant", "index": 0}]
+                        }
+                    }
+                }
+                if status == 2:
+                    frame["payload"]["usage"] = {"text": {"completion_tokens": len(chunks)}}
+                await ws.send(json.dumps(frame, ensure_ascii=False))
+                if interval:
+                    await asyncio.sleep(interval)
+            self.stats["completed"] += 1
+        except websockets.ConnectionClosed:
+            # 客户端提前关闭（已拿到完整答案）
+            self.stats["cancelled"] += 1
+
+
+async def serve(stub: SparkStub, host: str, port: int):
+    async with websockets.serve(stub.handler, host, port, max_size=None):
+        print(f"星火模拟服务已启动: ws://{host}:{port}/v1/x1", flush=True)
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地星火API模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-rate", type=float, default=50.0, help="每秒输出的帧数（每帧chunk-chars个字符）")
+    parser.add_argument("--first-token-delay", type=float, default=0.5, help="首帧延迟（秒）")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="每帧字符数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回错误帧的概率")
+    parser.add_argument("--error-code", type=int, default=11202, help="错误帧的header.code")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="生成中途断开连接的概率")
+    parser.add_argument("--no-trailing-text", action="store_true", help="JSON之后不输出解释性文字")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    stub = SparkStub(
+        token_rate=args.token_rate,
+        first_token_delay=args.first_token_delay,
+        chunk_chars=args.chunk_chars,
+        error_rate=args.error_rate,
+        error_code=args.error_code,
+        drop_rate=args.drop_rate,
+        trailing_text=not args.no_trailing_text,
+        seed=args.seed,
+    )
+    try:
+        asyncio.run(serve(stub, args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"统计: {stub.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,27 @@
-from fastapi import FastAPI
+import time
+
+# 记录模块导入耗时，作为启动耗时报告的一部分
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
 from src.api.evaluation_api import router as evaluation_router
+from src.services import warmup
 import uvicorn
+import glob
 import os
 from dotenv import load_dotenv
 
+# 通过uvicorn启动时本模块会以 __main__ 和 main 两个名字各导入一次，只记录首次导入耗时
+warmup.record("import", time.perf_counter() - _import_started, replace=False)
+
 # 加载环境变量
 load_dotenv()
 
 # 创建FastAPI应用
+# 图表渲染子进程以spawn方式启动时会把本文件作为 __mp_main__ 重新导入，评估接口模块的缓存、任务队列和图表存储等
+# 在应用启动时才创建，导入本文件不会打开这些文件
 app = FastAPI(
     title="Interview Evaluation System",
     description="基于讯飞星火API的面试评估六维图系统",
@@ -35,13 +48,50 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus监控指标，多worker部署时汇总全部worker的指标"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.on_event("shutdown")
+def mark_metrics_process_dead():
+    """worker退出后，其实时类指标（如正在进行的调用数）不再计入汇总"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
+
+def resolve_workers() -> int:
+    """worker进程数，WORKERS=auto 时取CPU核数"""
+    workers = os.getenv("WORKERS", "1")
+    if workers == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
-    
+    workers = resolve_workers()
+    reload = os.getenv("RELOAD", "false").lower() in ("1", "true", "yes")
+    if reload and workers > 1:
+        raise SystemExit("RELOAD 只能在单worker模式下使用")
+
+    if workers > 1:
+        # worker进程继承这些环境变量：共享状态按实际worker数启用，各worker的指标写入同一目录后汇总
+        os.environ["WORKERS"] = str(workers)
+        metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join("cache", "prometheus"))
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+
+    # 收到退出信号后停止接收新连接，等待进行中的请求完成（最多 GRACEFUL_TIMEOUT 秒）后再关闭
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=True
+        workers=workers,
+        reload=reload,
+        timeout_graceful_shutdown=float(os.getenv("GRACEFUL_TIMEOUT", 30))
     )
\ No newline at end of file
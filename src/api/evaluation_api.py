@@ -1,67 +1,656 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Literal, Optional, Union
+import asyncio
+import base64
+import json
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from ..models.evaluation_models import InterviewInput, EvaluationResult
-from ..services.spark_api import SparkAPI
+from pydantic import ValidationError
+from ..models.evaluation_models import (
+    InterviewInput, EvaluationResult, EvaluationJob, SixDimensionScore, ComparisonRequest, CohortComparison,
+    ScoresProfileResult, SummaryProfileResult, SCORE_DIMENSIONS
+)
 from ..services.evaluation_engine import EvaluationEngine
-from ..services.chart_generator import RadarChartGenerator
+from ..services.response_cache import LLMResponseCache
+from ..services.chart_pool import ChartRenderPool
+from ..services.chart_store import ChartStore
+from ..services.single_flight import SingleFlight
+from ..services.shared_state import SharedState
+from ..services.job_queue import EvaluationJobQueue, QueueFullError
+from ..services import metrics, model_routing, response_encoding, stage_timer, warmup
 
 # 加载环境变量
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # 创建路由器
 router = APIRouter(prefix="/api/evaluation", tags=["evaluation"])
 
 # 初始化服务 - 延迟初始化避免启动时的配置错误
+# 延迟初始化可能同时发生在预热线程和请求中，由同一把锁保证只初始化一次
+_init_lock = threading.Lock()
 spark_api = None
 evaluation_engine = None
-chart_generator = RadarChartGenerator()
+chart_generators = {}
+# 以下服务会打开SQLite文件或创建目录，在应用启动时创建（见 init_services），导入本模块不产生这些副作用
+chart_pool: Optional[ChartRenderPool] = None
+chart_store: Optional[ChartStore] = None
+# 多worker部署时共享的缓存统计和星火API并发上限
+shared_state: Optional[SharedState] = None
+response_cache: Optional[LLMResponseCache] = None
+job_queue: Optional[EvaluationJobQueue] = None
+# 评估历史首次使用时才打开并加载直方图（依赖NumPy，历史较多时加载较慢）
+evaluation_history = None
+evaluation_history_loaded = False
+
+# 相同评估请求合并：并发的重复请求共享同一次评估和图表渲染
+EVALUATION_COALESCING = os.getenv("EVALUATION_COALESCING", "true").lower() not in ("0", "false", "no")
+evaluation_flight = SingleFlight("evaluation")
+
+# 图表格式：png 使用matplotlib渲染，svg 使用不依赖matplotlib的矢量渲染器
+CHART_FORMAT = os.getenv("CHART_FORMAT", "png")
+ChartFormat = Literal["png", "svg"]
+
+# 图表返回方式：inline 内嵌base64，reference 返回图表地址
+CHART_DELIVERY = os.getenv("CHART_DELIVERY", "inline")
+ChartDelivery = Literal["inline", "reference"]
+
+# 响应档位：scores 只返回六维评分，summary 返回评分、总结、建议和模型路由，full 为完整结果（含雷达图）
+# 不含雷达图的档位不渲染图表，scores 档位也不生成总结
+RESPONSE_PROFILE = os.getenv("RESPONSE_PROFILE", "full")
+ResponseProfile = Literal["scores", "summary", "full"]
+PROFILE_FIELDS = {
+    "scores": {"scores"},
+    "summary": {"scores", "summary", "recommendations", "routes"},
+    "full": None,
+}
+# 各档位的响应模型，仅用于接口文档；/analyze 直接返回编码后的响应体
+PROFILE_MODELS = (ScoresProfileResult, SummaryProfileResult, EvaluationResult)
+ANALYZE_RESPONSES = {
+    200: {
+        "description": "评估结果，字段取决于profile档位（scores / summary / full）；Accept为msgpack时以msgpack编码",
+        "content": {
+            response_encoding.MSGPACK_TYPES[0]: {
+                "schema": {"anyOf": [{"$ref": f"#/components/schemas/{model.__name__}"} for model in PROFILE_MODELS]}
+            }
+        },
+    },
+    406: {"description": "只接受msgpack而服务端未安装msgpack"},
+}
+
+# 批量评估并发配置
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 32))
+
+# 启动预热：在就绪前完成字体解析、图表模板构建、鉴权材料计算和历史加载
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() not in ("0", "false", "no")
+warmup_task: Optional[asyncio.Task] = None
+
+# 星火API连通性探测：定期完成一次鉴权握手，结果用于就绪检查；间隔为0时不探测
+SPARK_PROBE_INTERVAL = float(os.getenv("SPARK_PROBE_INTERVAL", 30))
+spark_status: Dict[str, Any] = {"reachable": None, "checked_at": None, "latency": None, "error": None}
+probe_task: Optional[asyncio.Task] = None
+
+def get_evaluation_history():
+    """获取评估历史存储，首次调用时加载，未启用时返回None"""
+    global evaluation_history, evaluation_history_loaded
+    if not evaluation_history_loaded:
+        with _init_lock:
+            if not evaluation_history_loaded:
+                from ..services.history_store import EvaluationHistory
+                evaluation_history = EvaluationHistory.from_env()
+                evaluation_history_loaded = True
+    return evaluation_history
 
 def get_spark_api():
     global spark_api, evaluation_engine
-    if spark_api is None:
-        try:
-            spark_api = SparkAPI(
-                app_id=os.getenv("SPARK_APP_ID"),
-                api_key=os.getenv("SPARK_API_KEY"),
-                api_secret=os.getenv("SPARK_API_SECRET")
-            )
-            evaluation_engine = EvaluationEngine(spark_api)
-        except ValueError as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    if evaluation_engine is None:
+        with _init_lock:
+            if evaluation_engine is None:
+                spark_api, evaluation_engine = _create_engine()
     return spark_api, evaluation_engine
 
-@router.post("/analyze", response_model=EvaluationResult)
-async def analyze_interview(input_data: InterviewInput):
+def _create_engine():
+    """创建星火API客户端和评估引擎（调用方需持有初始化锁）"""
+    try:
+        engine = EvaluationEngine.from_env(cache=response_cache, shared=shared_state)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return engine.spark_api, engine
+
+def get_chart_generator(chart_format: Optional[str] = None):
+    """按格式获取图表生成器，首次使用时才导入对应渲染器（svg 不会加载matplotlib）"""
+    chart_format = chart_format or CHART_FORMAT
+    if chart_format not in chart_generators:
+        with _init_lock:
+            if chart_format not in chart_generators:
+                if chart_format == "svg":
+                    from ..services.svg_chart_generator import SVGRadarChartGenerator
+                    chart_generators[chart_format] = SVGRadarChartGenerator()
+                elif chart_format == "png":
+                    from ..services.chart_generator import RadarChartGenerator
+                    chart_generators[chart_format] = RadarChartGenerator()
+                else:
+                    raise ValueError(f"不支持的图表格式: {chart_format}，可选值: png, svg")
+    return chart_generators[chart_format]
+
+async def _render_radar_chart(scores, chart_format: Optional[str] = None) -> str:
+    """生成雷达图，PNG在渲染进程池（未配置时为线程池）中渲染，不阻塞事件循环"""
+    chart_format = chart_format or CHART_FORMAT
+    started = time.perf_counter()
+    try:
+        if chart_format == "svg":
+            return get_chart_generator("svg").generate_radar_chart(scores)
+        if chart_pool is not None:
+            return await chart_pool.render_radar_chart(scores)
+        return await run_in_threadpool(get_chart_generator(chart_format).generate_radar_chart, scores)
+    finally:
+        metrics.CHART_RENDER_SECONDS.labels(format=chart_format).observe(time.perf_counter() - started)
+
+async def _render_chart_fields(scores, chart_format: Optional[str] = None,
+                               chart_delivery: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    生成评估结果中的图表字段
+    按引用返回时，相同评分直接复用图表存储中已渲染的图表
+    """
+    if (chart_delivery or CHART_DELIVERY) != "reference":
+        return {"radar_chart_base64": await _render_radar_chart(scores, chart_format)}
+    
+    chart_format = chart_format or CHART_FORMAT
+    chart_id = ChartStore.make_id(scores, chart_format, os.getenv("CHART_PRESET", "full"))
+    if not chart_store.contains(chart_id):
+        data_uri = await _render_radar_chart(scores, chart_format)
+        await run_in_threadpool(chart_store.put, chart_id, base64.b64decode(data_uri.split(",", 1)[1]))
+    return {"radar_chart_url": f"{router.prefix}/charts/{chart_id}"}
+
+async def _render_comparison_chart(scores, benchmark, benchmark_label: str,
+                                   chart_format: Optional[str] = None) -> str:
+    """生成对比雷达图，渲染方式与六维雷达图相同"""
+    chart_format = chart_format or CHART_FORMAT
+    started = time.perf_counter()
+    try:
+        if chart_format == "svg":
+            return get_chart_generator("svg").generate_comparison_chart(scores, benchmark, benchmark_label)
+        if chart_pool is not None:
+            return await chart_pool.render_comparison_chart(scores, benchmark, benchmark_label)
+        return await run_in_threadpool(
+            get_chart_generator(chart_format).generate_comparison_chart, scores, benchmark, benchmark_label
+        )
+    finally:
+        metrics.CHART_RENDER_SECONDS.labels(format=chart_format).observe(time.perf_counter() - started)
+
+async def _record_history(input_data: InterviewInput, scores):
+    """把评估结果写入历史存储，供群体对比使用"""
+    history = await run_in_threadpool(get_evaluation_history)
+    if history is None:
+        return
+    await run_in_threadpool(history.record, scores, input_data.position, history.make_input_hash(input_data))
+
+async def _warm_up():
+    """
+    预热各组件，完成后标记为就绪
+    耗时步骤在线程池中执行，预热期间事件循环仍可响应存活检查
+    """
+    with warmup.phase("history"):
+        await run_in_threadpool(get_evaluation_history)
+
+    engine = None
+    with warmup.phase("engine"):
+        _, engine = await run_in_threadpool(get_spark_api)
+
+    if engine is not None and engine.spark_api is not None:
+        with warmup.phase("spark_auth"):
+            urls = [route.url for route in engine.router.routes.values()]
+            if engine.router.fast_route is not None:
+                urls.append(engine.router.fast_route.url)
+            engine.spark_api.prewarm(urls)
+        if engine.spark_api.pool is not None:
+            with warmup.phase("spark_pool"):
+                await engine.spark_api.warm_pool(urls)
+
+    if CHART_FORMAT == "svg":
+        with warmup.phase("chart_template"):
+            generator = get_chart_generator("svg")
+            generator.generate_radar_chart(SixDimensionScore(**dict.fromkeys(SCORE_DIMENSIONS, 60.0)))
+    elif chart_pool is not None:
+        with warmup.phase("chart_template"):
+            await chart_pool.warm_up()
+    else:
+        # 字体解析在创建生成器时完成，模板按线程构建，此处预先构建渲染线程池中一个线程的模板
+        with warmup.phase("chart_font"):
+            generator = await run_in_threadpool(get_chart_generator, "png")
+        with warmup.phase("chart_template"):
+            await run_in_threadpool(generator.warm_up)
+
+    warmup.mark_ready()
+
+async def _probe_spark():
+    """定期探测星火API连通性；fast模式未配置星火API时不探测"""
+    while True:
+        try:
+            api, _ = await run_in_threadpool(get_spark_api)
+            if api is None:
+                return
+            latency = await api.probe()
+            spark_status.update(reachable=True, latency=round(latency, 4), error=None)
+        except Exception as e:
+            # 任何探测失败（DNS解析失败、握手被拒、超时等）都标记为不可达，探测任务继续运行
+            error = str(getattr(e, "detail", None) or e) or type(e).__name__
+            if spark_status["error"] != error:
+                logger.warning("星火API连通性探测失败: %s", error)
+            spark_status.update(reachable=False, latency=None, error=error)
+        spark_status["checked_at"] = time.time()
+        metrics.SPARK_REACHABLE.set(1 if spark_status["reachable"] else 0)
+        await asyncio.sleep(SPARK_PROBE_INTERVAL)
+
+@router.on_event("startup")
+async def init_services():
+    """创建缓存、共享状态、图表存储、图表渲染进程池和任务队列；需先于其他启动钩子注册"""
+    global chart_pool, chart_store, shared_state, response_cache, job_queue
+    chart_pool = ChartRenderPool.from_env()
+    chart_store = await run_in_threadpool(ChartStore.from_env)
+    shared_state = await run_in_threadpool(SharedState.from_env)
+    response_cache = await run_in_threadpool(LLMResponseCache.from_env, shared_state)
+    job_queue = await run_in_threadpool(EvaluationJobQueue.from_env, _process_job)
+
+@router.on_event("startup")
+async def start_warm_up():
+    """启动后在后台预热和探测星火API，未开启预热时直接标记为就绪"""
+    global warmup_task, probe_task
+    if WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(_warm_up())
+    else:
+        warmup.mark_ready()
+    if SPARK_PROBE_INTERVAL > 0:
+        probe_task = asyncio.create_task(_probe_spark())
+
+@router.on_event("shutdown")
+async def stop_warm_up():
+    for task in (warmup_task, probe_task):
+        if task is not None and not task.done():
+            task.cancel()
+    if shared_state is not None:
+        shared_state.leave()
+    if evaluation_engine is not None and evaluation_engine.spark_api is not None:
+        await evaluation_engine.spark_api.aclose()
+
+@router.on_event("shutdown")
+def shutdown_chart_pool():
+    """关闭图表渲染进程池"""
+    if chart_pool is not None:
+        chart_pool.shutdown()
+
+@router.post("/analyze", response_model=Union[PROFILE_MODELS], responses=ANALYZE_RESPONSES)
+async def analyze_interview(
+    input_data: InterviewInput,
+    request: Request,
+    chart_format: Optional[ChartFormat] = Query(default=None, description="雷达图格式，默认取CHART_FORMAT"),
+    chart_delivery: Optional[ChartDelivery] = Query(default=None, description="雷达图返回方式，默认取CHART_DELIVERY"),
+    profile: Optional[ResponseProfile] = Query(default=None, description="响应档位：scores / summary / full，默认取RESPONSE_PROFILE"),
+    stage_timing: Optional[str] = Header(default=None, alias="X-Stage-Timing",
+                                         description="为true时在Server-Timing响应头中返回各阶段耗时")
+):
     """
     分析面试数据并生成六维评估结果
+    Accept 为 application/msgpack 时以msgpack返回（需安装msgpack，未安装且不接受JSON时返回406），客户端接受gzip时压缩较大的响应
     """
+    profile = profile or RESPONSE_PROFILE
+    # 评估前先协商响应编码，无法满足Accept时不必调用星火API
+    try:
+        encoding = response_encoding.negotiate(request.headers.get("accept"))
+    except response_encoding.NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    timings = None
     try:
         # 获取初始化的服务
         _, engine = get_spark_api()
         
-        # 生成六维评分
-        scores = engine.generate_six_dimension_scores(input_data)
-        
-        # 生成雷达图
-        radar_chart_base64 = chart_generator.generate_radar_chart(scores)
+        if stage_timing and stage_timing.lower() in ("1", "true", "yes"):
+            timings = stage_timer.start_request()
+        result = await _evaluate(engine, input_data, chart_format, chart_delivery, profile)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"评估过程中发生错误: {str(e)}")
+    
+    response = await _encode_response(result.model_dump(include=PROFILE_FIELDS[profile]), request, encoding, profile)
+    if timings is not None:
+        response.headers["Server-Timing"] = stage_timer.format_server_timing(timings)
+    return response
+
+async def _encode_response(data: Dict[str, Any], request: Request, encoding: str, profile: str) -> Response:
+    """按协商出的编码序列化，按Accept-Encoding压缩较大的响应体（含内嵌图表时在线程池中压缩）"""
+    body, media_type = response_encoding.encode(data, encoding)
+    accept_encoding = request.headers.get("accept-encoding")
+    if len(body) >= response_encoding.COMPRESS_OFFLOAD_SIZE:
+        body, content_encoding = await run_in_threadpool(response_encoding.compress, body, accept_encoding)
+    else:
+        body, content_encoding = response_encoding.compress(body, accept_encoding)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    encoding = media_type.split("/")[-1] + (f"+{content_encoding}" if content_encoding else "")
+    metrics.EVALUATION_RESPONSE_BYTES.labels(profile=profile, encoding=encoding).observe(len(body))
+    return Response(body, media_type=media_type, headers=headers)
+
+async def _evaluate(engine: EvaluationEngine, input_data: InterviewInput,
+                    chart_format: Optional[str] = None,
+                    chart_delivery: Optional[str] = None,
+                    profile: str = "full") -> EvaluationResult:
+    """完成一次评估，相同输入的并发请求合并为一次执行"""
+    if not EVALUATION_COALESCING:
+        return await _run_evaluation(engine, input_data, chart_format, chart_delivery, profile)
+    
+    key = SingleFlight.make_key(
+        input_data.model_dump(),
+        chart_format or CHART_FORMAT,
+        chart_delivery or CHART_DELIVERY,
+        profile
+    )
+    return await evaluation_flight.do(
+        key, lambda: _run_evaluation(engine, input_data, chart_format, chart_delivery, profile)
+    )
+
+async def _run_evaluation(engine: EvaluationEngine, input_data: InterviewInput,
+                          chart_format: Optional[str] = None,
+                          chart_delivery: Optional[str] = None,
+                          profile: str = "full") -> EvaluationResult:
+    """
+    完成一次评估：评分、总结建议和雷达图
+    按响应档位跳过不需要的步骤，跳过的字段为空值，返回前由档位过滤掉
+    """
+    # 按延迟预算选择各阶段模型，并记录实际路由
+    routes = model_routing.start_request(engine.router.budget_seconds)
+    
+    # 生成六维评分、总结和建议
+    if profile == "scores":
+        scores = await engine.generate_six_dimension_scores(input_data)
+        summary, recommendations = "", []
+    else:
+        scores, summary, recommendations = await engine.generate_evaluation(input_data)
+    
+    # 生成雷达图
+    chart_fields = {}
+    if profile == "full":
+        with stage_timer.stage("chart_render"):
+            chart_fields = await _render_chart_fields(scores, chart_format, chart_delivery)
+    
+    await _record_history(input_data, scores)
+    
+    return EvaluationResult(
+        scores=scores,
+        summary=summary,
+        recommendations=recommendations,
+        routes=routes,
+        **chart_fields
+    )
+
+@router.post("/analyze/batch")
+async def analyze_interview_batch(
+    items: List[Dict[str, Any]],
+    concurrency: Optional[int] = Query(default=None, ge=1, description="并发评估数量"),
+    chart_format: Optional[ChartFormat] = Query(default=None, description="雷达图格式，默认取CHART_FORMAT"),
+    chart_delivery: Optional[ChartDelivery] = Query(default=None, description="雷达图返回方式，默认取CHART_DELIVERY"),
+    profile: Optional[ResponseProfile] = Query(default=None, description="响应档位：scores / summary / full，默认取RESPONSE_PROFILE")
+):
+    """
+    批量分析面试数据，以NDJSON格式按完成顺序逐条返回结果
+    每行包含 index（输入序号）和 status；单条校验或评估失败时返回 detail，不影响其余条目
+    """
+    _, engine = get_spark_api()
+    profile = profile or RESPONSE_PROFILE
+    limit = min(concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY, max(len(items), 1))
+    
+    async def result_stream():
+        pending = asyncio.Queue()
+        for index, item in enumerate(items):
+            pending.put_nowait((index, item))
+        done = asyncio.Queue()
         
-        # 生成总结和建议
-        summary, recommendations = engine.generate_summary_and_recommendations(input_data, scores)
+        async def worker():
+            while True:
+                try:
+                    index, item = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    input_data = InterviewInput.model_validate(item)
+                except ValidationError as e:
+                    await done.put({"index": index, "status": "error", "detail": f"输入数据校验失败: {str(e)}"})
+                    continue
+                try:
+                    result = await _evaluate(engine, input_data, chart_format, chart_delivery, profile)
+                    line = {"index": index, "status": "ok",
+                            "result": result.model_dump(include=PROFILE_FIELDS[profile])}
+                except Exception as e:
+                    line = {"index": index, "status": "error", "detail": f"评估过程中发生错误: {str(e)}"}
+                await done.put(line)
         
-        return EvaluationResult(
-            scores=scores,
-            radar_chart_base64=radar_chart_base64,
-            summary=summary,
-            recommendations=recommendations
+        workers = [asyncio.create_task(worker()) for _ in range(limit)]
+        try:
+            for _ in range(len(items)):
+                line = await done.get()
+                yield response_encoding.dumps_json(line) + b"\n"
+        finally:
+            # 客户端断开时取消尚未完成的评估
+            for task in workers:
+                task.cancel()
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+def _sse(event: str, data) -> str:
+    """格式化一条Server-Sent Events消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/analyze/stream")
+async def analyze_interview_stream(
+    input_data: InterviewInput,
+    chart_format: Optional[ChartFormat] = Query(default=None, description="雷达图格式，默认取CHART_FORMAT"),
+    chart_delivery: Optional[ChartDelivery] = Query(default=None, description="雷达图返回方式，默认取CHART_DELIVERY")
+):
+    """
+    流式分析面试数据，以Server-Sent Events依次推送：
+    scores（六维评分）、chart（雷达图）、summary_delta（总结正文片段）、result（完整评估结果）
+    summary_delta 只含已解码的总结正文；生成中途失败时result中的总结为默认总结，以result为准
+    """
+    _, engine = get_spark_api()
+    
+    async def event_stream():
+        routes = model_routing.start_request(engine.router.budget_seconds)
+        try:
+            # 生成六维评分
+            scores = await engine.generate_six_dimension_scores(input_data)
+            yield _sse("scores", scores.model_dump())
+            
+            # 生成雷达图
+            chart_fields = await _render_chart_fields(scores, chart_format, chart_delivery)
+            yield _sse("chart", chart_fields)
+            
+            # 流式生成总结和建议
+            summary, recommendations = None, None
+            async for kind, payload in engine.stream_summary_and_recommendations(input_data, scores):
+                if kind == "delta":
+                    yield _sse("summary_delta", {"text": payload})
+                else:
+                    summary, recommendations = payload
+            
+            result = EvaluationResult(
+                scores=scores,
+                summary=summary,
+                recommendations=recommendations,
+                routes=routes,
+                **chart_fields
+            )
+            await _record_history(input_data, scores)
+            yield _sse("result", result.model_dump())
+        except Exception as e:
+            yield _sse("error", {"detail": f"评估过程中发生错误: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _process_job(payload: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """执行一个异步评估任务，按提交时的档位返回结果（旧版本提交的任务没有档位，按full处理）"""
+    _, engine = get_spark_api()
+    profile = options.get("profile") or "full"
+    result = await _evaluate(
+        engine,
+        InterviewInput.model_validate(payload),
+        options.get("chart_format"),
+        options.get("chart_delivery"),
+        profile
+    )
+    return result.model_dump(include=PROFILE_FIELDS[profile])
+
+@router.on_event("startup")
+async def start_job_queue():
+    """启动异步评估任务worker，继续执行上次未完成的任务"""
+    await job_queue.start()
+
+@router.on_event("shutdown")
+async def stop_job_queue():
+    """停止异步评估任务worker"""
+    if job_queue is not None:
+        await job_queue.stop()
+
+@router.post("/jobs", response_model=EvaluationJob, status_code=202)
+async def create_evaluation_job(
+    input_data: InterviewInput,
+    chart_format: Optional[ChartFormat] = Query(default=None, description="雷达图格式，默认取CHART_FORMAT"),
+    chart_delivery: Optional[ChartDelivery] = Query(default=None, description="雷达图返回方式，默认取CHART_DELIVERY"),
+    profile: Optional[ResponseProfile] = Query(default=None, description="响应档位：scores / summary / full，默认取RESPONSE_PROFILE"),
+    webhook_url: Optional[str] = Query(default=None, pattern=r"^https?://", description="任务完成后POST回调的地址")
+):
+    """
+    提交异步评估任务，立即返回任务ID；队列已满时返回429
+    """
+    try:
+        return await run_in_threadpool(
+            job_queue.submit,
+            input_data.model_dump(),
+            {"chart_format": chart_format, "chart_delivery": chart_delivery, "profile": profile or RESPONSE_PROFILE},
+            webhook_url
         )
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+@router.get("/jobs/{job_id}", response_model=EvaluationJob)
+async def get_evaluation_job(job_id: str):
+    """
+    查询异步评估任务状态，完成后返回评估结果
+    """
+    job = await run_in_threadpool(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="评估任务不存在")
+    return job
+
+@router.get("/charts/{chart_id}")
+async def get_chart(chart_id: str, request: Request):
+    """
+    按引用获取雷达图原始图片，支持ETag协商缓存
+    """
+    if not ChartStore.is_valid_id(chart_id):
+        raise HTTPException(status_code=404, detail="图表不存在")
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"评估过程中发生错误: {str(e)}")
+    chart = await run_in_threadpool(chart_store.get, chart_id)
+    if chart is None:
+        raise HTTPException(status_code=404, detail="图表不存在")
+    
+    data, media_type, etag = chart
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
+
+@router.post("/compare", response_model=CohortComparison)
+async def compare_with_cohort(
+    request: ComparisonRequest,
+    window_days: int = Query(default=90, ge=1, le=3650, description="统计最近多少天的历史评估"),
+    benchmark: Literal["p50", "p75", "p90"] = Query(default="p75", description="对比图使用的群体分位数"),
+    chart_format: Optional[ChartFormat] = Query(default=None, description="对比图格式，默认取CHART_FORMAT")
+):
+    """
+    将候选人六维评分与同岗位（未指定岗位时为全部）历史评估的群体分位数对比
+    """
+    history = await run_in_threadpool(get_evaluation_history)
+    if history is None:
+        raise HTTPException(status_code=404, detail="评估历史未启用")
+    from ..services.history_store import DEFAULT_QUANTILES
+    
+    histogram = await run_in_threadpool(history.cohort_histogram, request.position, window_days)
+    cohort_size = int(histogram[0].sum())
+    if cohort_size < history.min_cohort:
+        raise HTTPException(
+            status_code=404,
+            detail=f"该群体最近{window_days}天的历史评估不足{history.min_cohort}条（当前{cohort_size}条）"
+        )
+    
+    quantiles = history.percentiles(histogram)
+    percentiles = {
+        f"p{q}": SixDimensionScore(**dict(zip(SCORE_DIMENSIONS, row.tolist())))
+        for q, row in zip(DEFAULT_QUANTILES, quantiles)
+    }
+    ranks = history.percentile_ranks(histogram, request.scores)
+    chart = await _render_comparison_chart(
+        request.scores, percentiles[benchmark], f"群体{benchmark.upper()}", chart_format
+    )
+    
+    return CohortComparison(
+        position=request.position,
+        window_days=window_days,
+        cohort_size=cohort_size,
+        percentiles=percentiles,
+        percentile_ranks=SixDimensionScore(**dict(zip(SCORE_DIMENSIONS, ranks.tolist()))),
+        benchmark=benchmark,
+        comparison_chart_base64=chart
+    )
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """
+    LLM响应缓存命中统计
+    """
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await run_in_threadpool(response_cache.stats))}
 
 @router.get("/health")
 async def health_check():
     """
-    健康检查接口
+    健康检查接口（存活检查）：只要事件循环能响应即返回200，不检查外部依赖
+    """
+    return {"status": "healthy", "message": "Interview evaluation API is running"}
+
+@router.get("/ready")
+async def readiness_check(response: Response):
+    """
+    就绪检查接口：启动预热完成且星火API可连通时返回200，否则返回503
+    附带各启动阶段耗时和最近一次连通性探测结果
     """
-    return {"status": "healthy", "message": "Interview evaluation API is running"}
\ No newline at end of file
+    spark = dict(spark_status) if probe_task is not None else None
+    if not warmup.is_ready():
+        status = "warming_up"
+    elif spark is not None and evaluation_engine is not None and evaluation_engine.spark_api is None:
+        # fast模式未配置星火API，不依赖其连通性
+        status, spark = "ready", None
+    elif spark is not None and spark["reachable"] is None:
+        status = "warming_up"
+    elif spark is not None and not spark["reachable"]:
+        status = "spark_unreachable"
+    else:
+        status = "ready"
+    if status != "ready":
+        response.status_code = 503
+    return {"status": status, "pid": os.getpid(), "spark": spark, **warmup.report()}
\ No newline at end of file
@@ -0,0 +1,493 @@
+"""
+离线批量重新评分
+
+直接基于 EvaluationEngine 和图表生成器对历史面试记录重新评分，不经过HTTP接口。
+流式读取 JSONL / CSV / Parquet 输入，以有限并发评分，结果逐条写入 JSONL 或 Parquet；
+输出同时作为断点：中断后重新运行同一命令会跳过已写入的记录，只处理剩余部分。
+
+用法：
+    python -m src.cli.rescore interviews.jsonl --output rescored.jsonl --concurrency 16
+
+    # Parquet 输出为分片目录，同时把雷达图写入文件
+    python -m src.cli.rescore archive.parquet --output rescored.parquet --chart png --chart-dir charts/
+
+输入记录的字段与 /api/evaluation/analyze 的请求体相同，另有一个记录ID字段（默认 id，
+缺失时使用记录在输入中的序号）。CSV 中的嵌套字段（面试问答、语音情感、肢体语言）为JSON字符串。
+读写 Parquet 需要安装 pyarrow。
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import math
+import os
+import re
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Set
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+# 允许以脚本方式直接运行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.models.evaluation_models import SCORE_DIMENSIONS, InterviewInput
+from src.services import model_routing
+from src.services.chart_pool import ChartRenderPool
+from src.services.evaluation_engine import EvaluationEngine
+from src.services.response_cache import LLMResponseCache
+
+FORMATS = {
+    ".jsonl": "jsonl", ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet", ".pq": "parquet",
+}
+
+# CSV 中以JSON字符串保存的嵌套字段
+NESTED_FIELDS = ("interview_qa_pairs", "voice_emotion_analysis", "body_language_analysis")
+
+
+def detect_format(path: str, explicit: Optional[str] = None) -> str:
+    if explicit:
+        return explicit
+    fmt = FORMATS.get(os.path.splitext(path.rstrip("/"))[1].lower())
+    if fmt is None:
+        raise SystemExit(f"无法根据扩展名识别格式: {path}，请通过 --input-format / --output-format 指定")
+    return fmt
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("读写Parquet需要安装pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+# ---------------------------------------------------------------- 输入
+
+def count_records(path: str, fmt: str) -> int:
+    """输入记录数，用于计算进度和剩余时间；JSONL/CSV 按行数估算"""
+    if fmt == "parquet":
+        return _import_pyarrow().parquet.ParquetFile(path).metadata.num_rows
+
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(0, lines - 1) if fmt == "csv" else lines
+
+
+def iter_batches(path: str, fmt: str, batch_size: int) -> Iterator[List[dict]]:
+    """按批流式读取输入记录"""
+    if fmt == "jsonl":
+        batch = []
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    batch.append({"__error__": f"第{number}行JSON解析失败: {e}"})
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    elif fmt == "csv":
+        import pandas as pd
+
+        for chunk in pd.read_csv(path, chunksize=batch_size, dtype=object, keep_default_na=False, na_values=[""]):
+            records = chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+            for record in records:
+                for field in NESTED_FIELDS:
+                    value = record.get(field)
+                    if isinstance(value, str):
+                        try:
+                            record[field] = json.loads(value)
+                        except json.JSONDecodeError as e:
+                            record["__error__"] = f"字段{field}不是合法的JSON: {e}"
+            yield records
+
+    else:
+        parquet = _import_pyarrow().parquet
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pylist()
+
+
+# ---------------------------------------------------------------- 输出
+
+class JSONLWriter:
+    """逐条追加写入JSONL，每条写入后立即刷新；无法序列化的记录抛出TypeError/ValueError且不写入任何内容"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def completed_ids(self) -> Set[str]:
+        """已写入的记录ID；上次中断时写了一半的末行会被截掉"""
+        if not os.path.exists(self.path):
+            return set()
+        ids = set()
+        valid = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    ids.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    break
+                valid += len(line)
+        if valid != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+        return ids
+
+    def write(self, row: dict):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetPartWriter:
+    """
+    写入Parquet分片目录：结果先缓存在内存，每满 flush_rows 条写成一个完整的分片文件
+    中断时只丢失尚未写出的缓存结果，重新运行时重新评分（命中LLM缓存时几乎没有开销）
+    每条记录写入缓存前先按表结构转换一次，不符合表结构的记录在写入时抛出TypeError/ValueError，不会拖累同一分片的其他记录
+    """
+
+    def __init__(self, path: str, flush_rows: int = 1000):
+        self.path = path
+        self.flush_rows = flush_rows
+        self._rows: List[dict] = []
+        self._pa = _import_pyarrow()
+        self._schema = self._pa.schema(
+            [("id", self._pa.string())]
+            + [(dim, self._pa.float64()) for dim in SCORE_DIMENSIONS]
+            + [
+                ("summary", self._pa.string()),
+                ("recommendations", self._pa.list_(self._pa.string())),
+                ("routes", self._pa.string()),
+                ("chart_path", self._pa.string()),
+                ("elapsed_seconds", self._pa.float64()),
+            ]
+        )
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def completed_ids(self) -> Set[str]:
+        ids = set()
+        for part in self._parts():
+            ids.update(self._pa.parquet.read_table(part, columns=["id"]).column("id").to_pylist())
+        return ids
+
+    def write(self, row: dict):
+        row = dict(row, routes=json.dumps(row["routes"], ensure_ascii=False))
+        self._pa.Table.from_pylist([row], schema=self._schema)
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pylist(self._rows, schema=self._schema)
+        part = os.path.join(self.path, f"part-{len(self._parts()):05d}.parquet")
+        # 先写临时文件再改名，分片文件要么完整要么不存在
+        self._pa.parquet.write_table(table, part + ".tmp")
+        os.replace(part + ".tmp", part)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+
+
+# ---------------------------------------------------------------- 进度
+
+class Progress:
+    """定期输出已完成数量、吞吐量和预计剩余时间；吞吐量按最近一分钟计算"""
+
+    def __init__(self, total: int, skipped: int, interval: float):
+        self.total = total
+        self.skipped = skipped
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._samples = deque([(self.started, 0)])
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.skipped - self.done - self.failed)
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        count = self.done + self.failed
+        self._samples.append((now, count))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= 60:
+            self._samples.popleft()
+        then, previous = self._samples[0]
+        return (count - previous) / (now - then) if now > then else 0.0
+
+    def report(self):
+        rate = self.rate()
+        finished = self.skipped + self.done + self.failed
+        percent = finished / self.total * 100 if self.total else 100.0
+        eta = _format_seconds(self.remaining / rate) if rate > 0 else "--:--:--"
+        print(f"已完成 {finished}/{self.total} ({percent:.1f}%) | 本次评分 {self.done} | 跳过 {self.skipped} | "
+              f"失败 {self.failed} | {rate:.2f} 条/秒 | 预计剩余 {eta}", file=sys.stderr, flush=True)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        average = self.done / elapsed if elapsed > 0 else 0.0
+        print(f"完成：本次评分 {self.done} 条，失败 {self.failed} 条，跳过 {self.skipped} 条，"
+              f"耗时 {_format_seconds(elapsed)}，平均 {average:.2f} 条/秒", file=sys.stderr, flush=True)
+
+
+def _format_seconds(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+# ---------------------------------------------------------------- 评分
+
+def _record_id(record: dict, index: int, id_field: str) -> str:
+    value = record.pop(id_field, None)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return f"#{index}"
+    return str(value)
+
+
+class Rescorer:
+    def __init__(self, args):
+        self.args = args
+        self.engine = EvaluationEngine.from_env(cache=LLMResponseCache.from_env(), mode=args.mode)
+        self.chart_pool: Optional[ChartRenderPool] = None
+        self.chart_generator = None
+        self._chart_executor: Optional[ThreadPoolExecutor] = None
+
+        if args.chart == "png" and args.chart_processes > 0:
+            self.chart_pool = ChartRenderPool(args.chart_processes, preset=args.chart_preset)
+        elif args.chart == "png":
+            from src.services.chart_generator import RadarChartGenerator
+            self.chart_generator = RadarChartGenerator(args.chart_preset)
+            # 图表模板按线程缓存，固定用一个线程渲染
+            self._chart_executor = ThreadPoolExecutor(max_workers=1)
+        elif args.chart == "svg":
+            from src.services.svg_chart_generator import SVGRadarChartGenerator
+            self.chart_generator = SVGRadarChartGenerator(args.chart_preset)
+        if args.chart:
+            os.makedirs(args.chart_dir, exist_ok=True)
+
+    async def _render_chart(self, record_id: str, scores) -> str:
+        if self.chart_pool is not None:
+            data_uri = await self.chart_pool.render_radar_chart(scores)
+        elif self._chart_executor is not None:
+            loop = asyncio.get_running_loop()
+            data_uri = await loop.run_in_executor(self._chart_executor, self.chart_generator.generate_radar_chart, scores)
+        else:
+            data_uri = self.chart_generator.generate_radar_chart(scores)
+
+        name = re.sub(r"[^\w.-]", "_", record_id) + "." + self.args.chart
+        path = os.path.join(self.args.chart_dir, name)
+        with open(path, "wb") as f:
+            f.write(base64.b64decode(data_uri.split(",", 1)[1]))
+        return path
+
+    async def evaluate(self, record_id: str, record: dict) -> dict:
+        started = time.perf_counter()
+        routes = model_routing.start_request()
+        # CSV/Parquet 中的空值按未提供处理，使用模型默认值
+        input_data = InterviewInput(**{key: value for key, value in record.items() if value is not None})
+        scores, summary, recommendations = await self.engine.generate_evaluation(input_data)
+        chart_path = await self._render_chart(record_id, scores) if self.args.chart else None
+        return {
+            "id": record_id,
+            **scores.model_dump(),
+            "summary": summary,
+            "recommendations": recommendations,
+            "routes": routes,
+            "chart_path": chart_path,
+            "elapsed_seconds": round(time.perf_counter() - started, 4),
+        }
+
+    async def close(self):
+        if self.chart_pool is not None:
+            self.chart_pool.shutdown()
+        if self._chart_executor is not None:
+            self._chart_executor.shutdown(wait=False)
+        if self.engine.spark_api is not None:
+            await self.engine.spark_api.aclose()
+
+
+async def run(args):
+    input_format = detect_format(args.input, args.input_format)
+    output_format = detect_format(args.output, args.output_format)
+    writer = JSONLWriter(args.output) if output_format == "jsonl" else ParquetPartWriter(args.output, args.flush_rows)
+    errors_path = args.errors or args.output.rstrip("/") + ".errors.jsonl"
+
+    completed = writer.completed_ids()
+    total = count_records(args.input, input_format)
+    if args.limit is not None:
+        total = min(total, len(completed) + args.limit)
+    progress = Progress(total, skipped=len(completed), interval=args.report_interval)
+    print(f"输入约 {total} 条记录，输出中已有 {len(completed)} 条", file=sys.stderr, flush=True)
+
+    try:
+        rescorer = Rescorer(args)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    loop = asyncio.get_running_loop()
+    # 从断点继续时保留上次运行的失败记录，重新失败的记录会再追加一行
+    errors_file = open(errors_path, "a" if completed else "w", encoding="utf-8")
+
+    async def produce():
+        """在线程中读取输入，跳过已完成的记录，按读取顺序放入队列"""
+        batches = iter_batches(args.input, input_format, args.batch_size)
+        index = 0
+        scheduled = 0
+        seen: Set[str] = set()
+        while True:
+            batch = await loop.run_in_executor(None, next, batches, None)
+            if batch is None:
+                return
+            for record in batch:
+                record_id = _record_id(record, index, args.id_field)
+                index += 1
+                if record_id in completed:
+                    continue
+                if record_id in seen:
+                    # 输入中重复的ID只评分一次
+                    progress.skipped += 1
+                    continue
+                if args.limit is not None and scheduled >= args.limit:
+                    return
+                seen.add(record_id)
+                scheduled += 1
+                await queue.put((record_id, record))
+
+    def fail(record_id: str, error: str):
+        progress.failed += 1
+        errors_file.write(json.dumps({"id": record_id, "error": error}, ensure_ascii=False) + "\n")
+        errors_file.flush()
+
+    async def consume():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            record_id, record = item
+            error = record.pop("__error__", None)
+            if error is not None:
+                fail(record_id, error)
+                continue
+            try:
+                row = await rescorer.evaluate(record_id, record)
+            except ValidationError as e:
+                fail(record_id, f"输入数据格式错误: {e}")
+                continue
+            except Exception as e:
+                fail(record_id, str(e) or type(e).__name__)
+                continue
+            try:
+                writer.write(row)
+            except (TypeError, ValueError) as e:
+                # 结果无法序列化（如模型返回了非字符串的建议）只记为该条失败；磁盘写入错误照常中止
+                fail(record_id, f"结果无法写入输出: {e}")
+                continue
+            progress.done += 1
+
+    reporter = asyncio.create_task(progress.run())
+    consumers = [asyncio.create_task(consume()) for _ in range(args.concurrency)]
+    try:
+        await produce()
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+    finally:
+        for task in consumers + [reporter]:
+            task.cancel()
+        await asyncio.gather(*consumers, reporter, return_exceptions=True)
+        # 已完成的结果全部写出后才退出，保证断点与输出一致
+        writer.close()
+        errors_file.close()
+        await rescorer.close()
+        progress.report()
+        progress.summary()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="离线批量重新评分")
+    parser.add_argument("input", help="输入文件（.jsonl / .csv / .parquet）")
+    parser.add_argument("--output", required=True, help="输出文件（.jsonl）或Parquet分片目录（.parquet）")
+    parser.add_argument("--input-format", choices=["jsonl", "csv", "parquet"], default=None)
+    parser.add_argument("--output-format", choices=["jsonl", "parquet"], default=None)
+    parser.add_argument("--errors", default=None, help="失败记录输出文件，默认为 <output>.errors.jsonl")
+    parser.add_argument("--id-field", default="id", help="记录ID字段，缺失时使用记录序号")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时评分的记录数")
+    parser.add_argument("--mode", choices=["standard", "fused", "fast"], default=None,
+                        help="评估模式，默认取EVALUATION_MODE")
+    parser.add_argument("--limit", type=int, default=None, help="本次最多评分的记录数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每次读取的记录数")
+    parser.add_argument("--flush-rows", type=int, default=1000, help="Parquet每个分片的记录数")
+    parser.add_argument("--chart", choices=["png", "svg"], default=None, help="同时生成雷达图文件")
+    parser.add_argument("--chart-dir", default="charts", help="雷达图输出目录")
+    parser.add_argument("--chart-preset", choices=["full", "medium", "thumbnail"], default=None)
+    parser.add_argument("--chart-processes", type=int, default=0, help="PNG渲染进程数，0表示单线程渲染")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="进度输出间隔（秒）")
+    return parser
+
+
+def main():
+    load_dotenv()
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency 必须大于0")
+
+    async def guarded():
+        # SIGTERM 与 Ctrl-C 一样取消评分，已完成的结果写出后退出
+        task = asyncio.current_task()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        await run(args)
+
+    try:
+        asyncio.run(guarded())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("已中断，重新运行同一命令将从断点继续", file=sys.stderr)
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any, Union
+from pydantic import BaseModel, Discriminator, Field, Tag
+from typing import Annotated, List, Dict, Optional, Any, Union
 
 class InterviewInput(BaseModel):
     """面试输入数据模型 - 灵活输入格式"""
@@ -11,6 +11,9 @@ class InterviewInput(BaseModel):
     # 新增：允许用户直接输入文本描述或复杂JSON数据
     text_description: Optional[str] = Field(default="", description="面试情况的文字描述，支持复杂JSON字符串")
     
+    # 应聘岗位，用于按岗位统计历史评估和群体对比
+    position: Optional[str] = Field(default=None, description="应聘岗位")
+    
     class Config:
         # 允许任意额外字段
         extra = "allow"
@@ -24,9 +27,67 @@ class SixDimensionScore(BaseModel):
     logical_thinking: float  # 逻辑思维 (0-100)
     learning_potential: float  # 学习潜力 (0-100)
 
+# 六维评分字段，顺序与评分模型一致
+SCORE_DIMENSIONS = list(SixDimensionScore.model_fields)
+
 class EvaluationResult(BaseModel):
     """评估结果模型"""
     scores: SixDimensionScore
-    radar_chart_base64: str  # 六维雷达图的base64编码
+    radar_chart_base64: Optional[str] = None  # 六维雷达图的base64编码（按引用返回时为空）
+    radar_chart_url: Optional[str] = None  # 六维雷达图地址（仅按引用返回时提供）
     summary: str  # 评估总结
-    recommendations: List[str]  # 改进建议
\ No newline at end of file
+    recommendations: List[str]  # 改进建议
+    routes: Optional[Dict[str, str]] = None  # 各阶段实际使用的模型（星火domain，本地计算为local）
+
+class ScoresProfileResult(BaseModel):
+    """scores档位的评估结果：只含六维评分"""
+    scores: SixDimensionScore
+
+class SummaryProfileResult(BaseModel):
+    """summary档位的评估结果：评分、总结和建议，不含雷达图"""
+    scores: SixDimensionScore
+    summary: str
+    recommendations: List[str]
+    routes: Optional[Dict[str, str]] = None
+
+def _result_profile(value: Any) -> str:
+    """判断评估结果所属的响应档位：含雷达图字段为full，含总结为summary，否则为scores"""
+    if not isinstance(value, dict):
+        return {EvaluationResult: "full", SummaryProfileResult: "summary"}.get(type(value), "scores")
+    if "radar_chart_base64" in value or "radar_chart_url" in value:
+        return "full"
+    return "summary" if "summary" in value else "scores"
+
+# 按档位返回的评估结果
+ProfileResult = Annotated[
+    Union[
+        Annotated[ScoresProfileResult, Tag("scores")],
+        Annotated[SummaryProfileResult, Tag("summary")],
+        Annotated[EvaluationResult, Tag("full")],
+    ],
+    Discriminator(_result_profile),
+]
+
+class EvaluationJob(BaseModel):
+    """异步评估任务模型"""
+    job_id: str
+    status: str  # queued / running / succeeded / failed
+    created_at: float  # 创建时间（Unix时间戳）
+    updated_at: float  # 最近更新时间（Unix时间戳）
+    result: Optional[ProfileResult] = None  # 评估结果（成功时提供，字段取决于提交时的profile档位）
+    error: Optional[str] = None  # 错误信息（失败时提供）
+
+class ComparisonRequest(BaseModel):
+    """群体对比请求模型"""
+    scores: SixDimensionScore  # 候选人六维评分
+    position: Optional[str] = None  # 对比的岗位群体，为空时与全部历史评估对比
+
+class CohortComparison(BaseModel):
+    """群体对比结果模型"""
+    position: Optional[str]  # 岗位群体（为空表示全部岗位）
+    window_days: int  # 统计时间窗口（天）
+    cohort_size: int  # 群体中的评估数量
+    percentiles: Dict[str, SixDimensionScore]  # 群体各维度分位数，键为 p25 / p50 / p75 / p90
+    percentile_ranks: SixDimensionScore  # 候选人各维度在群体中的百分位排名（0-100）
+    benchmark: str  # 对比图使用的基准分位数
+    comparison_chart_base64: str  # 候选人与群体基准的对比雷达图
\ No newline at end of file
@@ -1,33 +1,186 @@
 import matplotlib
 matplotlib.use('Agg')  # 使用非GUI后端
-import matplotlib.pyplot as plt
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 import base64
 import io
-from typing import List
+import logging
+import os
+import threading
+from typing import List, Optional
 from ..models.evaluation_models import SixDimensionScore
 
-# 设置中文字体支持
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+logger = logging.getLogger(__name__)
+
+# 中文字体候选，按优先级排列；Linux容器中通常只有Noto/文泉驿系列
+CJK_FONT_CANDIDATES = [
+    'SimHei', 'Microsoft YaHei', 'PingFang SC', 'Noto Sans CJK SC', 'Noto Sans SC',
+    'Source Han Sans SC', 'WenQuanYi Zen Hei', 'WenQuanYi Micro Hei',
+]
+
+# 已解析的中文字体名，未找到时为空字符串
+_cjk_font: Optional[str] = None
+_font_lock = threading.Lock()
+
+
+def resolve_cjk_font() -> str:
+    """
+    解析一次可用的中文字体并写入rcParams，返回字体名，未找到时返回空字符串
+    只把实际存在的字体写入font.sans-serif，避免每次绘制文字时逐个查找缺失字体；
+    CHART_FONT_PATH 可指定额外的字体文件
+    """
+    global _cjk_font
+    with _font_lock:
+        if _cjk_font is not None:
+            return _cjk_font
+
+        font_path = os.getenv("CHART_FONT_PATH")
+        if font_path:
+            font_manager.fontManager.addfont(font_path)
+            candidates = [font_manager.FontProperties(fname=font_path).get_name()] + CJK_FONT_CANDIDATES
+        else:
+            candidates = CJK_FONT_CANDIDATES
+
+        available = {font.name for font in font_manager.fontManager.ttflist}
+        _cjk_font = next((name for name in candidates if name in available), '')
+        if not _cjk_font:
+            logger.warning("未找到中文字体，图表中的中文将无法正常显示，可通过CHART_FONT_PATH指定字体文件")
+
+        matplotlib.rcParams['font.sans-serif'] = [_cjk_font, 'DejaVu Sans'] if _cjk_font else ['DejaVu Sans']
+        matplotlib.rcParams['axes.unicode_minus'] = False
+        return _cjk_font
+
+
+# 图表尺寸预设：边长（英寸）、分辨率、字号缩放
+CHART_PRESETS = {
+    "full": {"size": 10, "dpi": 150, "font_scale": 1.0},
+    "medium": {"size": 6, "dpi": 120, "font_scale": 0.7},
+    "thumbnail": {"size": 4, "dpi": 100, "font_scale": 0.55},
+}
+
+
+class _RadarTemplate:
+    """
+    雷达图模板
+    坐标轴、网格、维度标签和标题只构建一次，每张图只更新多边形和分数标注
+    """
+
+    def __init__(self, dimensions: List[str], size: float, dpi: int, font_scale: float):
+        self.dpi = dpi
+        self.angles = np.linspace(0, 2 * np.pi, len(dimensions), endpoint=False)
+        self.closed_angles = np.append(self.angles, self.angles[0])
+
+        self.fig = Figure(figsize=(size, size))
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot(projection='polar')
+
+        # 静态部分：坐标轴、网格、标题
+        ax.set_xticks(self.angles)
+        ax.set_xticklabels(dimensions, fontsize=12 * font_scale)
+        ax.set_ylim(0, 100)
+        ax.set_yticks([20, 40, 60, 80, 100])
+        ax.set_yticklabels(['20', '40', '60', '80', '100'], fontsize=10 * font_scale)
+        ax.grid(True)
+        ax.set_title('面试评估六维图', size=16 * font_scale, fontweight='bold', pad=20 * font_scale)
+
+        # 动态部分：评分折线、填充区域和分数标注
+        zeros = np.zeros(len(self.closed_angles))
+        self.line, = ax.plot(self.closed_angles, zeros, 'o-', linewidth=2 * font_scale,
+                             markersize=6 * font_scale, color='#1f77b4', label='面试者评分')
+        self.polygon, = ax.fill(self.closed_angles, zeros, alpha=0.25, color='#1f77b4')
+        self.annotations = [
+            ax.annotate('',
+                        xy=(angle, 0),
+                        xytext=(10 * font_scale, 10 * font_scale),
+                        textcoords='offset points',
+                        fontsize=10 * font_scale,
+                        bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.8))
+            for angle in self.angles
+        ]
+
+        # 以满分状态计算一次裁剪区域，之后复用，省去每张图的tight bbox计算
+        self._update([100.0] * len(dimensions))
+        self.bbox = self.fig.get_tightbbox(self.canvas.get_renderer()).padded(0.1)
+
+    def _update(self, values: List[float]):
+        """更新动态部分"""
+        closed_values = np.append(values, values[0])
+        self.line.set_data(self.closed_angles, closed_values)
+        self.polygon.set_xy(np.column_stack([self.closed_angles, closed_values]))
+        for annotation, angle, value in zip(self.annotations, self.angles, values):
+            annotation.xy = (angle, value)
+            annotation.set_text(f'{value:.1f}')
+
+    def render(self, values: List[float]) -> bytes:
+        """渲染一张雷达图并返回PNG字节"""
+        self._update(values)
+        buffer = io.BytesIO()
+        self.fig.savefig(buffer, format='png', dpi=self.dpi, bbox_inches=self.bbox,
+                         facecolor='white', edgecolor='none')
+        data = buffer.getvalue()
+        buffer.close()
+        return data
+
 
 class RadarChartGenerator:
-    def __init__(self):
+    def __init__(self, preset: str = None):
         self.dimensions = [
             '技能匹配',
             '沟通表达',
             '情绪稳定',
-            '专业素养', 
+            '专业素养',
             '逻辑思维',
             '学习潜力'
         ]
-    
-    def generate_radar_chart(self, scores: SixDimensionScore) -> str:
+        self.preset = preset or os.getenv("CHART_PRESET", "full")
+        if self.preset not in CHART_PRESETS:
+            raise ValueError(f"不支持的图表预设: {self.preset}，可选值: {', '.join(CHART_PRESETS)}")
+        self.font = resolve_cjk_font()
+
+        # 模板包含可变的图形对象，每个线程各持有一份，保证并行渲染安全
+        self._local = threading.local()
+
+    def _get_template(self, preset: str = None) -> _RadarTemplate:
+        """获取当前线程指定预设的雷达图模板，首次使用时构建"""
+        preset = preset or self.preset
+        if preset not in CHART_PRESETS:
+            raise ValueError(f"不支持的图表预设: {preset}，可选值: {', '.join(CHART_PRESETS)}")
+
+        templates = getattr(self._local, "templates", None)
+        if templates is None:
+            templates = self._local.templates = {}
+        if preset not in templates:
+            templates[preset] = _RadarTemplate(self.dimensions, **CHART_PRESETS[preset])
+        return templates[preset]
+
+    def warm_up(self, preset: str = None):
+        """构建当前线程的雷达图模板并渲染一次，完成字形缓存的初始化"""
+        self._get_template(preset).render([60.0] * len(self.dimensions))
+
+    def generate_radar_chart(self, scores: SixDimensionScore, preset: str = None) -> str:
         """
         生成六维雷达图并返回base64编码的图片
         """
-        # 提取分数
-        values = [
+        return self.generate_radar_charts([scores], preset)[0]
+
+    def generate_radar_charts(self, scores_list: List[SixDimensionScore], preset: str = None) -> List[str]:
+        """
+        在同一模板上批量生成六维雷达图，返回base64编码的图片列表
+        """
+        template = self._get_template(preset)
+        charts = []
+        for scores in scores_list:
+            png = template.render(self._score_values(scores))
+            image_base64 = base64.b64encode(png).decode('utf-8')
+            charts.append(f"data:image/png;base64,{image_base64}")
+        return charts
+
+    @staticmethod
+    def _score_values(scores: SixDimensionScore) -> List[float]:
+        """按维度顺序提取分数"""
+        return [
             scores.skill_match,
             scores.communication,
             scores.emotional_stability,
@@ -35,56 +188,10 @@ class RadarChartGenerator:
             scores.logical_thinking,
             scores.learning_potential
         ]
-        
-        # 创建图形
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
-        
-        # 设置角度
-        angles = np.linspace(0, 2 * np.pi, len(self.dimensions), endpoint=False).tolist()
-        angles += angles[:1]  # 闭合图形
-        values += values[:1]  # 闭合图形
-        
-        # 绘制雷达图
-        ax.plot(angles, values, 'o-', linewidth=2, color='#1f77b4', label='面试者评分')
-        ax.fill(angles, values, alpha=0.25, color='#1f77b4')
-        
-        # 设置坐标轴
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(self.dimensions, fontsize=12)
-        ax.set_ylim(0, 100)
-        ax.set_yticks([20, 40, 60, 80, 100])
-        ax.set_yticklabels(['20', '40', '60', '80', '100'], fontsize=10)
-        ax.grid(True)
-        
-        # 添加标题
-        plt.title('面试评估六维图', size=16, fontweight='bold', pad=20)
-        
-        # 在每个顶点显示分数
-        for angle, value, dim in zip(angles[:-1], values[:-1], self.dimensions):
-            ax.annotate(f'{value:.1f}', 
-                       xy=(angle, value), 
-                       xytext=(10, 10), 
-                       textcoords='offset points',
-                       fontsize=10,
-                       bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.8))
-        
-        # 保存图形到内存
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        
-        # 转换为base64
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        # 清理内存
-        plt.close(fig)
-        buffer.close()
-        
-        return f"data:image/png;base64,{image_base64}"
-    
-    def generate_comparison_chart(self, current_scores: SixDimensionScore, 
-                                 benchmark_scores: SixDimensionScore = None) -> str:
+
+    def generate_comparison_chart(self, current_scores: SixDimensionScore,
+                                 benchmark_scores: SixDimensionScore = None,
+                                 benchmark_label: str = '优秀基准') -> str:
         """
         生成对比雷达图（当前分数 vs 基准分数）
         """
@@ -92,40 +199,27 @@ class RadarChartGenerator:
             # 默认基准分数（优秀标准）
             benchmark_values = [85, 85, 85, 85, 85, 85]
         else:
-            benchmark_values = [
-                benchmark_scores.skill_match,
-                benchmark_scores.communication,
-                benchmark_scores.emotional_stability,
-                benchmark_scores.professionalism,
-                benchmark_scores.logical_thinking,
-                benchmark_scores.learning_potential
-            ]
-        
-        current_values = [
-            current_scores.skill_match,
-            current_scores.communication,
-            current_scores.emotional_stability,
-            current_scores.professionalism,
-            current_scores.logical_thinking,
-            current_scores.learning_potential
-        ]
-        
-        # 创建图形
-        fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
-        
+            benchmark_values = self._score_values(benchmark_scores)
+
+        current_values = self._score_values(current_scores)
+
+        # 创建图形 - 不经过pyplot全局状态，可在多个线程中并行渲染
+        fig = Figure(figsize=(10, 10))
+        ax = fig.add_subplot(projection='polar')
+
         # 设置角度
         angles = np.linspace(0, 2 * np.pi, len(self.dimensions), endpoint=False).tolist()
         angles += angles[:1]
         current_values += current_values[:1]
         benchmark_values += benchmark_values[:1]
-        
+
         # 绘制雷达图
         ax.plot(angles, current_values, 'o-', linewidth=2, color='#1f77b4', label='当前评分')
         ax.fill(angles, current_values, alpha=0.25, color='#1f77b4')
-        
-        ax.plot(angles, benchmark_values, 'o-', linewidth=2, color='#ff7f0e', label='优秀基准')
+
+        ax.plot(angles, benchmark_values, 'o-', linewidth=2, color='#ff7f0e', label=benchmark_label)
         ax.fill(angles, benchmark_values, alpha=0.15, color='#ff7f0e')
-        
+
         # 设置坐标轴
         ax.set_xticks(angles[:-1])
         ax.set_xticklabels(self.dimensions, fontsize=12)
@@ -133,22 +227,21 @@ class RadarChartGenerator:
         ax.set_yticks([20, 40, 60, 80, 100])
         ax.set_yticklabels(['20', '40', '60', '80', '100'], fontsize=10)
         ax.grid(True)
-        
+
         # 添加标题和图例
-        plt.title('面试评估对比图', size=16, fontweight='bold', pad=20)
-        plt.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
-        
+        ax.set_title('面试评估对比图', size=16, fontweight='bold', pad=20)
+        ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+
         # 保存图形到内存
         buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight',
-                   facecolor='white', edgecolor='none')
+        fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight',
+                    facecolor='white', edgecolor='none')
         buffer.seek(0)
-        
+
         # 转换为base64
         image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
+
         # 清理内存
-        plt.close(fig)
         buffer.close()
-        
-        return f"data:image/png;base64,{image_base64}"
\ No newline at end of file
+
+        return f"data:image/png;base64,{image_base64}"
@@ -0,0 +1,109 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from ..models.evaluation_models import SixDimensionScore
+
+# 子进程内的图表生成器，由进程初始化函数创建
+_worker_generator = None
+
+
+def _init_worker(preset: Optional[str]):
+    """子进程初始化：加载matplotlib、解析字体并预先构建雷达图模板"""
+    global _worker_generator
+    from .chart_generator import RadarChartGenerator
+
+    _worker_generator = RadarChartGenerator(preset)
+    # 预渲染一次，完成字体缓存和模板的初始化
+    _worker_generator.warm_up()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _render_radar_chart(scores: dict, preset: Optional[str]) -> str:
+    return _worker_generator.generate_radar_chart(SixDimensionScore(**scores), preset)
+
+
+def _render_comparison_chart(current_scores: dict, benchmark_scores: Optional[dict], benchmark_label: str) -> str:
+    benchmark = SixDimensionScore(**benchmark_scores) if benchmark_scores else None
+    return _worker_generator.generate_comparison_chart(SixDimensionScore(**current_scores), benchmark,
+                                                       benchmark_label)
+
+
+class ChartRenderPool:
+    """
+    图表渲染进程池
+    matplotlib渲染是CPU密集型且持有GIL，放到独立进程中渲染，吞吐随CPU核数扩展；
+    等待中的任务数有上限，超出时调用方异步等待，不会阻塞事件循环
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 64, preset: Optional[str] = None):
+        if max_workers < 1:
+            raise ValueError("图表渲染进程数必须大于0")
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.preset = preset
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ChartRenderPool"]:
+        """根据环境变量创建进程池，CHART_POOL_SIZE为0时返回None（在线程池中渲染）"""
+        max_workers = int(os.getenv("CHART_POOL_SIZE", 0))
+        if max_workers <= 0:
+            return None
+        return cls(max_workers, max_queue=int(os.getenv("CHART_POOL_QUEUE_SIZE", 64)))
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """首次使用时启动进程池；使用spawn避免复制父进程中的事件循环和线程状态"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.preset,)
+            )
+        return self._executor
+
+    async def _submit(self, fn, *args) -> str:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._get_executor(), fn, *args)
+            except BrokenProcessPool:
+                # 子进程异常退出，下次调用时重建进程池
+                self._executor = None
+                raise
+
+    async def warm_up(self):
+        """启动全部渲染进程并等待其完成初始化"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self.max_workers)))
+
+    async def render_radar_chart(self, scores: SixDimensionScore, preset: Optional[str] = None) -> str:
+        """在子进程中生成六维雷达图"""
+        return await self._submit(_render_radar_chart, scores.model_dump(), preset)
+
+    async def render_comparison_chart(self, current_scores: SixDimensionScore,
+                                      benchmark_scores: SixDimensionScore = None,
+                                      benchmark_label: str = '优秀基准') -> str:
+        """在子进程中生成对比雷达图"""
+        benchmark = benchmark_scores.model_dump() if benchmark_scores is not None else None
+        return await self._submit(_render_comparison_chart, current_scores.model_dump(), benchmark,
+                                  benchmark_label)
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from ..models.evaluation_models import SixDimensionScore
+
+CHART_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+_CHART_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.(png|svg)$")
+
+# 超出上限时淘汰到上限的该比例，之后写满这部分空间前不需要再扫描目录
+EVICT_TARGET_RATIO = 0.9
+
+
+class ChartStore:
+    """
+    按引用提供的图表存储
+    图表ID由评分向量、格式和尺寸预设确定，相同评分直接复用已渲染的图表；
+    文件保存在本地目录中供多个worker共享，总大小超出上限时淘汰最久未访问的图表；
+    写入时只累加本进程估算的总大小，估算值超出上限或距上次扫描超过 rescan_interval 秒（计入其他worker的写入）时才扫描目录
+    """
+
+    def __init__(self, directory: str = "cache/charts", max_bytes: int = 256 * 1024 * 1024,
+                 rescan_interval: float = 60.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_interval = rescan_interval
+        self._etags: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        # 目录总大小的估算值，首次写入时扫描得到
+        self._estimated_bytes: Optional[int] = None
+        self._last_scan = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "ChartStore":
+        """根据环境变量创建图表存储"""
+        return cls(
+            directory=os.getenv("CHART_STORE_PATH", "cache/charts"),
+            max_bytes=int(os.getenv("CHART_STORE_MAX_BYTES", 256 * 1024 * 1024)),
+            rescan_interval=float(os.getenv("CHART_STORE_RESCAN_INTERVAL", 60)),
+        )
+
+    @staticmethod
+    def make_id(scores: SixDimensionScore, chart_format: str, preset: str) -> str:
+        """根据评分向量生成图表ID"""
+        values = ",".join(f"{value:.1f}" for value in scores.model_dump().values())
+        digest = hashlib.sha256(f"{chart_format}|{preset}|{values}".encode("utf-8")).hexdigest()
+        return f"{digest}.{chart_format}"
+
+    @staticmethod
+    def is_valid_id(chart_id: str) -> bool:
+        return bool(_CHART_ID_PATTERN.match(chart_id))
+
+    def _path(self, chart_id: str) -> str:
+        if not self.is_valid_id(chart_id):
+            raise ValueError(f"无效的图表ID: {chart_id}")
+        return os.path.join(self.directory, chart_id)
+
+    def contains(self, chart_id: str) -> bool:
+        return os.path.exists(self._path(chart_id))
+
+    def put(self, chart_id: str, data: bytes):
+        """写入图表，先写临时文件再原子替换，避免其他worker读到半个文件"""
+        path = self._path(chart_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += len(data)
+            due = (self._estimated_bytes is None or self._estimated_bytes > self.max_bytes
+                   or time.monotonic() - self._last_scan >= self.rescan_interval)
+        if due:
+            self._evict()
+
+    def get(self, chart_id: str) -> Optional[Tuple[bytes, str, str]]:
+        """读取图表，返回 (内容, 媒体类型, ETag)；不存在时返回None"""
+        path = self._path(chart_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            mtime = os.stat(path).st_mtime
+            # 只更新访问时间，供淘汰时参考
+            os.utime(path, (time.time(), mtime))
+        except FileNotFoundError:
+            return None
+
+        media_type = CHART_MEDIA_TYPES[chart_id.rsplit(".", 1)[1]]
+        return data, media_type, self._etag(chart_id, mtime, data)
+
+    def _etag(self, chart_id: str, mtime: float, data: bytes) -> str:
+        """基于内容哈希的ETag，按文件修改时间缓存计算结果"""
+        with self._lock:
+            cached = self._etags.get(chart_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+        with self._lock:
+            self._etags[chart_id] = (mtime, etag)
+        return etag
+
+    def _evict(self):
+        """扫描目录得到实际总大小，超出上限时按访问时间淘汰最旧的图表，直到低于上限的 EVICT_TARGET_RATIO"""
+        self._last_scan = time.monotonic()
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or not self.is_valid_id(entry.name):
+                continue
+            stat = entry.stat()
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.name))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            total = self._remove_oldest(entries, total, int(self.max_bytes * EVICT_TARGET_RATIO))
+        with self._lock:
+            self._estimated_bytes = total
+
+    def _remove_oldest(self, entries, total: int, target: int) -> int:
+        """按访问时间从旧到新删除图表直到总大小不超过target，返回删除后的总大小"""
+        entries.sort()
+        for _, size, name in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self._etags.pop(name, None)
+        return total
@@ -1,18 +1,35 @@
+import asyncio
 import json
-from typing import Dict, List
-from ..models.evaluation_models import InterviewInput, SixDimensionScore
-from .spark_api import SparkAPI
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+from ..models.evaluation_models import SCORE_DIMENSIONS, InterviewInput, SixDimensionScore
+from .spark_api import AsyncSparkAPI
+from .spark_control import SparkCallController, SparkTimeoutError
+from .spark_pool import SparkConnectionPool
+from .response_cache import LLMResponseCache
+from .shared_state import SharedState
+from .json_stream import IncrementalJSONExtractor, JSONStringFieldStreamer
+from .prompt_budget import PromptBudget, estimate_tokens
+from .model_routing import LOCAL_ROUTE, ModelRoute, ModelRouter
+from . import metrics, model_routing, stage_timer
 
-class EvaluationEngine:
-    def __init__(self, spark_api: SparkAPI):
-        self.spark_api = spark_api
-    
-    def generate_six_dimension_scores(self, input_data: InterviewInput) -> SixDimensionScore:
-        """
-        基于输入数据生成六维评分
-        """
-        # 构建prompt
-        system_prompt = """
+if TYPE_CHECKING:
+    # 本地评分依赖NumPy，创建引擎时才导入
+    from .fast_scorer import FastScorer
+
+# 评估模式：standard 分两次调用，fused 一次调用同时返回评分与总结，fast 本地计算不调用星火API
+EVALUATION_MODES = ("standard", "fused", "fast")
+
+# 各类响应中必须出现的JSON字段，流式接收时据此判断答案是否已完整
+SUMMARY_FIELDS = ['summary', 'recommendations']
+CHUNK_FIELDS = ['summary']
+FUSED_FIELDS = SCORE_DIMENSIONS + SUMMARY_FIELDS
+
+DEFAULT_SUMMARY = "综合表现良好，有进步空间。"
+DEFAULT_RECOMMENDATIONS = ["提升专业技能", "加强沟通表达", "保持学习热情"]
+
+SCORES_SYSTEM_PROMPT = """
         你是一个专业的面试评估专家。请根据提供的面试数据，从以下六个维度对面试者进行评分（0-100分）：
         1. 技能匹配度 (skill_match) - 基于简历岗位匹配度
         2. 沟通表达力 (communication) - 基于问答对话的表达能力
@@ -31,16 +48,338 @@ class EvaluationEngine:
             "learning_potential": 分数
         }
         """
+
+SUMMARY_SYSTEM_PROMPT = """
+        你是一个专业的HR顾问。基于面试者的六维评分，请提供：
+        1. 一个简洁的总结评价（100字以内）
+        2. 3-5条具体的改进建议
+        
+        请以JSON格式返回：
+        {
+            "summary": "总结评价",
+            "recommendations": ["建议1", "建议2", "建议3"]
+        }
+        """
+
+FUSED_SYSTEM_PROMPT = """
+        你是一个专业的面试评估专家兼HR顾问。请根据提供的面试数据完成两项任务：
+        一、从以下六个维度对面试者进行评分（0-100分）：
+        1. 技能匹配度 (skill_match) - 基于简历岗位匹配度
+        2. 沟通表达力 (communication) - 基于问答对话的表达能力
+        3. 情绪稳定性 (emotional_stability) - 基于语音情感分析
+        4. 专业素养 (professionalism) - 基于肢体语言分析和整体表现
+        5. 逻辑思维 (logical_thinking) - 基于问答的逻辑性和条理性
+        6. 学习潜力 (learning_potential) - 综合评估学习和适应能力
+        二、基于上述评分给出一个简洁的总结评价（100字以内）和3-5条具体的改进建议
+
+        请只返回一个JSON对象，格式如下：
+        {
+            "skill_match": 分数,
+            "communication": 分数,
+            "emotional_stability": 分数,
+            "professionalism": 分数,
+            "logical_thinking": 分数,
+            "learning_potential": 分数,
+            "summary": "总结评价",
+            "recommendations": ["建议1", "建议2", "建议3"]
+        }
+        """
+
+CHUNK_SYSTEM_PROMPT = """
+        你是一个专业的面试评估专家。下面是一场较长面试记录中的一个片段，请提炼该片段中能体现面试者
+        技能匹配度、沟通表达力、情绪稳定性、专业素养、逻辑思维和学习潜力的具体表现，保留关键事实和典型表述。
+        
+        请以JSON格式返回：
+        {
+            "summary": "片段要点（200字以内）"
+        }
+        """
+
+class EvaluationEngine:
+    def __init__(self, spark_api: Optional[AsyncSparkAPI], cache: Optional[LLMResponseCache] = None,
+                 mode: str = "standard", scorer: Optional["FastScorer"] = None, score_prior: bool = False,
+                 budget: Optional[PromptBudget] = None, router: Optional[ModelRouter] = None):
+        if mode not in EVALUATION_MODES:
+            raise ValueError(f"不支持的评估模式: {mode}，可选值: {', '.join(EVALUATION_MODES)}")
+        if spark_api is None and mode != "fast":
+            raise ValueError(f"{mode}模式需要配置星火API")
         
+        self.spark_api = spark_api
+        self.cache = cache
+        self.mode = mode
+        if scorer is None:
+            from .fast_scorer import FastScorer
+            scorer = FastScorer()
+        self.scorer = scorer
+        # 开启后：只有结构化数值的输入直接本地评分；其余输入把本地评分作为参考写入提示词
+        self.score_prior = score_prior
+        self.budget = budget or PromptBudget()
+        self.router = router or ModelRouter({})
+    
+    @classmethod
+    def from_env(cls, cache: Optional[LLMResponseCache] = None, shared: Optional[SharedState] = None,
+                 mode: Optional[str] = None) -> "EvaluationEngine":
+        """
+        根据环境变量创建星火API客户端和评估引擎，mode 为空时取 EVALUATION_MODE
+        配置不完整时抛出ValueError；fast模式不调用星火API，可以不配置
+        """
+        from .fast_scorer import FastScorer
+
+        mode = mode or os.getenv("EVALUATION_MODE", "standard")
+        spark_api = None
+        try:
+            spark_api = AsyncSparkAPI(
+                app_id=os.getenv("SPARK_APP_ID"),
+                api_key=os.getenv("SPARK_API_KEY"),
+                api_secret=os.getenv("SPARK_API_SECRET"),
+                url=os.getenv("SPARK_API_URL"),
+                controller=SparkCallController.from_env(shared),
+                pool=SparkConnectionPool.from_env(),
+                auth_ttl=float(os.getenv("SPARK_AUTH_TTL", 60))
+            )
+        except ValueError:
+            if mode != "fast":
+                raise
+        return cls(
+            spark_api,
+            cache=cache,
+            mode=mode,
+            scorer=FastScorer.from_env(),
+            score_prior=os.getenv("EVALUATION_SCORE_PRIOR", "false").lower() in ("1", "true", "yes"),
+            budget=PromptBudget.from_env(),
+            router=ModelRouter.from_env()
+        )
+
+    def _score_locally(self, input_data: InterviewInput) -> bool:
+        """是否跳过LLM，直接使用本地评分"""
+        return self.mode == "fast" or (self.score_prior and self.scorer.is_structured(input_data))
+    
+    async def generate_evaluation(self, input_data: InterviewInput) -> tuple[SixDimensionScore, str, List[str]]:
+        """
+        生成六维评分、总结和改进建议
+        fused模式下一次调用完成，响应缺少字段时回退到两次调用；
+        连接异常、超时等调用失败时不再重复调用，与分阶段调用失败时一样返回默认结果
+        """
+        route = self.router.select("fused") if self.mode == "fused" and not self._score_locally(input_data) else None
+        if route is not None:
+            model_routing.record_route("fused", route.domain)
+            metrics.EVALUATION_PARSE.labels(stage="fused").inc()
+            try:
+                user_input = await self.prepare_scores_input(input_data, FUSED_SYSTEM_PROMPT, "fused")
+                with stage_timer.stage("llm_fused"):
+                    return await self._ask(user_input, FUSED_SYSTEM_PROMPT, self._parse_fused, FUSED_FIELDS,
+                                           "fused", route)
+            except ValueError:
+                # 融合响应不完整，回退到两次调用
+                metrics.EVALUATION_PARSE_FALLBACK.labels(stage="fused").inc()
+            except Exception:
+                metrics.EVALUATION_PARSE_FALLBACK.labels(stage="fused").inc()
+                model_routing.record_route("fused", LOCAL_ROUTE)
+                return self._fallback_scores(input_data), DEFAULT_SUMMARY, list(DEFAULT_RECOMMENDATIONS)
+        
+        scores = await self.generate_six_dimension_scores(input_data)
+        summary, recommendations = await self.generate_summary_and_recommendations(input_data, scores)
+        return scores, summary, recommendations
+    
+    async def generate_six_dimension_scores(self, input_data: InterviewInput) -> SixDimensionScore:
+        """
+        基于输入数据生成六维评分
+        """
+        # 本地评分：fast模式、结构化输入，或剩余延迟预算不足以调用任何模型
+        route = None if self._score_locally(input_data) else self.router.select("scores")
+        if route is None:
+            model_routing.record_route("scores", LOCAL_ROUTE)
+            with stage_timer.stage("fast_score"):
+                return self.scorer.score(input_data)
+        
+        # 调用星火API并解析响应
+        model_routing.record_route("scores", route.domain)
+        metrics.EVALUATION_PARSE.labels(stage="scores").inc()
+        try:
+            user_input = await self.prepare_scores_input(input_data, SCORES_SYSTEM_PROMPT, "scores")
+            with stage_timer.stage("llm_scores"):
+                return await self._ask(user_input, SCORES_SYSTEM_PROMPT, self._parse_scores, SCORE_DIMENSIONS,
+                                       "scores", route)
+        except Exception as e:
+            # 如果解析失败，返回默认分数（开启参考评分时使用本地评分）
+            metrics.EVALUATION_PARSE_FALLBACK.labels(stage="scores").inc()
+            model_routing.record_route("scores", LOCAL_ROUTE)
+            return self._fallback_scores(input_data)
+    
+    async def generate_summary_and_recommendations(self, input_data: InterviewInput, scores: SixDimensionScore) -> tuple[str, List[str]]:
+        """
+        生成评估总结和改进建议
+        """
+        route = None if self.mode == "fast" else self.router.select("summary")
+        if route is None:
+            model_routing.record_route("summary", LOCAL_ROUTE)
+            return self.scorer.summarize(scores)
+        
+        with stage_timer.stage("prompt_build"):
+            user_input = self.build_summary_input(scores)
+        self._observe_tokens("summary", SUMMARY_SYSTEM_PROMPT, user_input)
+        
+        model_routing.record_route("summary", route.domain)
+        metrics.EVALUATION_PARSE.labels(stage="summary").inc()
+        try:
+            with stage_timer.stage("llm_summary"):
+                return await self._ask(user_input, SUMMARY_SYSTEM_PROMPT, self._parse_summary, SUMMARY_FIELDS,
+                                       "summary", route)
+        except Exception:
+            # 默认响应
+            metrics.EVALUATION_PARSE_FALLBACK.labels(stage="summary").inc()
+            model_routing.record_route("summary", LOCAL_ROUTE)
+            return DEFAULT_SUMMARY, list(DEFAULT_RECOMMENDATIONS)
+    
+    async def stream_summary_and_recommendations(self, input_data: InterviewInput, scores: SixDimensionScore):
+        """
+        流式生成评估总结和改进建议
+        依次产出 ("delta", 总结正文片段)，最后产出 ("result", (summary, recommendations))
+        无论本地计算、命中缓存还是调用星火API，片段都只包含已解码的总结正文，不含JSON语法；
+        正常结束时片段拼接后等于最终的summary，生成中途失败时最终结果改用默认总结，以result为准
+        """
+        route = None if self.mode == "fast" else self.router.select("summary")
+        if route is None:
+            model_routing.record_route("summary", LOCAL_ROUTE)
+            summary, recommendations = self.scorer.summarize(scores)
+            yield "delta", summary
+            yield "result", (summary, recommendations)
+            return
+        
+        user_input = self.build_summary_input(scores)
+        self._observe_tokens("summary", SUMMARY_SYSTEM_PROMPT, user_input)
+        model_routing.record_route("summary", route.domain)
+        
+        key = None
+        if self.cache is not None:
+            key = LLMResponseCache.make_key(SUMMARY_SYSTEM_PROMPT, user_input, route.domain, route.temperature)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                summary, recommendations = self._parse_summary(cached)
+                yield "delta", summary
+                yield "result", (summary, recommendations)
+                return
+        
+        metrics.EVALUATION_PARSE.labels(stage="summary").inc()
+        extractor = IncrementalJSONExtractor(SUMMARY_FIELDS)
+        streamer = JSONStringFieldStreamer("summary")
+        chunks = []
+        stream = self.spark_api.stream_message(user_input, SUMMARY_SYSTEM_PROMPT, route, model_routing.remaining())
+        try:
+            try:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    text = streamer.feed(chunk)
+                    if text:
+                        yield "delta", text
+                    if extractor.feed(chunk) is not None:
+                        break
+            finally:
+                await stream.aclose()
+            
+            response = extractor.result_text or "".join(chunks)
+            result = self._parse_summary(response)
+            if key is not None:
+                await self.cache.aset(key, response)
+        except Exception:
+            # 默认响应
+            metrics.EVALUATION_PARSE_FALLBACK.labels(stage="summary").inc()
+            model_routing.record_route("summary", LOCAL_ROUTE)
+            result = DEFAULT_SUMMARY, list(DEFAULT_RECOMMENDATIONS)
+        
+        yield "result", result
+    
+    async def prepare_scores_input(self, input_data: InterviewInput, system_prompt: str, stage: str) -> str:
+        """
+        构建评分提示词，超出token预算时先分段提炼面试记录要点，再用要点构建提示词
+        """
+        with stage_timer.stage("prompt_build"):
+            user_input = self.build_scores_input(input_data)
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_input)
+        
+        if self.budget.exceeds(tokens):
+            metrics.EVALUATION_MAP_REDUCE.inc()
+            with stage_timer.stage("llm_map"):
+                digest = await self._condense(self._transcript_segments(input_data))
+            with stage_timer.stage("prompt_build"):
+                user_input = self.build_scores_input(input_data, digest)
+            tokens = estimate_tokens(system_prompt) + estimate_tokens(user_input)
+        
+        metrics.EVALUATION_PROMPT_TOKENS.labels(stage=stage).observe(tokens)
+        return user_input
+    
+    def _observe_tokens(self, stage: str, system_prompt: str, user_input: str) -> int:
+        """记录提示词的估算token数"""
+        tokens = estimate_tokens(system_prompt) + estimate_tokens(user_input)
+        metrics.EVALUATION_PROMPT_TOKENS.labels(stage=stage).observe(tokens)
+        return tokens
+    
+    def _transcript_segments(self, input_data: InterviewInput) -> List[str]:
+        """面试记录中可分段的部分：每个问答对和文字描述的各行"""
+        segments = []
+        for i, qa in enumerate(input_data.interview_qa_pairs or [], 1):
+            segments.append(f"Q{i}: {qa.get('question', '')}\nA{i}: {qa.get('answer', '')}")
+        if input_data.text_description:
+            try:
+                text = json.dumps(json.loads(input_data.text_description), ensure_ascii=False, indent=2)
+            except (json.JSONDecodeError, TypeError):
+                text = input_data.text_description
+            segments.extend(line for line in text.splitlines() if line.strip())
+        return segments
+    
+    async def _condense(self, segments: List[str]) -> str:
+        """
+        分段并发提炼要点（map），返回拼接后的要点；要点仍超出分段预算时继续提炼
+        单个分段提炼失败时保留该段开头部分，不影响其余分段
+        """
+        semaphore = asyncio.Semaphore(self.budget.map_concurrency)
+        
+        async def summarize(chunk: str) -> str:
+            async with semaphore:
+                route = self.router.select("map")
+                if route is None:
+                    model_routing.record_route("map", LOCAL_ROUTE)
+                    return chunk[:200]
+                model_routing.record_route("map", route.domain)
+                self._observe_tokens("map", CHUNK_SYSTEM_PROMPT, chunk)
+                metrics.EVALUATION_PARSE.labels(stage="map").inc()
+                try:
+                    return await self._ask(chunk, CHUNK_SYSTEM_PROMPT, self._parse_chunk_summary, CHUNK_FIELDS,
+                                           "map", route)
+                except Exception:
+                    metrics.EVALUATION_PARSE_FALLBACK.labels(stage="map").inc()
+                    return chunk[:200]
+        
+        digest = ""
+        for _ in range(self.budget.max_rounds):
+            chunks = self.budget.chunk(segments)
+            summaries = await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+            segments = [f"片段{i}：{summary}" for i, summary in enumerate(summaries, 1)]
+            digest = "\n".join(segments)
+            if len(chunks) == 1 or estimate_tokens(digest) <= self.budget.chunk_tokens:
+                break
+        return digest
+    
+    def build_scores_input(self, input_data: InterviewInput, transcript_digest: Optional[str] = None) -> str:
+        """
+        构建六维评分的用户输入
+        提供 transcript_digest 时用分段提炼的要点代替原始问答和文字描述
+        """
         # 构建用户输入 - 灵活处理各种输入格式
         user_input_parts = ["面试数据分析：\n"]
         
+        # 应聘岗位
+        if input_data.position:
+            user_input_parts.append(f"应聘岗位：{input_data.position}")
+        
         # 1. 简历匹配度
         if input_data.resume_match_score:
             user_input_parts.append(f"1. 简历岗位匹配度：{input_data.resume_match_score}分")
         
-        # 2. 问答对话
-        if input_data.interview_qa_pairs:
+        # 2. 问答对话（长面试记录使用分段要点）
+        if transcript_digest is not None:
+            user_input_parts.append(f"2. 面试记录要点（按时间顺序分段提炼）：\n{transcript_digest}")
+        elif input_data.interview_qa_pairs:
             user_input_parts.append(f"2. 面试问答对话：\n{self._format_qa_pairs(input_data.interview_qa_pairs)}")
         
         # 3. 语音情感分析
@@ -52,7 +391,7 @@ class EvaluationEngine:
             user_input_parts.append(f"4. 肢体语言分析结果：\n{self._format_body_analysis(input_data.body_language_analysis)}")
         
         # 5. 文字描述或复杂JSON数据（新增）
-        if input_data.text_description:
+        if input_data.text_description and transcript_digest is None:
             # 尝试解析JSON，如果失败就当作普通文本处理
             try:
                 import json
@@ -65,63 +404,27 @@ class EvaluationEngine:
         # 6. 处理额外字段
         extra_fields = []
         for key, value in input_data.__dict__.items():
-            if key not in ['resume_match_score', 'interview_qa_pairs', 'voice_emotion_analysis', 'body_language_analysis', 'text_description']:
+            if key not in ['resume_match_score', 'interview_qa_pairs', 'voice_emotion_analysis', 'body_language_analysis', 'text_description', 'position']:
                 extra_fields.append(f"{key}: {value}")
         
         if extra_fields:
             user_input_parts.append("6. 其他相关信息：\n" + "\n".join(extra_fields))
         
+        # 7. 基于结构化数值的本地参考评分
+        if self.score_prior:
+            prior = self.scorer.score(input_data)
+            user_input_parts.append("7. 基于结构化数据计算的参考评分（可结合其他信息调整）：\n"
+                                    + json.dumps(prior.model_dump(), ensure_ascii=False))
+        
         user_input_parts.append("\n请根据以上数据进行六维评分分析。如果某些数据缺失，请根据现有信息合理推测。")
         
         user_input = "\n\n".join(user_input_parts)
-        
-        # 调用星火API
-        response = self.spark_api.send_message(user_input, system_prompt)
-        
-        # 解析响应
-        try:
-            # 提取JSON部分
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            json_str = response[json_start:json_end]
-            
-            scores_dict = json.loads(json_str)
-            
-            return SixDimensionScore(
-                skill_match=float(scores_dict.get('skill_match', 60)),
-                communication=float(scores_dict.get('communication', 60)),
-                emotional_stability=float(scores_dict.get('emotional_stability', 60)),
-                professionalism=float(scores_dict.get('professionalism', 60)),
-                logical_thinking=float(scores_dict.get('logical_thinking', 60)),
-                learning_potential=float(scores_dict.get('learning_potential', 60))
-            )
-        except Exception as e:
-            # 如果解析失败，返回默认分数
-            return SixDimensionScore(
-                skill_match=input_data.resume_match_score,
-                communication=60.0,
-                emotional_stability=60.0,
-                professionalism=60.0,
-                logical_thinking=60.0,
-                learning_potential=60.0
-            )
+        return user_input
     
-    def generate_summary_and_recommendations(self, input_data: InterviewInput, scores: SixDimensionScore) -> tuple[str, List[str]]:
+    def build_summary_input(self, scores: SixDimensionScore) -> str:
         """
-        生成评估总结和改进建议
+        构建总结建议的用户输入
         """
-        system_prompt = """
-        你是一个专业的HR顾问。基于面试者的六维评分，请提供：
-        1. 一个简洁的总结评价（100字以内）
-        2. 3-5条具体的改进建议
-        
-        请以JSON格式返回：
-        {
-            "summary": "总结评价",
-            "recommendations": ["建议1", "建议2", "建议3"]
-        }
-        """
-        
         user_input = f"""
         面试者六维评分：
         - 技能匹配度：{scores.skill_match}分
@@ -133,22 +436,127 @@ class EvaluationEngine:
         
         请提供总结评价和改进建议。
         """
-        
+        return user_input
+    
+    def _fallback_scores(self, input_data: InterviewInput) -> SixDimensionScore:
+        """调用或解析失败时的评分：开启参考评分时使用本地评分，否则为默认评分"""
+        if self.score_prior:
+            return self.scorer.score(input_data)
+        return self._default_scores(input_data)
+
+    def _default_scores(self, input_data: InterviewInput) -> SixDimensionScore:
+        """解析失败时的默认评分"""
+        return SixDimensionScore(
+            skill_match=input_data.resume_match_score,
+            communication=60.0,
+            emotional_stability=60.0,
+            professionalism=60.0,
+            logical_thinking=60.0,
+            learning_potential=60.0
+        )
+    
+    async def _ask(self, user_input: str, system_prompt: str, parse: Callable, required_keys: List[str],
+                   stage: str, route: ModelRoute):
+        """
+        按路由调用星火API并解析响应，命中缓存时直接复用
+        只有解析成功的响应才会写入缓存，避免把异常输出固化下来
+        """
+        key = None
+        if self.cache is not None:
+            key = LLMResponseCache.make_key(system_prompt, user_input, route.domain, route.temperature)
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return parse(cached)
+
+        # 失败的调用同样计入路由耗时；超时说明实际耗时更长，按两倍计入，预算不足时后续请求改走更快的路由
+        started = time.perf_counter()
         try:
-            response = self.spark_api.send_message(user_input, system_prompt)
-            
-            # 提取JSON部分
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            json_str = response[json_start:json_end]
-            
-            result = json.loads(json_str)
-            
-            return result.get('summary', '综合表现良好，有进步空间。'), result.get('recommendations', ['继续努力，保持学习'])
+            response = await self._receive_json(user_input, system_prompt, required_keys, route)
+        except SparkTimeoutError:
+            self.router.observe(stage, route, 2 * (time.perf_counter() - started))
+            raise
         except Exception:
-            # 默认响应
-            return "综合表现良好，有进步空间。", ["提升专业技能", "加强沟通表达", "保持学习热情"]
-    
+            self.router.observe(stage, route, time.perf_counter() - started)
+            raise
+        self.router.observe(stage, route, time.perf_counter() - started)
+        result = parse(response)
+
+        if key is not None:
+            await self.cache.aset(key, response)
+        return result
+
+    async def _receive_json(self, user_input: str, system_prompt: str, required_keys: List[str],
+                            route: ModelRoute) -> str:
+        """
+        流式接收响应，一旦收到包含全部必需字段的JSON对象就关闭连接并返回该对象文本
+        模型始终没有给出完整对象时返回全部响应，交由解析函数兜底
+        """
+        extractor = IncrementalJSONExtractor(required_keys)
+        chunks = []
+        stream = self.spark_api.stream_message(user_input, system_prompt, route, model_routing.remaining())
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if extractor.feed(chunk) is not None:
+                    return extractor.result_text
+        finally:
+            # 提前退出时立即关闭WebSocket，停止后续生成
+            await stream.aclose()
+        return "".join(chunks)
+
+    @staticmethod
+    def _extract_json(response: str) -> dict:
+        """提取响应中的JSON部分"""
+        json_start = response.find('{')
+        json_end = response.rfind('}') + 1
+        return json.loads(response[json_start:json_end])
+
+    def _parse_scores(self, response: str) -> SixDimensionScore:
+        """解析六维评分响应"""
+        scores_dict = self._extract_json(response)
+        return SixDimensionScore(
+            skill_match=float(scores_dict.get('skill_match', 60)),
+            communication=float(scores_dict.get('communication', 60)),
+            emotional_stability=float(scores_dict.get('emotional_stability', 60)),
+            professionalism=float(scores_dict.get('professionalism', 60)),
+            logical_thinking=float(scores_dict.get('logical_thinking', 60)),
+            learning_potential=float(scores_dict.get('learning_potential', 60))
+        )
+
+    def _parse_summary(self, response: str) -> tuple[str, List[str]]:
+        """解析总结和建议响应"""
+        result = self._extract_json(response)
+        return result.get('summary', DEFAULT_SUMMARY), result.get('recommendations', ['继续努力，保持学习'])
+
+    def _parse_chunk_summary(self, response: str) -> str:
+        """解析分段要点响应"""
+        summary = self._extract_json(response).get('summary')
+        if not isinstance(summary, str) or not summary.strip():
+            raise ValueError("分段要点响应缺少summary字段")
+        return summary.strip()
+
+    def _parse_fused(self, response: str) -> tuple[SixDimensionScore, str, List[str]]:
+        """解析融合响应，任一字段缺失都视为失败"""
+        result = self._extract_json(response)
+        if not isinstance(result, dict):
+            raise ValueError("融合响应不是JSON对象")
+        missing = [key for key in SCORE_DIMENSIONS if key not in result]
+        if missing:
+            raise ValueError(f"融合响应缺少评分字段: {', '.join(missing)}")
+        
+        summary = result.get('summary')
+        recommendations = result.get('recommendations')
+        if not isinstance(summary, str) or not summary.strip():
+            raise ValueError("融合响应缺少summary字段")
+        if not isinstance(recommendations, list) or not recommendations:
+            raise ValueError("融合响应缺少recommendations字段")
+        
+        try:
+            scores = SixDimensionScore(**{key: float(result[key]) for key in SCORE_DIMENSIONS})
+        except TypeError as e:
+            raise ValueError(f"融合响应评分字段格式错误: {e}")
+        return scores, summary, [str(item) for item in recommendations]
+
     def _format_qa_pairs(self, qa_pairs: List[Dict[str, str]]) -> str:
         """格式化问答对话"""
         formatted = []
@@ -0,0 +1,178 @@
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.evaluation_models import SCORE_DIMENSIONS, InterviewInput, SixDimensionScore
+
+DIMENSION_LABELS = {
+    'skill_match': '技能匹配度',
+    'communication': '沟通表达力',
+    'emotional_stability': '情绪稳定性',
+    'professionalism': '专业素养',
+    'logical_thinking': '逻辑思维',
+    'learning_potential': '学习潜力',
+}
+
+DIMENSION_RECOMMENDATIONS = {
+    'skill_match': '针对目标岗位补强核心技能，积累相关项目经验',
+    'communication': '多做表达练习，回答问题时先给结论再展开说明',
+    'emotional_stability': '面试前充分准备，可通过模拟面试缓解紧张情绪',
+    'professionalism': '注意面试礼仪和肢体语言，保持自信得体的仪态',
+    'logical_thinking': '回答问题时注意条理，可采用总分结构组织内容',
+    'learning_potential': '保持学习热情，主动了解行业新技术和新趋势',
+}
+
+# 默认权重：键为特征（resume_match_score 或 "分析字段.键名"），负权重表示该特征越高得分越低
+DEFAULT_WEIGHTS = {
+    'skill_match': {
+        'resume_match_score': 1.0,
+    },
+    'communication': {
+        'voice_emotion_analysis.positive': 0.3,
+        'body_language_analysis.confidence': 0.4,
+        'body_language_analysis.engagement': 0.3,
+    },
+    'emotional_stability': {
+        'voice_emotion_analysis.positive': 0.3,
+        'voice_emotion_analysis.negative': -0.3,
+        'body_language_analysis.nervousness': -0.2,
+    },
+    'professionalism': {
+        'resume_match_score': 0.2,
+        'body_language_analysis.confidence': 0.3,
+        'body_language_analysis.engagement': 0.3,
+        'body_language_analysis.nervousness': -0.2,
+    },
+    'logical_thinking': {
+        'resume_match_score': 0.4,
+        'body_language_analysis.confidence': 0.3,
+        'body_language_analysis.engagement': 0.3,
+    },
+    'learning_potential': {
+        'resume_match_score': 0.3,
+        'voice_emotion_analysis.positive': 0.3,
+        'body_language_analysis.engagement': 0.4,
+    },
+}
+
+# 可由本地评分器处理的结构化字段
+STRUCTURED_SOURCES = ('resume_match_score', 'voice_emotion_analysis', 'body_language_analysis')
+
+
+class FastScorer:
+    """
+    基于结构化数值的本地六维评分
+    每个维度是相关特征（统一换算到0-100）的加权平均，缺失的特征不参与计算；
+    多个面试者组成特征矩阵后一次矩阵运算完成评分，结果确定且不调用星火API
+    """
+
+    def __init__(self, weights: Optional[Dict[str, Dict[str, float]]] = None, default_score: float = 60.0):
+        weights = weights or DEFAULT_WEIGHTS
+        unknown = [dim for dim in weights if dim not in SCORE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"权重配置包含未知维度: {', '.join(unknown)}")
+
+        self.default_score = default_score
+        self.features: List[str] = sorted({feature for dim in weights.values() for feature in dim})
+        for feature in self.features:
+            if feature.partition('.')[0] not in STRUCTURED_SOURCES:
+                raise ValueError(f"权重配置包含不支持的特征: {feature}")
+
+        # 权重矩阵：行为维度，列为特征
+        self.weights = np.zeros((len(SCORE_DIMENSIONS), len(self.features)))
+        for i, dim in enumerate(SCORE_DIMENSIONS):
+            for feature, weight in weights.get(dim, {}).items():
+                self.weights[i, self.features.index(feature)] = float(weight)
+        self._positive = np.clip(self.weights, 0, None)
+        self._negative = np.clip(-self.weights, 0, None)
+        self._magnitude = np.abs(self.weights)
+
+    @classmethod
+    def from_env(cls) -> "FastScorer":
+        """根据环境变量创建评分器，FAST_SCORER_WEIGHTS 指向JSON格式的权重文件"""
+        path = os.getenv("FAST_SCORER_WEIGHTS")
+        if not path:
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def is_structured(input_data: InterviewInput) -> bool:
+        """输入是否只包含结构化数值（没有问答、文字描述或额外字段）"""
+        return (
+            not input_data.interview_qa_pairs
+            and not input_data.text_description
+            and not input_data.model_extra
+        )
+
+    def extract_features(self, inputs: Sequence[InterviewInput]) -> np.ndarray:
+        """构建特征矩阵（面试者 × 特征），数值统一换算到0-100，缺失为NaN"""
+        matrix = np.full((len(inputs), len(self.features)), np.nan)
+        for row, input_data in enumerate(inputs):
+            for col, feature in enumerate(self.features):
+                matrix[row, col] = self._feature_value(input_data, feature)
+        return matrix
+
+    def score_matrix(self, features: np.ndarray) -> np.ndarray:
+        """对特征矩阵评分，返回（面试者 × 六维）得分矩阵"""
+        present = ~np.isnan(features)
+        values = np.where(present, features, 0.0)
+        inverted = np.where(present, 100.0 - features, 0.0)
+
+        numerator = values @ self._positive.T + inverted @ self._negative.T
+        denominator = present.astype(float) @ self._magnitude.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(denominator > 0, numerator / denominator, self.default_score)
+        return np.round(np.clip(scores, 0.0, 100.0), 1)
+
+    def score_many(self, inputs: Sequence[InterviewInput]) -> List[SixDimensionScore]:
+        """批量评分"""
+        if not inputs:
+            return []
+        scores = self.score_matrix(self.extract_features(inputs))
+        return [SixDimensionScore(**dict(zip(SCORE_DIMENSIONS, row.tolist()))) for row in scores]
+
+    def score(self, input_data: InterviewInput) -> SixDimensionScore:
+        """单个面试者评分"""
+        return self.score_many([input_data])[0]
+
+    def summarize(self, scores: SixDimensionScore) -> Tuple[str, List[str]]:
+        """根据评分生成模板化的总结和改进建议"""
+        values = {dim: getattr(scores, dim) for dim in SCORE_DIMENSIONS}
+        ranked = sorted(SCORE_DIMENSIONS, key=lambda dim: values[dim])
+        average = sum(values.values()) / len(values)
+
+        if average >= 85:
+            level = "整体表现优秀"
+        elif average >= 70:
+            level = "整体表现良好"
+        elif average >= 60:
+            level = "整体表现中等"
+        else:
+            level = "整体表现有待提高"
+
+        summary = (f"综合得分{average:.1f}分，{level}。"
+                   f"{DIMENSION_LABELS[ranked[-1]]}表现突出，{DIMENSION_LABELS[ranked[0]]}有待提升。")
+        recommendations = [DIMENSION_RECOMMENDATIONS[dim] for dim in ranked[:3]]
+        return summary, recommendations
+
+    @staticmethod
+    def _feature_value(input_data: InterviewInput, feature: str) -> float:
+        """读取单个特征；分析结果中不超过1的数值视为比例，换算为百分制"""
+        source, _, key = feature.partition('.')
+        value = getattr(input_data, source, None)
+        if key:
+            if not isinstance(value, dict):
+                return np.nan
+            value = value.get(key)
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return np.nan
+            return value * 100 if 0 <= value <= 1 else value
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
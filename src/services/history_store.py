@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from ..models.evaluation_models import SCORE_DIMENSIONS, InterviewInput, SixDimensionScore
+
+# 不区分岗位的全体群体
+ALL_POSITIONS = "*"
+
+DAY_SECONDS = 86400
+# 每个维度按1分一档统计，共0-100分101档
+SCORE_BINS = 101
+
+DEFAULT_QUANTILES = (25, 50, 75, 90)
+
+
+class EvaluationHistory:
+    """
+    评估历史存储
+    每次评估按列（每个维度一列）写入SQLite，按岗位和时间建索引；
+    进程内为每个（岗位, 日期）维护各维度的分数直方图，新评估到达时增量累加，
+    群体分位数由窗口内直方图求和后向量化计算，不需要扫描历史记录
+    """
+
+    def __init__(self, db_path: str = "cache/history.sqlite3", min_cohort: int = 10,
+                 sync_batch: int = 50000):
+        self.db_path = db_path
+        self.min_cohort = min_cohort
+        self.sync_batch = sync_batch
+
+        self._lock = threading.Lock()
+        # 岗位 -> 日期序号 -> 直方图（维度 × 分数档）
+        self._histograms: Dict[str, Dict[int, np.ndarray]] = {}
+        # 已计入直方图的最大记录ID，其他进程写入的新记录按ID增量同步
+        self._last_id = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS evaluations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, position TEXT, "
+            "input_hash TEXT NOT NULL, "
+            + ", ".join(f"{dim} REAL NOT NULL" for dim in SCORE_DIMENSIONS)
+            + ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_evaluations_position_created ON evaluations(position, created_at)"
+        )
+        self._ensure_unique_input()
+
+        with self._lock:
+            self._sync()
+
+    def _ensure_unique_input(self):
+        """
+        同一输入只计入一次：输入哈希包含岗位，按哈希唯一即按（岗位, 面试输入）唯一
+        旧版本按次写入的重复记录只保留最早的一条
+        """
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_evaluations_input_hash_unique'"
+        ).fetchone()
+        if exists:
+            return
+        self._conn.execute("DROP INDEX IF EXISTS idx_evaluations_input_hash")
+        self._conn.execute(
+            "DELETE FROM evaluations WHERE id NOT IN (SELECT MIN(id) FROM evaluations GROUP BY input_hash)"
+        )
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_evaluations_input_hash_unique ON evaluations(input_hash)"
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["EvaluationHistory"]:
+        """根据环境变量创建历史存储，未启用时返回None"""
+        if os.getenv("HISTORY_ENABLED", "true").lower() in ("0", "false", "no"):
+            return None
+        return cls(
+            db_path=os.getenv("HISTORY_PATH", "cache/history.sqlite3"),
+            min_cohort=int(os.getenv("HISTORY_MIN_COHORT", 10)),
+        )
+
+    @staticmethod
+    def make_input_hash(input_data: InterviewInput) -> str:
+        """根据输入内容生成哈希，用于识别重复评估"""
+        raw = json.dumps(input_data.model_dump(), ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def record(self, scores: SixDimensionScore, position: Optional[str], input_hash: str,
+               created_at: Optional[float] = None) -> int:
+        """
+        保存一次评估结果，返回记录ID
+        相同输入（重复提交、缓存命中）只保存首次评估的结果，之后返回已有记录的ID，不重复计入群体统计
+        """
+        created_at = time.time() if created_at is None else created_at
+        values = [getattr(scores, dim) for dim in SCORE_DIMENSIONS]
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO evaluations (created_at, position, input_hash, "
+                + ", ".join(SCORE_DIMENSIONS) + ") VALUES (?, ?, ?, "
+                + ", ".join("?" * len(SCORE_DIMENSIONS)) + ")",
+                [created_at, position, input_hash] + values,
+            )
+            if cursor.rowcount == 0:
+                return self._conn.execute(
+                    "SELECT id FROM evaluations WHERE input_hash = ?", (input_hash,)
+                ).fetchone()[0]
+            self._sync()
+            return cursor.lastrowid
+
+    def _sync(self):
+        """把尚未计入直方图的记录（含其他进程写入的）增量累加到直方图"""
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, created_at, position, " + ", ".join(SCORE_DIMENSIONS)
+                + " FROM evaluations WHERE id > ? ORDER BY id LIMIT ?",
+                (self._last_id, self.sync_batch),
+            ).fetchall()
+            if not rows:
+                return
+            ids, created, positions, *columns = zip(*rows)
+            self._accumulate(np.array(created, dtype=float), positions, np.array(columns, dtype=float).T)
+            self._last_id = ids[-1]
+
+    def _accumulate(self, created: np.ndarray, positions: Sequence[Optional[str]], scores: np.ndarray):
+        """按（岗位, 日期）分组后一次性累加各维度直方图"""
+        days = (created // DAY_SECONDS).astype(np.int64)
+        bins = np.clip(np.rint(scores), 0, SCORE_BINS - 1).astype(np.intp)
+
+        names = sorted({position or ALL_POSITIONS for position in positions})
+        lookup = {name: i for i, name in enumerate(names)}
+        position_index = np.array([lookup[position or ALL_POSITIONS] for position in positions])
+        groups, inverse = np.unique(np.stack([position_index, days], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        counts = np.zeros((len(groups), len(SCORE_DIMENSIONS), SCORE_BINS), dtype=np.int64)
+        np.add.at(counts, (inverse[:, None], np.arange(len(SCORE_DIMENSIONS))[None, :], bins), 1)
+
+        for (name_index, day), histogram in zip(groups.tolist(), counts):
+            targets = {names[name_index], ALL_POSITIONS}
+            for name in targets:
+                by_day = self._histograms.setdefault(name, {})
+                if day in by_day:
+                    by_day[day] += histogram
+                else:
+                    by_day[day] = histogram.copy()
+
+    def cohort_histogram(self, position: Optional[str], window_days: int,
+                         now: Optional[float] = None) -> np.ndarray:
+        """群体在时间窗口内的各维度直方图（维度 × 分数档）"""
+        now = time.time() if now is None else now
+        first_day = int(now // DAY_SECONDS) - window_days + 1
+        with self._lock:
+            self._sync()
+            by_day = self._histograms.get(position or ALL_POSITIONS, {})
+            selected = [histogram for day, histogram in by_day.items() if day >= first_day]
+        if not selected:
+            return np.zeros((len(SCORE_DIMENSIONS), SCORE_BINS), dtype=np.int64)
+        return np.sum(selected, axis=0)
+
+    @staticmethod
+    def percentiles(histogram: np.ndarray, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> np.ndarray:
+        """由直方图计算各维度分位数，返回（分位数 × 维度）矩阵"""
+        cumulative = np.cumsum(histogram, axis=1)
+        total = cumulative[:, -1:]
+        targets = np.asarray(quantiles, dtype=float)[None, :, None] / 100 * total[:, :, None]
+        # 每个维度、每个分位数取累计数首次达到目标值的分数档
+        indices = (cumulative[:, None, :] < targets).sum(axis=2)
+        return np.clip(indices, 0, SCORE_BINS - 1).T.astype(float)
+
+    @staticmethod
+    def percentile_ranks(histogram: np.ndarray, scores: SixDimensionScore) -> np.ndarray:
+        """候选人各维度分数在群体中的百分位排名（0-100）"""
+        values = np.array([getattr(scores, dim) for dim in SCORE_DIMENSIONS])
+        bins = np.clip(np.rint(values), 0, SCORE_BINS - 1).astype(np.intp)
+        rows = np.arange(len(SCORE_DIMENSIONS))
+        cumulative = np.cumsum(histogram, axis=1)
+        total = np.maximum(cumulative[:, -1], 1)
+        below = cumulative[rows, bins] - histogram[rows, bins]
+        return np.round((below + 0.5 * histogram[rows, bins]) / total * 100, 1)
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """排队任务已达上限"""
+
+
+class EvaluationJobQueue:
+    """
+    异步评估任务队列
+    任务保存在本地SQLite中，SQLite本身就是队列：固定数量的worker按创建顺序认领任务，
+    认领时写入租约；正常关闭时执行中的任务放回队列，进程异常退出时租约过期后重新执行，不会丢失；
+    执行中进程反复异常退出的任务在认领 max_attempts 次后标记为失败，不再重试
+    SQLite读写（含争用写锁时的等待）都在线程池中执行，不阻塞事件循环；submit/get/stats 为同步方法，
+    异步调用方应放到线程池中调用
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 db_path: str = "cache/jobs.sqlite3", workers: int = 4, max_queued: int = 100,
+                 lease_seconds: float = 600, retention_seconds: float = 7 * 86400,
+                 poll_interval: float = 1.0, max_attempts: int = 3):
+        self.handler = handler
+        self.db_path = db_path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        # 进行中的webhook回调，保留引用避免被回收，关闭时等待完成
+        self._notifications: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, options TEXT NOT NULL, "
+            "result TEXT, error TEXT, webhook_url TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "lease_until REAL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)")
+
+    @classmethod
+    def from_env(cls, handler) -> "EvaluationJobQueue":
+        """根据环境变量创建任务队列"""
+        return cls(
+            handler,
+            db_path=os.getenv("JOB_QUEUE_PATH", "cache/jobs.sqlite3"),
+            workers=int(os.getenv("JOB_WORKERS", 4)),
+            max_queued=int(os.getenv("JOB_QUEUE_MAX", 100)),
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", 600)),
+            retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", 7 * 86400)),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", 3)),
+        )
+
+    def submit(self, payload: Dict[str, Any], options: Dict[str, Any] = None,
+               webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        """提交任务，排队任务已满时抛出QueueFullError"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued >= self.max_queued:
+                    raise QueueFullError(f"评估任务队列已满（{queued}/{self.max_queued}），请稍后重试")
+                self._conn.execute(
+                    "INSERT INTO jobs (id, status, payload, options, webhook_url, created_at, updated_at) "
+                    "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                    (job_id, json.dumps(payload, ensure_ascii=False), json.dumps(options or {}),
+                     webhook_url, now, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        # 可能在线程池中调用，通过事件循环唤醒等待中的worker
+        if self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """查询任务状态和结果"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _claim(self) -> Tuple[Optional[sqlite3.Row], List[sqlite3.Row]]:
+        """
+        认领一个排队中或租约已过期的任务，返回 (认领的任务, 本次因超过执行次数而标记失败的任务)
+        """
+        now = time.time()
+        exhausted = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE status = 'queued' "
+                        "OR (status = 'running' AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                        (now,),
+                    ).fetchone()
+                    if row is None or row["attempts"] < self.max_attempts:
+                        break
+                    # 已执行 max_attempts 次仍未完成，多半是任务本身导致进程退出
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                        (f"评估任务执行{row['attempts']}次均未完成，已放弃", now, row["id"]),
+                    )
+                    exhausted.append(row)
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                        "lease_until = ?, updated_at = ? WHERE id = ?",
+                        (now + self.lease_seconds, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row, exhausted
+
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]):
+        status = "succeeded" if error is None else "failed"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id),
+            )
+
+    def _requeue(self, job_id: str):
+        """正常关闭时放回队列，本次执行不计入执行次数"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_until = NULL, "
+                "updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def _cleanup(self):
+        """清理过期的已完成任务"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+                (time.time() - self.retention_seconds,),
+            )
+
+    async def _worker(self):
+        while True:
+            row, exhausted = await asyncio.to_thread(self._claim)
+            for failed in exhausted:
+                if failed["webhook_url"]:
+                    self._schedule_notify(failed["webhook_url"], await asyncio.to_thread(self.get, failed["id"]))
+            if row is None:
+                # 没有任务时等待新任务提交，或定期轮询其他进程提交的任务
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                result = await self.handler(json.loads(row["payload"]), json.loads(row["options"]))
+                await asyncio.to_thread(self._finish, row["id"], result, None)
+            except asyncio.CancelledError:
+                # 服务关闭：任务放回队列，重启后继续执行
+                await asyncio.to_thread(self._requeue, row["id"])
+                raise
+            except Exception as e:
+                await asyncio.to_thread(self._finish, row["id"], None, f"评估过程中发生错误: {str(e)}")
+
+            if row["webhook_url"]:
+                self._schedule_notify(row["webhook_url"], await asyncio.to_thread(self.get, row["id"]))
+
+    def _schedule_notify(self, url: str, job: Dict[str, Any]):
+        """在后台回调webhook，不阻塞worker认领下一个任务"""
+        task = asyncio.ensure_future(self._notify(url, job))
+        self._notifications.add(task)
+        task.add_done_callback(self._notifications.discard)
+
+    async def _notify(self, url: str, job: Dict[str, Any]):
+        """任务完成后回调webhook，失败时只记录日志"""
+        def post():
+            request = urllib.request.Request(
+                url,
+                data=json.dumps(job, ensure_ascii=False).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=10):
+                pass
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, post)
+        except Exception as e:
+            logger.warning("评估任务 %s 的webhook回调失败: %s", job["job_id"], e)
+
+    async def start(self):
+        """启动worker"""
+        if self._tasks:
+            return
+        await asyncio.to_thread(self._cleanup)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """停止worker，正在执行的任务放回队列；等待已发出的webhook回调完成（单次回调最长10秒）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.gather(*self._notifications, return_exceptions=True)
@@ -0,0 +1,147 @@
+import json
+import re
+from typing import Iterable, Optional
+
+
+class IncrementalJSONExtractor:
+    """
+    增量JSON提取器
+    逐段喂入模型输出，一旦出现包含全部必需字段的完整JSON对象就立即返回，
+    调用方据此提前结束生成，不必等待后续的解释性文字
+    """
+
+    def __init__(self, required_keys: Iterable[str]):
+        self.required_keys = list(required_keys)
+        self.buffer = ""
+        self.result: Optional[dict] = None
+        self.result_text: Optional[str] = None
+
+        # 扫描状态：已扫描位置、未闭合的 '{' 起始位置栈、字符串内状态
+        self._pos = 0
+        self._starts = []
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        """追加一段文本，找到符合要求的JSON对象时返回该对象"""
+        if self.result is not None:
+            return self.result
+
+        self.buffer += chunk
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '{':
+                self._starts.append(i)
+            elif not self._starts:
+                # 对象之外的正文，引号不影响扫描
+                continue
+            elif char == '"':
+                self._in_string = True
+            elif char == '}':
+                start = self._starts.pop()
+                candidate = buffer[start:i + 1]
+                obj = self._try_parse(candidate)
+                if obj is not None:
+                    self.result = obj
+                    self.result_text = candidate
+                    self._pos = i + 1
+                    return obj
+
+        self._pos = len(buffer)
+        return None
+
+    def _try_parse(self, candidate: str) -> Optional[dict]:
+        """尝试解析候选文本并校验必需字段"""
+        # 先做廉价的子串检查，避免对正文中的花括号反复解析
+        if any(f'"{key}"' not in candidate for key in self.required_keys):
+            return None
+        try:
+            obj = json.loads(candidate)
+        except (json.JSONDecodeError, ValueError):
+            return None
+        if not isinstance(obj, dict) or any(key not in obj for key in self.required_keys):
+            return None
+        return obj
+
+
+class JSONStringFieldStreamer:
+    """
+    从流式模型输出中增量解码指定字段的字符串值
+    逐段喂入文本，返回该字段值中新解码出的部分（已处理转义，不含JSON语法），
+    调用方可以只把字段正文推送给客户端；字段值结束后不再返回内容
+    """
+
+    # 转义序列尚未接收完整时暂缓解码：末尾的反斜杠、不足4位的 \u，以及等待低位代理的高位代理
+    _INCOMPLETE_ESCAPE = re.compile(r'(?:\\u[dD][89abAB][0-9a-fA-F]{2}(?:\\(?:u[0-9a-fA-F]{0,3})?)?'
+                                    r'|\\(?:u[0-9a-fA-F]{0,3})?)$')
+
+    def __init__(self, key: str):
+        self._start = re.compile(r'"' + re.escape(key) + r'"\s*:\s*"')
+        self.buffer = ""
+        self.done = False
+        # 字段值在buffer中的起始位置（找到字段前为None）与已解码到的位置
+        self._value_start: Optional[int] = None
+        self._pos = 0
+
+    def feed(self, chunk: str) -> str:
+        """追加一段文本，返回字段值中新解码出的文本"""
+        if self.done:
+            return ""
+        self.buffer += chunk
+
+        if self._value_start is None:
+            match = self._start.search(self.buffer)
+            if match is None:
+                return ""
+            self._value_start = self._pos = match.end()
+
+        raw = self.buffer[self._pos:]
+        end = self._closing_quote(raw)
+        if end is not None:
+            self.done = True
+            raw = raw[:end]
+        else:
+            incomplete = self._INCOMPLETE_ESCAPE.search(raw)
+            # 匹配到的反斜杠本身被转义（如 \\）时不是未完成的转义
+            if incomplete is not None and self._unescaped(raw, incomplete.start()):
+                raw = raw[:incomplete.start()]
+        self._pos += len(raw)
+        if not raw:
+            return ""
+        try:
+            return json.loads('"' + raw + '"')
+        except ValueError:
+            # 模型输出了不合法的转义，原样返回
+            return raw
+
+    @staticmethod
+    def _unescaped(text: str, index: int) -> bool:
+        """text[index] 处的反斜杠前是否有偶数个反斜杠（即该反斜杠本身未被转义）"""
+        count = 0
+        while index - count - 1 >= 0 and text[index - count - 1] == "\\":
+            count += 1
+        return count % 2 == 0
+
+    @staticmethod
+    def _closing_quote(raw: str) -> Optional[int]:
+        """字符串值结束引号的位置，尚未结束时返回None"""
+        escape = False
+        for i, char in enumerate(raw):
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                return i
+        return None
@@ -0,0 +1,123 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# 星火API调用各阶段
+SPARK_HANDSHAKE_SECONDS = Histogram(
+    "spark_handshake_seconds",
+    "星火API鉴权签名与WebSocket握手耗时（含连接池在后台预建的连接）",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+SPARK_TIME_TO_FIRST_TOKEN_SECONDS = Histogram(
+    "spark_time_to_first_token_seconds",
+    "发送请求到收到首个内容帧的耗时",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+SPARK_GENERATION_SECONDS = Histogram(
+    "spark_generation_seconds",
+    "单次星火API调用总耗时（含握手）",
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+SPARK_FRAMES_RECEIVED = Counter(
+    "spark_frames_received_total",
+    "收到的星火API内容帧数（每帧约为一个token片段）",
+)
+SPARK_CHARS_RECEIVED = Counter(
+    "spark_chars_received_total",
+    "收到的星火API内容字符数",
+)
+SPARK_REQUESTS = Counter(
+    "spark_requests_total",
+    "星火API调用次数",
+    ["outcome"],
+)
+SPARK_CONCURRENCY_LIMIT = Gauge(
+    "spark_concurrency_limit",
+    "星火API自适应并发上限",
+    multiprocess_mode="livesum",
+)
+SPARK_INFLIGHT = Gauge(
+    "spark_inflight_requests",
+    "正在进行的星火API调用数（含对冲请求）",
+    multiprocess_mode="livesum",
+)
+SPARK_RETRIES = Counter(
+    "spark_retries_total",
+    "星火API调用重试次数",
+    ["reason"],
+)
+SPARK_POOL_CONNECTIONS = Counter(
+    "spark_pool_connections_total",
+    "星火API连接获取结果：hit 为使用预建连接，miss 为现场握手，stale 为丢弃的过期预建连接",
+    ["result"],
+)
+SPARK_POOL_IDLE = Gauge(
+    "spark_pool_idle_connections",
+    "连接池中已完成握手的空闲连接数",
+    multiprocess_mode="livesum",
+)
+SPARK_HEDGES = Counter(
+    "spark_hedged_requests_total",
+    "对冲请求次数：launched 为发起次数，won 为对冲请求先返回的次数",
+    ["result"],
+)
+
+# 评估引擎
+EVALUATION_PARSE = Counter(
+    "evaluation_parse_total",
+    "LLM响应解析次数",
+    ["stage"],
+)
+EVALUATION_PARSE_FALLBACK = Counter(
+    "evaluation_parse_fallback_total",
+    "LLM响应无法解析而返回默认结果（如默认60分）的次数",
+    ["stage"],
+)
+EVALUATION_STAGE_SECONDS = Histogram(
+    "evaluation_stage_seconds",
+    "评估请求各阶段耗时",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+EVALUATION_PROMPT_TOKENS = Histogram(
+    "evaluation_prompt_tokens",
+    "单次LLM调用的提示词估算token数（含系统提示词）",
+    ["stage"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+EVALUATION_MAP_REDUCE = Counter(
+    "evaluation_map_reduce_total",
+    "评分提示词超出token预算而分段提炼面试记录的次数",
+)
+EVALUATION_RESPONSE_BYTES = Histogram(
+    "evaluation_response_bytes",
+    "评估接口响应体大小（字节，压缩后）",
+    ["profile", "encoding"],
+    buckets=(256, 1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576),
+)
+
+# 图表渲染
+CHART_RENDER_SECONDS = Histogram(
+    "chart_render_seconds",
+    "雷达图渲染耗时",
+    ["format"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+
+# 相同请求合并
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total",
+    "请求合并调用次数：leader 为实际执行次数，coalesced 为被合并而省下的次数",
+    ["name", "role"],
+)
+
+# 启动与预热
+STARTUP_PHASE_SECONDS = Gauge(
+    "startup_phase_seconds",
+    "进程启动各阶段耗时（模块导入、字体解析、图表模板、鉴权材料等）",
+    ["phase"],
+    multiprocess_mode="max",
+)
+SPARK_REACHABLE = Gauge(
+    "spark_reachable",
+    "最近一次星火API连通性探测是否成功（1/0）",
+    multiprocess_mode="min",
+)
@@ -0,0 +1,130 @@
+import contextvars
+import os
+import time
+from typing import Dict, NamedTuple, Optional
+
+# 评估引擎中调用星火API的阶段
+ROUTE_STAGES = ("scores", "summary", "fused", "map")
+
+# 不调用星火API、使用本地评分或默认结果时的路由名
+LOCAL_ROUTE = "local"
+
+
+class ModelRoute(NamedTuple):
+    """一个阶段使用的星火模型配置"""
+    domain: str
+    url: Optional[str] = None  # 为空时使用客户端默认地址
+    max_tokens: int = 4096
+    temperature: float = 0.7
+
+
+class _RequestBudget:
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline
+        self.routes: Dict[str, str] = {}
+
+
+# 当前请求的延迟预算和各阶段实际路由，未开启记录时为None
+_current_request: contextvars.ContextVar[Optional[_RequestBudget]] = contextvars.ContextVar(
+    "model_routing_request", default=None
+)
+
+
+def start_request(budget_seconds: Optional[float] = None) -> Dict[str, str]:
+    """为当前请求开启路由记录和延迟预算，返回 阶段 -> 路由名 的记录字典"""
+    deadline = time.monotonic() + budget_seconds if budget_seconds else None
+    request = _RequestBudget(deadline)
+    _current_request.set(request)
+    return request.routes
+
+
+def remaining() -> Optional[float]:
+    """当前请求剩余的延迟预算（秒），未设置预算时返回None"""
+    request = _current_request.get()
+    if request is None or request.deadline is None:
+        return None
+    return request.deadline - time.monotonic()
+
+
+def record_route(stage: str, name: str):
+    """记录阶段实际使用的路由"""
+    request = _current_request.get()
+    if request is not None:
+        request.routes[stage] = name
+
+
+class ModelRouter:
+    """
+    按阶段选择星火模型
+    每个阶段有主路由和可选的快速路由；根据各路由的历史耗时（指数滑动平均）判断剩余延迟预算是否足够，
+    依次回退到快速路由和本地结果
+    """
+
+    def __init__(self, routes: Dict[str, ModelRoute], fast_route: Optional[ModelRoute] = None,
+                 budget_seconds: Optional[float] = None, smoothing: float = 0.2):
+        self.routes = routes
+        self.fast_route = fast_route
+        self.budget_seconds = budget_seconds
+        self.smoothing = smoothing
+        # (阶段, domain) -> 耗时滑动平均
+        self._latency: Dict[tuple, float] = {}
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """
+        根据环境变量创建路由：SPARK_DOMAIN / SPARK_MAX_TOKENS / SPARK_TEMPERATURE 为全局默认值，
+        SPARK_<阶段>_DOMAIN / _URL / _MAX_TOKENS / _TEMPERATURE 按阶段覆盖，
+        SPARK_FAST_DOMAIN 配置后作为预算不足时的快速路由
+        """
+        default = ModelRoute(
+            domain=os.getenv("SPARK_DOMAIN", "x1"),
+            url=os.getenv("SPARK_API_URL") or None,
+            max_tokens=int(os.getenv("SPARK_MAX_TOKENS", 4096)),
+            temperature=float(os.getenv("SPARK_TEMPERATURE", 0.7)),
+        )
+        routes = {stage: cls._route_from_env(f"SPARK_{stage.upper()}", default) for stage in ROUTE_STAGES}
+        fast_route = cls._route_from_env("SPARK_FAST", default) if os.getenv("SPARK_FAST_DOMAIN") else None
+        budget = float(os.getenv("EVALUATION_LATENCY_BUDGET", 0))
+        return cls(routes, fast_route, budget_seconds=budget or None)
+
+    @staticmethod
+    def _route_from_env(prefix: str, default: ModelRoute) -> ModelRoute:
+        return ModelRoute(
+            domain=os.getenv(f"{prefix}_DOMAIN", default.domain),
+            url=os.getenv(f"{prefix}_URL") or default.url,
+            max_tokens=int(os.getenv(f"{prefix}_MAX_TOKENS", default.max_tokens)),
+            temperature=float(os.getenv(f"{prefix}_TEMPERATURE", default.temperature)),
+        )
+
+    def route(self, stage: str) -> ModelRoute:
+        """阶段的主路由"""
+        return self.routes.get(stage) or ModelRoute(domain="x1")
+
+    def expected_seconds(self, stage: str, route: ModelRoute) -> float:
+        """路由在该阶段的历史平均耗时，尚无记录时为0"""
+        return self._latency.get((stage, route.domain), 0.0)
+
+    def select(self, stage: str) -> Optional[ModelRoute]:
+        """
+        按剩余预算选择路由，返回None表示应使用本地结果
+        """
+        left = remaining()
+        primary = self.route(stage)
+        if left is None or left > self.expected_seconds(stage, primary):
+            return primary
+        # 被跳过的路由逐渐降低预估耗时，使其在恢复后还有机会被重新选中
+        key = (stage, primary.domain)
+        if key in self._latency:
+            self._latency[key] *= 0.9
+        if self.fast_route is not None and left > self.expected_seconds(stage, self.fast_route):
+            return self.fast_route
+        return None
+
+    def observe(self, stage: str, route: ModelRoute, seconds: float):
+        """记录一次调用耗时"""
+        key = (stage, route.domain)
+        previous = self._latency.get(key)
+        if previous is None:
+            self._latency[key] = seconds
+        else:
+            self._latency[key] = previous + self.smoothing * (seconds - previous)
@@ -0,0 +1,92 @@
+import os
+import re
+from typing import List
+
+# 中日韩字符（含全角标点）按单字计，其余文本按英文单词和符号计
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9_]+|[^\sA-Za-z0-9_]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+    按星火文档的经验值：约1.5个汉字或0.8个英文单词为1个token，不调用分词器
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    others = len(_WORD_PATTERN.findall(_CJK_PATTERN.sub(" ", text)))
+    return int(cjk / 1.5 + others / 0.8) + 1
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """把超出预算的单段文本按行切分，单行仍超出时按字符数硬切"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces = []
+    for line in text.splitlines() or [text]:
+        tokens = estimate_tokens(line)
+        if tokens <= max_tokens:
+            pieces.append(line)
+            continue
+        # 按token密度折算每段的字符数，留出估算误差的余量
+        step = max(1, int(len(line) * max_tokens / tokens * 0.9))
+        pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+    return pack_segments(pieces, max_tokens)
+
+
+def pack_segments(segments: List[str], max_tokens: int) -> List[str]:
+    """按顺序把片段合并成不超过预算的若干块，单个片段超出预算时单独切分"""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for segment in segments:
+        tokens = estimate_tokens(segment)
+        if tokens > max_tokens:
+            if current:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(split_text(segment, max_tokens))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(segment)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class PromptBudget:
+    """
+    提示词token预算
+    评分提示词超过 max_tokens 时，把面试记录按 chunk_tokens 分段，
+    由最多 map_concurrency 个并发调用分别提炼要点，再用要点汇总评分
+    """
+
+    def __init__(self, max_tokens: int = 8000, chunk_tokens: int = 3000, map_concurrency: int = 4,
+                 max_rounds: int = 3):
+        if chunk_tokens <= 0 or chunk_tokens > max_tokens:
+            raise ValueError("分段token预算必须大于0且不超过提示词token预算")
+        self.max_tokens = max_tokens
+        self.chunk_tokens = chunk_tokens
+        self.map_concurrency = max(1, map_concurrency)
+        # 要点汇总后仍超出预算时再次提炼的最大轮数
+        self.max_rounds = max_rounds
+
+    @classmethod
+    def from_env(cls) -> "PromptBudget":
+        """根据环境变量创建提示词预算"""
+        return cls(
+            max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", 8000)),
+            chunk_tokens=int(os.getenv("PROMPT_CHUNK_TOKENS", 3000)),
+            map_concurrency=int(os.getenv("PROMPT_MAP_CONCURRENCY", 4)),
+        )
+
+    def exceeds(self, tokens: int) -> bool:
+        return tokens > self.max_tokens
+
+    def chunk(self, segments: List[str]) -> List[str]:
+        return pack_segments(segments, self.chunk_tokens)
@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .shared_state import SharedState
+
+
+class LLMResponseCache:
+    """
+    两级LLM响应缓存：进程内LRU + 本地SQLite
+    以规范化后的prompt（系统提示词、用户输入、模型domain、temperature）内容哈希为键，
+    SQLite层可被同一机器上的多个worker共享
+    异步调用方使用 aget/aset：内存层在事件循环中直接查询，SQLite层的读写放到线程池执行；
+    超出容量和过期条目的清理按写入次数或时间间隔批量进行，不在每次写入时执行
+    """
+
+    def __init__(self, db_path: str = "cache/llm_cache.sqlite3", ttl_seconds: float = 86400,
+                 memory_size: int = 256, max_entries: int = 10000, shared: Optional[SharedState] = None,
+                 flush_interval: float = 1.0, evict_interval: float = 60.0):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        # 距上次清理写入超过容量的1/10或超过清理间隔时才清理，SQLite条目数最多超出容量10%
+        self.evict_interval = evict_interval
+        self.evict_batch = max(1, max_entries // 10)
+        self._unevicted = 0
+        self._last_evict = time.monotonic()
+        # 多个worker共享状态时，命中计数定期累加到共享计数器，统计结果为全部worker的合计
+        self.shared = shared
+        self.flush_interval = flush_interval
+        self._flushed: Dict[str, int] = {}
+        self._last_flush = time.monotonic()
+
+        self._memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        # 内存层和计数使用的锁，只做字典操作；SQLite读写使用单独的锁，线程池中的磁盘操作不会阻塞事件循环查内存
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls, shared: Optional[SharedState] = None) -> Optional["LLMResponseCache"]:
+        """根据环境变量创建缓存，LLM_CACHE_ENABLED=false时返回None"""
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+            return None
+        return cls(
+            db_path=os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3"),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", 86400)),
+            memory_size=int(os.getenv("LLM_CACHE_MEMORY_SIZE", 256)),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000)),
+            shared=shared,
+            evict_interval=float(os.getenv("LLM_CACHE_EVICT_INTERVAL", 60)),
+        )
+
+    @staticmethod
+    def make_key(system_prompt: str, user_prompt: str, domain: str, temperature: float) -> str:
+        """生成内容寻址的缓存键，忽略提示词中缩进等空白差异"""
+        normalized = {
+            "system": " ".join(system_prompt.split()),
+            "user": " ".join(user_prompt.split()),
+            "domain": domain,
+            "temperature": round(float(temperature), 4),
+        }
+        raw = json.dumps(normalized, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """查询缓存，先查内存再查SQLite，过期条目视为未命中"""
+        now = time.time()
+        self._maybe_flush()
+        response = self._get_memory(key, now)
+        if response is not None:
+            return response
+        return self._get_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """异步查询缓存，SQLite查询和计数同步在线程池中执行"""
+        now = time.time()
+        if self._flush_due():
+            await asyncio.to_thread(self._maybe_flush)
+        response = self._get_memory(key, now)
+        if response is not None:
+            return response
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def set(self, key: str, response: str):
+        """写入两级缓存"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+        self._store(key, response, now)
+
+    async def aset(self, key: str, response: str):
+        """异步写入两级缓存，SQLite写入在线程池中执行"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+        await asyncio.to_thread(self._store, key, response, now)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        """查询内存层，命中时计数"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            created_at, response = entry
+            if now - created_at <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return response
+            del self._memory[key]
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        """查询SQLite层，命中时回填内存层"""
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            elif row is not None:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+        with self._lock:
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            self._remember(key, row[1], row[0])
+            self._counters["disk_hits"] += 1
+            return row[0]
+
+    def _store(self, key: str, response: str, now: float):
+        """写入SQLite层，累计写入达到批量或超过清理间隔时清理过期和超出容量的条目"""
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._unevicted += 1
+            evicted = 0
+            if self._unevicted >= self.evict_batch or time.monotonic() - self._last_evict >= self.evict_interval:
+                evicted = self._evict(now)
+            self._conn.commit()
+        with self._lock:
+            self._counters["stores"] += 1
+            self._counters["evictions"] += evicted
+
+    def _evict(self, now: float) -> int:
+        """删除过期条目和超出容量的最久未访问条目，返回超出容量被淘汰的条数（调用方需持有数据库锁）"""
+        self._unevicted = 0
+        self._last_evict = time.monotonic()
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        cursor = self._conn.execute(
+            "DELETE FROM llm_cache WHERE key NOT IN "
+            "(SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        return max(cursor.rowcount, 0)
+
+    def _flush_due(self) -> bool:
+        return self.shared is not None and time.monotonic() - self._last_flush >= self.flush_interval
+
+    def _maybe_flush(self, force: bool = False):
+        """把上次同步以来的计数增量累加到共享计数器"""
+        if not force and not self._flush_due():
+            return
+        if self.shared is None:
+            return
+        with self._lock:
+            self._last_flush = time.monotonic()
+            deltas = {name: value - self._flushed.get(name, 0) for name, value in self._counters.items()}
+            self._flushed = dict(self._counters)
+        self.shared.add_counters("llm_cache", deltas)
+
+    def _remember(self, key: str, created_at: float, response: str):
+        """写入内存LRU层（调用方需持有锁）"""
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """清空两级缓存"""
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """返回命中统计，共享状态启用时为全部worker的合计（内存条目数为当前worker）"""
+        if self.shared is not None:
+            self._maybe_flush(force=True)
+            stats = {name: 0 for name in self._counters}
+            stats.update(self.shared.counters("llm_cache"))
+        else:
+            with self._lock:
+                stats = dict(self._counters)
+        with self._lock:
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
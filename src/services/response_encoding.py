@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+from typing import Any, Optional, Tuple
+
+# 客户端可请求的msgpack媒体类型，响应统一使用第一个
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+# 响应体达到该大小（字节）且客户端接受gzip时压缩，0表示不压缩
+COMPRESS_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", 1024))
+COMPRESS_LEVEL = int(os.getenv("RESPONSE_COMPRESS_LEVEL", 5))
+# 超过该大小（字节）的响应体压缩耗时在毫秒级，调用方应放到线程池中压缩
+COMPRESS_OFFLOAD_SIZE = 64 * 1024
+
+# 可选依赖，首次使用时导入；未安装时为False
+_orjson = None
+_msgpack = None
+
+
+class NotAcceptableError(Exception):
+    """客户端只接受服务端无法生成的响应编码"""
+
+
+def _import_orjson():
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    return _orjson
+
+
+def _import_msgpack():
+    global _msgpack
+    if _msgpack is None:
+        try:
+            import msgpack
+            _msgpack = msgpack
+        except ImportError:
+            _msgpack = False
+    return _msgpack
+
+
+def dumps_json(data: Any) -> bytes:
+    """序列化为紧凑的UTF-8 JSON；安装了orjson时使用orjson"""
+    orjson = _import_orjson()
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _parse_quality(header: Optional[str]) -> dict:
+    """解析Accept类请求头，返回 取值 -> q值"""
+    values = {}
+    for part in (header or "").split(","):
+        value, *params = [item.strip() for item in part.split(";")]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        values[value.lower()] = quality
+    return values
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    按Accept请求头选择响应编码：msgpack 或 json
+    客户端明确接受msgpack、其优先级不低于JSON且服务端已安装msgpack时使用msgpack；
+    客户端只接受msgpack而服务端未安装时抛出NotAcceptableError
+    """
+    accepted = _parse_quality(accept)
+    msgpack_quality = max((accepted.get(media_type, 0.0) for media_type in MSGPACK_TYPES), default=0.0)
+    if msgpack_quality <= 0:
+        return "json"
+    json_quality = max(accepted.get("application/json", 0.0), accepted.get("application/*", 0.0),
+                       accepted.get("*/*", 0.0))
+    if not _import_msgpack():
+        if json_quality <= 0:
+            raise NotAcceptableError("服务端未安装msgpack，无法返回application/msgpack，请同时接受application/json")
+        return "json"
+    return "msgpack" if msgpack_quality >= json_quality else "json"
+
+
+def encode(data: Any, encoding: str = "json") -> Tuple[bytes, str]:
+    """按 negotiate 选出的编码序列化响应数据，返回 (响应体, 媒体类型)"""
+    if encoding == "msgpack":
+        return _import_msgpack().packb(data, use_bin_type=True), MSGPACK_TYPES[0]
+    return dumps_json(data), "application/json"
+
+
+def compress(body: bytes, accept_encoding: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+    """响应体较大且客户端接受gzip时压缩，返回 (响应体, Content-Encoding)；未压缩时编码为None"""
+    if COMPRESS_MIN_SIZE <= 0 or len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+    accepted = _parse_quality(accept_encoding)
+    if accepted.get("gzip", accepted.get("*", 0.0)) <= 0:
+        return body, None
+    return gzip.compress(body, compresslevel=COMPRESS_LEVEL), "gzip"
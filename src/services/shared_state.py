@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class SharedState:
+    """
+    同一机器上多个worker共享的小型状态（本地SQLite）
+    - 计数器：各worker累加增量，读取时得到全部worker的合计
+    - worker数值：各worker定期发布自己的数值（如并发上限），超过心跳有效期未更新的视为已退出
+    - 事件：记录最近一次发生时间（如流控错误），其他worker据此同步响应
+    """
+
+    def __init__(self, db_path: str = "cache/shared_state.sqlite3", heartbeat_ttl: float = 10.0):
+        self.db_path = db_path
+        self.heartbeat_ttl = heartbeat_ttl
+        self.pid = os.getpid()
+
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            "namespace TEXT NOT NULL, name TEXT NOT NULL, value INTEGER NOT NULL, "
+            "PRIMARY KEY (namespace, name))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS workers ("
+            "namespace TEXT NOT NULL, pid INTEGER NOT NULL, value REAL NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, pid))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events (name TEXT PRIMARY KEY, pid INTEGER NOT NULL, at REAL NOT NULL)"
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["SharedState"]:
+        """
+        根据环境变量创建共享状态，未启用时返回None
+        SHARED_STATE_ENABLED 未配置时，WORKERS 大于1才启用
+        """
+        enabled = os.getenv("SHARED_STATE_ENABLED")
+        if enabled is None:
+            if os.getenv("WORKERS", "1") in ("", "0", "1"):
+                return None
+        elif enabled.lower() in ("0", "false", "no"):
+            return None
+        return cls(db_path=os.getenv("SHARED_STATE_PATH", "cache/shared_state.sqlite3"))
+
+    def add_counters(self, namespace: str, deltas: Dict[str, int]):
+        """累加计数器增量"""
+        rows = [(namespace, name, value) for name, value in deltas.items() if value]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO counters (namespace, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(namespace, name) DO UPDATE SET value = value + excluded.value",
+                rows,
+            )
+
+    def counters(self, namespace: str) -> Dict[str, int]:
+        """全部worker的计数器合计"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, value FROM counters WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        return dict(rows)
+
+    def publish(self, namespace: str, value: float):
+        """发布当前worker的数值，同时作为心跳"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workers (namespace, pid, value, updated_at) VALUES (?, ?, ?, ?)",
+                (namespace, self.pid, value, time.time()),
+            )
+
+    def peers(self, namespace: str) -> Dict[int, float]:
+        """其他存活worker发布的数值（pid -> 数值）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pid, value FROM workers WHERE namespace = ? AND pid != ? AND updated_at >= ?",
+                (namespace, self.pid, time.time() - self.heartbeat_ttl),
+            ).fetchall()
+        return dict(rows)
+
+    def signal(self, name: str):
+        """记录一次事件"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO events (name, pid, at) VALUES (?, ?, ?)", (name, self.pid, time.time())
+            )
+
+    def last_signal(self, name: str) -> Optional[tuple]:
+        """最近一次事件的 (pid, 时间)，从未发生时返回None"""
+        with self._lock:
+            return self._conn.execute("SELECT pid, at FROM events WHERE name = ?", (name,)).fetchone()
+
+    def leave(self):
+        """worker退出时移除自己发布的数值"""
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE pid = ?", (self.pid,))
@@ -0,0 +1,47 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+from . import metrics
+
+
+class SingleFlight:
+    """
+    合并相同的并发请求
+    同一个键在执行期间的重复调用不再重新执行，而是等待并共享第一次调用的结果
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """根据请求内容生成规范化的哈希键"""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """执行或加入同键的进行中调用"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            metrics.SINGLE_FLIGHT_CALLS.labels(name=self.name, role="leader").inc()
+        else:
+            metrics.SINGLE_FLIGHT_CALLS.labels(name=self.name, role="coalesced").inc()
+
+        # 某个调用方断开时不取消共享任务，其他调用方仍在等待结果
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用方都已离开时，避免出现未读取异常的警告
+        if not task.cancelled():
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
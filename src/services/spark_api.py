@@ -2,15 +2,31 @@ import json
 import base64
 import hmac
 import hashlib
-import websocket
+import websockets
 import threading
 import time
 from datetime import datetime
-from urllib.parse import urlencode, quote
+from urllib.parse import urlencode, urlparse
 import ssl
+from . import metrics, stage_timer
+
+DEFAULT_SPARK_URL = "wss://spark-api.xf-yun.com/v1/x1"
+
+
+class SparkAPIError(Exception):
+    """星火API返回的错误帧"""
+
+    def __init__(self, code, message):
+        super().__init__(f"API错误: {message}")
+        self.code = code
+
+
+class SparkConnectionError(Exception):
+    """WebSocket连接异常或连接在响应完成前关闭"""
+
 
 class SparkAPI:
-    def __init__(self, app_id, api_key, api_secret):
+    def __init__(self, app_id, api_key, api_secret, url=None, auth_ttl=60.0):
         # 检查环境变量是否为空
         if not app_id or not api_key or not api_secret:
             raise ValueError("讯飞星火API配置不完整，请检查.env文件中的SPARK_APP_ID、SPARK_API_KEY、SPARK_API_SECRET配置")
@@ -18,44 +34,79 @@ class SparkAPI:
         self.app_id = app_id
         self.api_key = api_key
         self.api_secret = api_secret
-        self.host = "spark-api.xf-yun.com"
-        self.path = "/v1/x1"
-        self.url = f"wss://{self.host}{self.path}"
         
-    def create_url(self):
-        """生成带认证信息的WebSocket URL"""
+        # 服务地址可配置，便于指向本地模拟服务
+        self.url = url or DEFAULT_SPARK_URL
+        parsed = urlparse(self.url)
+        if parsed.scheme not in ("ws", "wss") or not parsed.netloc:
+            raise ValueError(f"星火API地址无效: {self.url}")
+        self.host = parsed.netloc
+        self.path = parsed.path or "/"
+        # 预先计算的鉴权材料：HMAC密钥填充只计算一次，签名时复制；各服务地址的 host 和 path
+        self._signer = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha256)
+        self._authorization_prefix = f'api_key="{api_key}", algorithm="hmac-sha256", headers="host date request-line", signature="'
+        self._targets = {self.url: (self.host, self.path)}
+        # 已签名的URL按服务地址缓存 auth_ttl 秒：服务端只校验date与当前时间的偏差（不超过300秒），
+        # 有效期内的连接复用同一签名，不必每次重新计算；为0时每次重新签名
+        self.auth_ttl = auth_ttl
+        self._signed_urls = {}
+        self.domain = "x1"
+        self.temperature = 0.7
+        self.max_tokens = 4096
+        
+    def create_url(self, url=None):
+        """生成带认证信息的WebSocket URL，url为空时使用默认服务地址"""
+        url = url or self.url
+        if self.auth_ttl > 0:
+            cached = self._signed_urls.get(url)
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+        host, path = self._target(url)
+        
         # 生成RFC1123格式的时间戳
         now = datetime.utcnow()
         date = now.strftime('%a, %d %b %Y %H:%M:%S GMT')
         
         # 拼接字符串
-        signature_origin = f"host: {self.host}\n"
+        signature_origin = f"host: {host}\n"
         signature_origin += f"date: {date}\n"
-        signature_origin += f"GET {self.path} HTTP/1.1"
+        signature_origin += f"GET {path} HTTP/1.1"
         
         # 进行hmac-sha256进行加密
-        signature_sha = hmac.new(
-            self.api_secret.encode('utf-8'), 
-            signature_origin.encode('utf-8'),
-            digestmod=hashlib.sha256
-        ).digest()
-        signature_sha_str = base64.b64encode(signature_sha).decode(encoding='utf-8')
-        
-        authorization_origin = f'api_key="{self.api_key}", algorithm="hmac-sha256", headers="host date request-line", signature="{signature_sha_str}"'
+        signer = self._signer.copy()
+        signer.update(signature_origin.encode('utf-8'))
+        signature_sha_str = base64.b64encode(signer.digest()).decode(encoding='utf-8')
+        
+        authorization_origin = f'{self._authorization_prefix}{signature_sha_str}"'
         authorization = base64.b64encode(authorization_origin.encode('utf-8')).decode(encoding='utf-8')
         
         # 将请求的鉴权参数组合为字典
         v = {
             "authorization": authorization,
             "date": date,
-            "host": self.host
+            "host": host
         }
         # 拼接鉴权参数，生成url
-        url = self.url + '?' + urlencode(v)
-        return url
+        signed_url = url + '?' + urlencode(v)
+        if self.auth_ttl > 0:
+            self._signed_urls[url] = (signed_url, time.monotonic() + self.auth_ttl)
+        return signed_url
+
+    def _target(self, url):
+        """服务地址对应的 (host, path)，解析结果按地址缓存"""
+        target = self._targets.get(url)
+        if target is None:
+            parsed = urlparse(url)
+            target = self._targets[url] = (parsed.netloc, parsed.path or "/")
+        return target
 
-    def generate_request_data(self, messages):
-        """生成请求数据"""
+    def prewarm(self, urls=()):
+        """预先解析各服务地址并完成一次签名，首个请求不再承担这部分初始化开销"""
+        for url in (self.url, *[url for url in urls if url]):
+            self.create_url(url)
+
+    def generate_request_data(self, messages, route=None):
+        """生成请求数据，route 提供时使用其中的模型参数"""
         data = {
             "header": {
                 "app_id": self.app_id,
@@ -63,9 +114,9 @@ class SparkAPI:
             },
             "parameter": {
                 "chat": {
-                    "domain": "x1",
-                    "temperature": 0.7,
-                    "max_tokens": 4096
+                    "domain": route.domain if route else self.domain,
+                    "temperature": route.temperature if route else self.temperature,
+                    "max_tokens": route.max_tokens if route else self.max_tokens
                 }
             },
             "payload": {
@@ -76,12 +127,20 @@ class SparkAPI:
         }
         return json.dumps(data)
 
-    def send_message(self, content, system_prompt=""):
-        """发送消息到星火API"""
+    def build_messages(self, content, system_prompt=""):
+        """构建对话消息列表"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": content})
+        return messages
+
+    def send_message(self, content, system_prompt="", timeout=60):
+        """发送消息到星火API，超过timeout秒未完成时关闭连接并报错"""
+        # 同步客户端只在此处使用，按需导入
+        import websocket
+
+        messages = self.build_messages(content, system_prompt)
         
         url = self.create_url()
         
@@ -120,12 +179,8 @@ class SparkAPI:
             response_data["finished"] = True
 
         def on_open(ws):
-            def run():
-                data = self.generate_request_data(messages)
-                ws.send(data)
-            
-            thread = threading.Thread(target=run)
-            thread.start()
+            # 请求数据很小，直接在连接线程中发送
+            ws.send(self.generate_request_data(messages))
 
         # 创建WebSocket连接
         websocket.enableTrace(False)
@@ -136,14 +191,174 @@ class SparkAPI:
             on_open=on_open
         )
         
+        # 超时后关闭连接，run_forever随之返回
+        def on_timeout():
+            if not response_data["finished"]:
+                response_data["error"] = f"星火API调用超时: 超过{timeout}秒"
+                response_data["finished"] = True
+                ws.close()
+        
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+        timer.start()
+        
         # 运行WebSocket
-        ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+        try:
+            ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+        finally:
+            timer.cancel()
         
-        # 等待响应完成
-        while not response_data["finished"]:
-            time.sleep(0.1)
+        # 连接已关闭但未收到结束帧
+        if not response_data["finished"]:
+            response_data["error"] = "WebSocket错误: 连接在响应完成前关闭"
         
         if response_data["error"]:
             raise Exception(response_data["error"])
             
-        return response_data["content"]
\ No newline at end of file
+        return response_data["content"]
+
+
+class AsyncSparkAPI(SparkAPI):
+    """基于asyncio的星火API客户端，等待响应时不阻塞事件循环"""
+
+    def __init__(self, app_id, api_key, api_secret, url=None, controller=None, pool=None, auth_ttl=60.0):
+        super().__init__(app_id, api_key, api_secret, url, auth_ttl)
+        # 调用控制器（并发、超时、重试、对冲），为空时每次调用只发起一个请求
+        self.controller = controller
+        # 预建连接池，为空时每次请求现场握手
+        self.pool = pool
+        # 与同步客户端保持一致，不校验证书
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
+
+    async def probe(self, timeout=5.0):
+        """
+        连通性探测：完成一次鉴权WebSocket握手后立即关闭，不发送请求，不消耗调用额度
+        服务不可达或鉴权失败时抛出SparkConnectionError
+        """
+        url = self.create_url()
+        ssl_context = self.ssl_context if url.startswith("wss://") else None
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(url, ssl=ssl_context, open_timeout=timeout):
+                return time.perf_counter() - started
+        except (websockets.WebSocketException, OSError, TimeoutError) as e:
+            raise SparkConnectionError(f"WebSocket错误: {str(e) or type(e).__name__}")
+
+    async def _connect(self, url=None):
+        """鉴权并完成WebSocket握手，返回已打开的连接"""
+        started = time.perf_counter()
+        signed_url = self.create_url(url)
+        # 仅wss连接需要TLS参数
+        ssl_context = self.ssl_context if signed_url.startswith("wss://") else None
+        ws = await websockets.connect(signed_url, ssl=ssl_context)
+        metrics.SPARK_HANDSHAKE_SECONDS.observe(time.perf_counter() - started)
+        return ws
+
+    async def _open(self, url):
+        """获取一个可发送请求的连接，返回 (连接, 是否为预建连接)"""
+        if self.pool is None:
+            return await self._connect(url), False
+        return await self.pool.acquire(url, lambda: self._connect(url))
+
+    async def warm_pool(self, urls=()):
+        """为默认地址和各路由地址预先建立连接，未启用连接池时不做任何事"""
+        if self.pool is not None:
+            await self.pool.warm_up((self.url, *[url for url in urls if url]), self._connect)
+
+    async def aclose(self):
+        """关闭连接池中的空闲连接"""
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def send_message(self, content, system_prompt=""):
+        """异步发送消息到星火API，返回完整响应"""
+        chunks = []
+        async for chunk in self.stream_message(content, system_prompt):
+            chunks.append(chunk)
+        return "".join(chunks)
+
+    async def stream_message(self, content, system_prompt="", route=None, timeout=None):
+        """
+        异步发送消息到星火API，按帧逐段产出响应内容直到status为2
+        route 指定模型路由（domain、地址、max_tokens、temperature），timeout 收紧本次调用的截止时间
+        """
+        if self.controller is None:
+            stream = self._stream_once(content, system_prompt, route)
+        else:
+            stream = self.controller.stream(lambda: self._stream_once(content, system_prompt, route), timeout)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _stream_once(self, content, system_prompt="", route=None):
+        """发起一次星火API请求，按帧逐段产出响应内容"""
+        messages = self.build_messages(content, system_prompt)
+        started = time.perf_counter()
+        outcome = "cancelled"
+        url = (route.url if route else None) or self.url
+        request_data = self.generate_request_data(messages, route)
+        ws = None
+
+        try:
+            ws, pooled = await self._open(url)
+            try:
+                await ws.send(request_data)
+            except websockets.ConnectionClosed:
+                if not pooled:
+                    raise
+                # 预建连接在取出前已被服务端关闭，改用新连接
+                ws = await self._connect(url)
+                await ws.send(request_data)
+            # 使用预建连接时为取出连接的耗时，接近0
+            stage_timer.record("spark_handshake", time.perf_counter() - started)
+            sent = time.perf_counter()
+            first_token = True
+
+            async for message in ws:
+                try:
+                    data = json.loads(message)
+                    header = data['header']
+                except Exception as e:
+                    outcome = "error"
+                    raise Exception(f"解析响应失败: {str(e)}")
+
+                if header['code'] != 0:
+                    outcome = "error"
+                    raise SparkAPIError(header['code'], header['message'])
+
+                # 获取响应内容
+                choices = data.get("payload", {}).get("choices", {})
+                content = choices.get("text", [{}])[0].get("content", "")
+                if content:
+                    if first_token:
+                        first_token = False
+                        ttft = time.perf_counter() - sent
+                        metrics.SPARK_TIME_TO_FIRST_TOKEN_SECONDS.observe(ttft)
+                        stage_timer.record("spark_ttft", ttft)
+                    metrics.SPARK_FRAMES_RECEIVED.inc()
+                    metrics.SPARK_CHARS_RECEIVED.inc(len(content))
+                    yield content
+
+                # 如果status为2，表示数据传输完毕
+                if header.get("status", 0) == 2:
+                    outcome = "ok"
+                    return
+
+            outcome = "error"
+            raise SparkConnectionError("WebSocket错误: 连接在响应完成前关闭")
+        except websockets.WebSocketException as e:
+            outcome = "error"
+            raise SparkConnectionError(f"WebSocket错误: {str(e)}")
+        except OSError as e:
+            outcome = "error"
+            raise SparkConnectionError(f"WebSocket错误: {str(e)}")
+        finally:
+            if ws is not None:
+                await ws.close()
+            # 调用方拿到完整答案后提前关闭时记为cancelled
+            metrics.SPARK_REQUESTS.labels(outcome=outcome).inc()
+            metrics.SPARK_GENERATION_SECONDS.observe(time.perf_counter() - started)
@@ -0,0 +1,297 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Optional
+
+from . import metrics
+from .shared_state import SharedState
+from .spark_api import SparkAPIError, SparkConnectionError
+
+# 流控类错误码：秒级流控超限、并发流控超限，触发并发上限收缩
+RATE_LIMIT_CODES = frozenset({11202, 11203})
+# 可重试的错误码：流控超限、服务繁忙、服务端网络异常
+RETRYABLE_CODES = RATE_LIMIT_CODES | {10110, 10222}
+
+
+class SparkTimeoutError(Exception):
+    """星火API调用超过截止时间"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """错误是否可以安全重试"""
+    if isinstance(error, SparkAPIError):
+        return error.code in RETRYABLE_CODES
+    return isinstance(error, (SparkConnectionError, SparkTimeoutError))
+
+
+class AdaptiveLimiter:
+    """
+    自适应并发上限（AIMD）
+    首token耗时不超过目标值时上限按 1/上限 缓慢增加，出现流控错误或耗时超标时按比例收缩；
+    收缩后冷却一段时间，避免同一波突发被重复收缩
+    多个worker共享状态时，max_limit 为全部worker合计的上限，各worker的上限之和不超过它；
+    任一worker收到流控错误时，其他worker在下次同步时一并收缩
+    """
+
+    def __init__(self, initial: int = 8, min_limit: int = 1, max_limit: int = 32,
+                 latency_target: float = 5.0, backoff_ratio: float = 0.7, cooldown: float = 1.0,
+                 shared: Optional[SharedState] = None, sync_interval: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.cooldown = cooldown
+        self.shared = shared
+        self.sync_interval = sync_interval
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.inflight = 0
+        self._last_decrease = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+        # 其他worker当前上限之和，以及已处理过的最近一次流控事件时间
+        self._peer_limit = 0.0
+        self._last_sync = 0.0
+        self._seen_overload = 0.0
+        if shared is not None:
+            event = shared.last_signal("spark_overload")
+            self._seen_overload = event[1] if event else 0.0
+        metrics.SPARK_CONCURRENCY_LIMIT.set(self.limit)
+        self.sync(force=True)
+
+    def _ceiling(self) -> float:
+        """本worker上限的最大值：总上限减去其他worker的上限"""
+        return max(self.min_limit, self.max_limit - self._peer_limit)
+
+    def sync(self, force: bool = False):
+        """与其他worker同步：发布自己的上限，读取其他worker的上限和流控事件"""
+        if self.shared is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+
+        self._peer_limit = sum(self.shared.peers("spark_limit").values())
+        event = self.shared.last_signal("spark_overload")
+        if event is not None and event[1] > self._seen_overload:
+            self._seen_overload = event[1]
+            if event[0] != self.shared.pid:
+                self._decrease()
+        self.limit = min(self.limit, self._ceiling())
+        self.shared.publish("spark_limit", self.limit)
+        metrics.SPARK_CONCURRENCY_LIMIT.set(self.limit)
+
+    def _cond(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """等待空闲并发额度，超时抛出SparkTimeoutError"""
+        self.sync()
+        cond = self._cond()
+        async with cond:
+            try:
+                await asyncio.wait_for(cond.wait_for(lambda: self.inflight < int(self.limit)), timeout)
+            except asyncio.TimeoutError:
+                raise SparkTimeoutError("星火API调用超时: 等待并发额度超时")
+            self.inflight += 1
+        metrics.SPARK_INFLIGHT.set(self.inflight)
+
+    def try_acquire(self) -> bool:
+        """有空闲额度时立即占用，否则返回False"""
+        if self.inflight >= int(self.limit):
+            return False
+        self.inflight += 1
+        metrics.SPARK_INFLIGHT.set(self.inflight)
+        return True
+
+    async def release(self):
+        cond = self._cond()
+        async with cond:
+            self.inflight -= 1
+            cond.notify_all()
+        metrics.SPARK_INFLIGHT.set(self.inflight)
+
+    def on_success(self, latency: float):
+        """根据首token耗时调整上限"""
+        if latency > self.latency_target:
+            self.on_overload()
+        else:
+            self.limit = min(self._ceiling(), self.limit + 1 / self.limit)
+            metrics.SPARK_CONCURRENCY_LIMIT.set(self.limit)
+
+    def on_overload(self):
+        """收到流控错误或耗时超标时收缩上限，并通知其他worker"""
+        if self._decrease() and self.shared is not None:
+            self.shared.signal("spark_overload")
+
+    def _decrease(self) -> bool:
+        """按比例收缩上限，冷却期内不重复收缩；返回是否实际收缩"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return False
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        metrics.SPARK_CONCURRENCY_LIMIT.set(self.limit)
+        return True
+
+
+class SparkCallController:
+    """
+    星火API调用控制：自适应并发、调用截止时间、可重试错误的指数退避重试，以及可选的对冲请求
+    只在尚未向调用方产出内容前重试或对冲，已开始输出的调用出错时直接抛出，避免内容重复
+    """
+
+    def __init__(self, limiter: Optional[AdaptiveLimiter] = None, timeout: float = 60.0,
+                 max_retries: int = 2, retry_base_delay: float = 0.5, retry_max_delay: float = 8.0,
+                 hedge: bool = False, hedge_quantile: float = 0.95, hedge_min_delay: float = 1.0,
+                 hedge_min_samples: int = 20):
+        self.limiter = limiter or AdaptiveLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        # 最近的首token耗时，用于计算对冲阈值
+        self._ttft_samples = deque(maxlen=200)
+
+    @classmethod
+    def from_env(cls, shared: Optional[SharedState] = None) -> "SparkCallController":
+        """根据环境变量创建调用控制器，shared 提供时并发上限在多个worker间共享"""
+        limiter = AdaptiveLimiter(
+            initial=int(os.getenv("SPARK_INITIAL_CONCURRENCY", 8)),
+            min_limit=int(os.getenv("SPARK_MIN_CONCURRENCY", 1)),
+            max_limit=int(os.getenv("SPARK_MAX_CONCURRENCY", 32)),
+            latency_target=float(os.getenv("SPARK_LATENCY_TARGET", 5.0)),
+            shared=shared,
+        )
+        return cls(
+            limiter,
+            timeout=float(os.getenv("SPARK_CALL_TIMEOUT", 60)),
+            max_retries=int(os.getenv("SPARK_MAX_RETRIES", 2)),
+            retry_base_delay=float(os.getenv("SPARK_RETRY_BASE_DELAY", 0.5)),
+            retry_max_delay=float(os.getenv("SPARK_RETRY_MAX_DELAY", 8.0)),
+            hedge=os.getenv("SPARK_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            hedge_quantile=float(os.getenv("SPARK_HEDGE_QUANTILE", 0.95)),
+            hedge_min_delay=float(os.getenv("SPARK_HEDGE_MIN_DELAY", 1.0)),
+        )
+
+    def hedge_delay(self) -> Optional[float]:
+        """对冲请求的等待阈值：最近首token耗时的分位数，样本不足或未开启时返回None"""
+        if not self.hedge or len(self._ttft_samples) < self.hedge_min_samples:
+            return None
+        samples = sorted(self._ttft_samples)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_quantile))
+        return max(self.hedge_min_delay, samples[index])
+
+    def backoff(self, attempt: int) -> float:
+        """第attempt次重试前的等待时间（full jitter）"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+
+    async def stream(self, factory: Callable[[], AsyncIterator[str]],
+                     timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        按控制策略执行一次流式调用，factory 每次调用发起一个新的单次流式请求
+        timeout 小于默认截止时间时以其为准
+        """
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        deadline = loop.time() + timeout
+        attempt = 0
+
+        while True:
+            attempt += 1
+            await self.limiter.acquire(max(0.0, deadline - loop.time()))
+            started = loop.time()
+            stream = None
+            produced = False
+            try:
+                stream, first = await self._first_chunk(factory, deadline)
+                ttft = loop.time() - started
+                self._ttft_samples.append(ttft)
+                self.limiter.on_success(ttft)
+
+                if first is None:
+                    return
+                produced = True
+                yield first
+
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), max(0.0, deadline - loop.time()))
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise SparkTimeoutError(f"星火API调用超时: 超过{timeout:g}秒")
+                    yield chunk
+            except Exception as e:
+                if isinstance(e, SparkAPIError) and e.code in RATE_LIMIT_CODES:
+                    self.limiter.on_overload()
+
+                delay = self.backoff(attempt)
+                if produced or not is_retryable(e) or attempt > self.max_retries \
+                        or loop.time() + delay >= deadline:
+                    raise
+                reason = f"code_{e.code}" if isinstance(e, SparkAPIError) else type(e).__name__
+                metrics.SPARK_RETRIES.labels(reason=reason).inc()
+            finally:
+                if stream is not None:
+                    await stream.aclose()
+                await self.limiter.release()
+
+            # 退避等待期间不占用并发额度
+            await asyncio.sleep(delay)
+
+    async def _first_chunk(self, factory: Callable[[], AsyncIterator[str]], deadline: float):
+        """
+        发起请求并等待首个内容片段，返回 (流, 首个片段)；流无内容结束时首个片段为None
+        首token耗时超过对冲阈值且仍有空闲额度时，再发起一个相同请求，采用先返回内容的一个
+        """
+        loop = asyncio.get_running_loop()
+        primary = factory()
+        candidates = {asyncio.ensure_future(primary.__anext__()): primary}
+        hedge_delay = self.hedge_delay()
+        hedged = False
+
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(candidates, timeout=min(hedge_delay, max(0.0, deadline - loop.time())))
+                if not done and loop.time() < deadline and self.limiter.try_acquire():
+                    hedged = True
+                    secondary = factory()
+                    candidates[asyncio.ensure_future(secondary.__anext__())] = secondary
+                    metrics.SPARK_HEDGES.labels(result="launched").inc()
+
+            error = None
+            pending = set(candidates)
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise SparkTimeoutError("星火API调用超时: 截止时间内未收到响应")
+                for task in done:
+                    if task.exception() is None or isinstance(task.exception(), StopAsyncIteration):
+                        winner = candidates.pop(task)
+                        if hedged and winner is not primary:
+                            metrics.SPARK_HEDGES.labels(result="won").inc()
+                        first = None if task.exception() is not None else task.result()
+                        return winner, first
+                    error = error or task.exception()
+            raise error
+        finally:
+            # 取消并关闭落选的请求；等待期间自身被取消时CancelledError照常抛出，不能被吞掉
+            for task in candidates:
+                task.cancel()
+            try:
+                if candidates:
+                    await asyncio.gather(*candidates, return_exceptions=True)
+                for stream in candidates.values():
+                    await stream.aclose()
+            finally:
+                if hedged:
+                    await self.limiter.release()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SparkConnectionPool:
+    """
+    预先建立的星火API WebSocket连接池
+    星火API每个连接只处理一次请求，响应结束后由服务端关闭，因此连接不归还；
+    池中保持若干已完成TLS与鉴权握手的空闲连接，请求取走后在后台补足，发送请求时无需等待握手。
+    空闲超过 max_idle 秒或已被服务端关闭的连接直接丢弃；只在有请求时补充，服务空闲时不会反复建连
+    池中有空闲连接时由后台清理任务在最早的连接到期时关闭过期连接，池空后清理任务退出
+    """
+
+    def __init__(self, size: int = 2, max_idle: float = 20.0):
+        if size < 1:
+            raise ValueError("星火API连接池大小必须大于0")
+
+        self.size = size
+        self.max_idle = max_idle
+        # 服务地址 -> 空闲连接及其建立时间
+        self._idle: Dict[str, Deque[Tuple[object, float]]] = {}
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["SparkConnectionPool"]:
+        """根据环境变量创建连接池，SPARK_POOL_SIZE为0时返回None（每次请求现场握手）"""
+        size = int(os.getenv("SPARK_POOL_SIZE", 2))
+        if size <= 0:
+            return None
+        return cls(size, max_idle=float(os.getenv("SPARK_POOL_MAX_IDLE", 20)))
+
+    async def acquire(self, key: str, connect: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """
+        取出一个连接，返回 (连接, 是否为预建连接)；没有可用的预建连接时调用connect现场建立
+        连接由调用方使用后关闭
+        """
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            ws, opened_at = idle.popleft()
+            metrics.SPARK_POOL_IDLE.dec()
+            if ws.open and now - opened_at < self.max_idle:
+                metrics.SPARK_POOL_CONNECTIONS.labels(result="hit").inc()
+                self._refill(key, connect)
+                return ws, True
+            metrics.SPARK_POOL_CONNECTIONS.labels(result="stale").inc()
+            self._close(ws)
+
+        metrics.SPARK_POOL_CONNECTIONS.labels(result="miss").inc()
+        ws = await connect()
+        self._refill(key, connect)
+        return ws, False
+
+    async def fill(self, key: str, connect: Callable[[], Awaitable]):
+        """补足指定服务地址的空闲连接，建连失败时抛出异常"""
+        idle = self._idle.setdefault(key, deque())
+        while len(idle) < self.size:
+            ws = await connect()
+            idle.append((ws, time.monotonic()))
+            metrics.SPARK_POOL_IDLE.inc()
+            self._ensure_reaper()
+
+    async def warm_up(self, keys: Iterable[str], connect: Callable[[str], Awaitable]):
+        """启动时为各服务地址预先建立连接"""
+        for key in dict.fromkeys(keys):
+            await self.fill(key, lambda: connect(key))
+
+    def _refill(self, key: str, connect: Callable[[], Awaitable]):
+        """在后台补足空闲连接，同一地址同时只有一个补充任务"""
+        task = self._refills.get(key)
+        if task is not None and not task.done():
+            return
+        self._refills[key] = asyncio.create_task(self._run_refill(key, connect))
+
+    async def _run_refill(self, key: str, connect: Callable[[], Awaitable]):
+        try:
+            await self.fill(key, connect)
+        except Exception as e:
+            # 补充失败不影响当前请求，下次取用时现场建连并再次补充
+            logger.warning("星火API预建连接失败: %s", str(e) or type(e).__name__)
+
+    def _ensure_reaper(self):
+        """池中有空闲连接时保持一个后台清理任务"""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def _reap(self):
+        """在最早的空闲连接到期时关闭过期或已被服务端关闭的连接，池中没有空闲连接时退出"""
+        while True:
+            now = time.monotonic()
+            oldest = None
+            for idle in self._idle.values():
+                # 同一地址的连接按建立时间排列，队首最早到期
+                while idle and (now - idle[0][1] >= self.max_idle or not idle[0][0].open):
+                    ws, _ = idle.popleft()
+                    metrics.SPARK_POOL_IDLE.dec()
+                    metrics.SPARK_POOL_CONNECTIONS.labels(result="stale").inc()
+                    self._close(ws)
+                if idle and (oldest is None or idle[0][1] < oldest):
+                    oldest = idle[0][1]
+            if oldest is None:
+                return
+            await asyncio.sleep(oldest + self.max_idle - now)
+
+    def _close(self, ws):
+        """在后台关闭连接，不阻塞取用连接的请求"""
+        task = asyncio.create_task(ws.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self):
+        """停止补充和清理并关闭全部空闲连接"""
+        tasks = [task for task in (*self._refills.values(), self._reaper) if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+
+        for idle in self._idle.values():
+            while idle:
+                ws, _ = idle.popleft()
+                metrics.SPARK_POOL_IDLE.dec()
+                self._close(ws)
+        await asyncio.gather(*self._closing, return_exceptions=True)
@@ -0,0 +1,53 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from . import metrics
+
+# 当前请求的各阶段耗时（秒），未开启记录时为None
+_current_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "stage_timings", default=None
+)
+
+
+def start_request() -> Dict[str, float]:
+    """为当前请求开启阶段耗时记录，返回记录字典"""
+    timings: Dict[str, float] = {}
+    _current_timings.set(timings)
+    return timings
+
+
+def record(name: str, seconds: float):
+    """记录一个阶段的耗时：始终计入监控指标，当前请求开启记录时同时累加到请求记录中"""
+    metrics.EVALUATION_STAGE_SECONDS.labels(stage=name).observe(seconds)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    """记录代码块耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """格式化为Server-Timing响应头（毫秒）"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """解析Server-Timing响应头，返回各阶段耗时（秒）"""
+    timings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                timings[name] = float(value) / 1000
+    return timings
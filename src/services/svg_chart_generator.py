@@ -0,0 +1,185 @@
+import base64
+import os
+from typing import List
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from ..models.evaluation_models import SixDimensionScore
+
+# 与PNG渲染器相同的预设名称，对应SVG的显示宽度（像素）
+SVG_PRESETS = {
+    "full": 800,
+    "medium": 480,
+    "thumbnail": 320,
+}
+
+# 画布坐标系（viewBox）：中心点和满分半径
+_VIEW_SIZE = 600
+_CENTER = _VIEW_SIZE / 2
+_RADIUS = 220
+_FONT_FAMILY = "SimHei, 'Microsoft YaHei', 'PingFang SC', 'Noto Sans CJK SC', sans-serif"
+
+
+class SVGRadarChartGenerator:
+    """
+    基于NumPy直接计算顶点坐标的SVG雷达图渲染器
+    不依赖matplotlib，输出与RadarChartGenerator相同样式的雷达图和对比图
+    """
+
+    def __init__(self, preset: str = None):
+        self.dimensions = [
+            '技能匹配',
+            '沟通表达',
+            '情绪稳定',
+            '专业素养',
+            '逻辑思维',
+            '学习潜力'
+        ]
+        self.preset = preset or os.getenv("CHART_PRESET", "full")
+        if self.preset not in SVG_PRESETS:
+            raise ValueError(f"不支持的图表预设: {self.preset}，可选值: {', '.join(SVG_PRESETS)}")
+
+        # 与matplotlib极坐标一致：从正东方向开始逆时针排列
+        angles = np.linspace(0, 2 * np.pi, len(self.dimensions), endpoint=False)
+        self._unit = np.column_stack([np.cos(angles), -np.sin(angles)])
+        self._cache_static = {}
+
+    def generate_radar_chart(self, scores: SixDimensionScore, preset: str = None) -> str:
+        """
+        生成六维雷达图并返回base64编码的SVG
+        """
+        return self.generate_radar_charts([scores], preset)[0]
+
+    def generate_radar_charts(self, scores_list: List[SixDimensionScore], preset: str = None) -> List[str]:
+        """
+        批量生成六维雷达图，返回base64编码的SVG列表
+        """
+        static = self._static_layer('面试评估六维图')
+        charts = []
+        for scores in scores_list:
+            values = self._score_values(scores)
+            body = self._series(values, '#1f77b4', 0.25) + self._annotations(values)
+            charts.append(self._encode(self._document(static + body, preset)))
+        return charts
+
+    def generate_comparison_chart(self, current_scores: SixDimensionScore,
+                                  benchmark_scores: SixDimensionScore = None,
+                                 benchmark_label: str = '优秀基准') -> str:
+        """
+        生成对比雷达图（当前分数 vs 基准分数）
+        """
+        if benchmark_scores is None:
+            # 默认基准分数（优秀标准）
+            benchmark_values = [85, 85, 85, 85, 85, 85]
+        else:
+            benchmark_values = self._score_values(benchmark_scores)
+
+        current_values = self._score_values(current_scores)
+
+        body = (
+            self._static_layer('面试评估对比图')
+            + self._series(current_values, '#1f77b4', 0.25)
+            + self._series(benchmark_values, '#ff7f0e', 0.15)
+            + self._legend([('当前评分', '#1f77b4'), (benchmark_label, '#ff7f0e')])
+        )
+        return self._encode(self._document(body))
+
+    @staticmethod
+    def _score_values(scores: SixDimensionScore) -> List[float]:
+        """按维度顺序提取分数"""
+        return [
+            scores.skill_match,
+            scores.communication,
+            scores.emotional_stability,
+            scores.professionalism,
+            scores.logical_thinking,
+            scores.learning_potential
+        ]
+
+    def _points(self, values) -> np.ndarray:
+        """把分数换算成画布坐标"""
+        radii = np.clip(np.asarray(values, dtype=float), 0, 100) / 100 * _RADIUS
+        return _CENTER + self._unit * radii[:, None]
+
+    def _static_layer(self, title: str) -> str:
+        """网格、坐标轴、维度标签和标题，每种标题只构建一次"""
+        if title in self._cache_static:
+            return self._cache_static[title]
+
+        parts = [f'<rect width="{_VIEW_SIZE}" height="{_VIEW_SIZE}" fill="white"/>']
+
+        # 同心圆网格与刻度
+        tick_angle = np.deg2rad(22.5)
+        for tick in (20, 40, 60, 80, 100):
+            r = tick / 100 * _RADIUS
+            stroke = '#000000' if tick == 100 else '#b0b0b0'
+            parts.append(f'<circle cx="{_CENTER}" cy="{_CENTER}" r="{r:.1f}" fill="none" '
+                         f'stroke="{stroke}" stroke-width="0.8"/>')
+            tx, ty = _CENTER + r * np.cos(tick_angle), _CENTER - r * np.sin(tick_angle)
+            parts.append(f'<text x="{tx:.1f}" y="{ty:.1f}" font-size="10" fill="#333">{tick}</text>')
+
+        # 径向轴线和维度标签
+        for (ux, uy), dim in zip(self._unit, self.dimensions):
+            ex, ey = _CENTER + ux * _RADIUS, _CENTER + uy * _RADIUS
+            parts.append(f'<line x1="{_CENTER}" y1="{_CENTER}" x2="{ex:.1f}" y2="{ey:.1f}" '
+                         f'stroke="#b0b0b0" stroke-width="0.8"/>')
+            lx, ly = _CENTER + ux * (_RADIUS + 28), _CENTER + uy * (_RADIUS + 28)
+            anchor = 'middle' if abs(ux) < 0.3 else ('start' if ux > 0 else 'end')
+            parts.append(f'<text x="{lx:.1f}" y="{ly + 4:.1f}" font-size="12" text-anchor="{anchor}">'
+                         f'{escape(dim)}</text>')
+
+        parts.append(f'<text x="{_CENTER}" y="28" font-size="16" font-weight="bold" '
+                     f'text-anchor="middle">{escape(title)}</text>')
+
+        static = "".join(parts)
+        self._cache_static[title] = static
+        return static
+
+    def _series(self, values, color: str, alpha: float) -> str:
+        """一组评分的填充多边形和顶点"""
+        points = self._points(values)
+        path = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        parts = [f'<polygon points="{path}" fill="{color}" fill-opacity="{alpha}" '
+                 f'stroke="{color}" stroke-width="2"/>']
+        parts.extend(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3.5" fill="{color}"/>' for x, y in points)
+        return "".join(parts)
+
+    def _annotations(self, values) -> str:
+        """在每个顶点右上方显示分数"""
+        parts = []
+        for (x, y), value in zip(self._points(values), values):
+            label = f'{value:.1f}'
+            width = len(label) * 6.5 + 8
+            bx, by = x + 8, y - 26
+            parts.append(f'<rect x="{bx:.1f}" y="{by:.1f}" width="{width:.1f}" height="18" rx="4" '
+                         f'fill="white" fill-opacity="0.8" stroke="#333" stroke-width="0.8"/>')
+            parts.append(f'<text x="{bx + 4:.1f}" y="{by + 13:.1f}" font-size="10">{label}</text>')
+        return "".join(parts)
+
+    @staticmethod
+    def _legend(entries) -> str:
+        """右上角图例"""
+        parts = []
+        for i, (label, color) in enumerate(entries):
+            y = 50 + i * 20
+            parts.append(f'<rect x="{_VIEW_SIZE - 110}" y="{y - 9}" width="18" height="10" '
+                         f'fill="{color}" fill-opacity="0.5" stroke="{color}"/>')
+            parts.append(f'<text x="{_VIEW_SIZE - 86}" y="{y}" font-size="11">{escape(label)}</text>')
+        return "".join(parts)
+
+    def _document(self, body: str, preset: str = None) -> str:
+        """拼装完整的SVG文档"""
+        preset = preset or self.preset
+        if preset not in SVG_PRESETS:
+            raise ValueError(f"不支持的图表预设: {preset}，可选值: {', '.join(SVG_PRESETS)}")
+        width = SVG_PRESETS[preset]
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{width}" '
+                f'viewBox="0 0 {_VIEW_SIZE} {_VIEW_SIZE}" font-family="{_FONT_FAMILY}">'
+                f'{body}</svg>')
+
+    @staticmethod
+    def _encode(svg: str) -> str:
+        """转换为base64 data URI"""
+        image_base64 = base64.b64encode(svg.encode('utf-8')).decode('utf-8')
+        return f"data:image/svg+xml;base64,{image_base64}"
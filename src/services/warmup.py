@@ -0,0 +1,53 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 各启动阶段耗时（秒）与失败信息，供就绪检查接口返回
+_timings: Dict[str, float] = {}
+_errors: Dict[str, str] = {}
+_ready = False
+
+
+def record(phase: str, seconds: float, replace: bool = True):
+    """记录一个启动阶段的耗时，replace 为False时只保留首次记录"""
+    if not replace and phase in _timings:
+        return
+    _timings[phase] = round(seconds, 4)
+    metrics.STARTUP_PHASE_SECONDS.labels(phase=phase).set(seconds)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    计时一个预热阶段
+    预热失败不影响服务启动，只记录错误，相应组件在首个请求时按原方式初始化
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        # HTTPException 的错误信息在detail中
+        message = str(getattr(e, "detail", None) or e)
+        _errors[name] = message
+        logger.warning("预热阶段 %s 失败: %s", name, message)
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def mark_ready():
+    global _ready
+    _ready = True
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def report() -> Dict[str, Optional[dict]]:
+    """启动耗时报告"""
+    return {"timings": dict(_timings), "errors": dict(_errors) or None}
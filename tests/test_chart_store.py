@@ -0,0 +1,57 @@
+import hashlib
+import os
+import time
+
+from src.services.chart_store import ChartStore
+
+
+def _id(n: int) -> str:
+    return hashlib.sha256(str(n).encode()).hexdigest() + ".png"
+
+
+def _stored(store: ChartStore):
+    return {name for name in os.listdir(store.directory) if store.is_valid_id(name)}
+
+
+def test_eviction_scans_only_when_estimate_exceeds_limit(tmp_path):
+    store = ChartStore(str(tmp_path), max_bytes=1000, rescan_interval=3600)
+    scans = []
+    evict = store._evict
+    store._evict = lambda: (scans.append(1), evict())
+
+    for n in range(10):
+        store.put(_id(n), b"x" * 100)
+    # 首次写入扫描一次，未超出上限前不再扫描
+    assert len(scans) == 1 and len(_stored(store)) == 10
+
+    store.put(_id(10), b"x" * 100)
+    assert len(scans) == 2
+    # 淘汰到上限的90%，之后写满这部分空间前不再扫描
+    assert len(_stored(store)) == 9
+    store.put(_id(11), b"x" * 100)
+    assert len(scans) == 2
+
+
+def test_eviction_removes_least_recently_accessed(tmp_path):
+    store = ChartStore(str(tmp_path), max_bytes=350, rescan_interval=3600)
+    for n in range(3):
+        store.put(_id(n), b"x" * 100)
+        past = time.time() - 100 + n
+        os.utime(os.path.join(store.directory, _id(n)), (past, past))
+    # 最早写入的图表最近被访问过，淘汰第二旧的
+    store.get(_id(0))
+
+    store.put(_id(3), b"x" * 100)
+    assert _stored(store) == {_id(0), _id(2), _id(3)}
+
+
+def test_etag_follows_content(tmp_path):
+    store = ChartStore(str(tmp_path))
+    store.put(_id(0), b"a")
+    data, media_type, etag = store.get(_id(0))
+    assert (data, media_type) == (b"a", "image/png")
+    assert store.get(_id(0))[2] == etag
+
+    store.put(_id(1), b"b")
+    assert store.get(_id(1))[2] != etag
+    assert store.get(_id(2)) is None
@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.api import evaluation_api
+from src.services import warmup
+
+
+@pytest.fixture
+def app_env(tmp_path, monkeypatch):
+    """fast模式（不访问星火API），缓存、历史、任务队列和图表存储都放在临时目录，不预热也不探测星火API"""
+    monkeypatch.setenv("EVALUATION_MODE", "fast")
+    # 不配置星火API（.env 中的配置会被 load_dotenv 载入环境变量）
+    for name in ("SPARK_APP_ID", "SPARK_API_KEY", "SPARK_API_SECRET"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    monkeypatch.setenv("SHARED_STATE_ENABLED", "false")
+    monkeypatch.setenv("CHART_POOL_SIZE", "0")
+    monkeypatch.setenv("JOB_QUEUE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setenv("CHART_STORE_PATH", str(tmp_path / "charts"))
+    monkeypatch.setattr(evaluation_api, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(evaluation_api, "SPARK_PROBE_INTERVAL", 0)
+    # 以下状态在启动或首次请求时创建，测试结束后恢复
+    for name in ("spark_api", "evaluation_engine", "evaluation_history", "chart_pool", "chart_store",
+                 "shared_state", "response_cache", "job_queue", "warmup_task", "probe_task"):
+        monkeypatch.setattr(evaluation_api, name, None)
+    monkeypatch.setattr(evaluation_api, "evaluation_history_loaded", False)
+    monkeypatch.setattr(warmup, "_ready", False)
+    monkeypatch.setattr(warmup, "_timings", {})
+    monkeypatch.setattr(warmup, "_errors", {})
+
+
+@pytest.fixture
+def client(app_env):
+    with TestClient(main.app) as c:
+        yield c
+
+
+def test_batch_reports_invalid_item_without_failing_others(client):
+    items = [{"resume_match_score": 80}, {"resume_match_score": "很好"}, {"resume_match_score": 70}]
+    response = client.post("/api/evaluation/analyze/batch?profile=scores&concurrency=2", json=items)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[1]["status"] == "error"
+    assert by_index[1]["detail"].startswith("输入数据校验失败")
+    for index in (0, 2):
+        assert by_index[index]["status"] == "ok"
+        assert list(by_index[index]["result"]) == ["scores"]
+
+
+def _analyze_chart_url(client, resume_match_score: float) -> str:
+    response = client.post("/api/evaluation/analyze?chart_format=svg&chart_delivery=reference",
+                           json={"resume_match_score": resume_match_score})
+    assert response.status_code == 200
+    return response.json()["radar_chart_url"]
+
+
+def test_chart_reference_etag_and_eviction(client):
+    url = _analyze_chart_url(client, 80)
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("image/svg+xml")
+    etag = first.headers["ETag"]
+
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert revalidated.content == b""
+
+    # 相同评分复用已存储的图表
+    assert _analyze_chart_url(client, 80) == url
+
+    # 存储只容得下一张图表时，写入新图表会淘汰较旧的图表
+    evaluation_api.chart_store.max_bytes = int(len(first.content) * 1.5)
+    other = _analyze_chart_url(client, 90)
+    assert other != url
+    assert client.get(url).status_code == 404
+    assert client.get(other).status_code == 200
+
+
+def _wait_for_status(client, status: str, timeout: float = 5) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        body = client.get("/api/evaluation/ready").json()
+        if body["status"] == status or time.monotonic() > deadline:
+            return body
+        time.sleep(0.02)
+
+
+def test_ready_reports_warming_up_until_warm_up_finishes(app_env, monkeypatch):
+    monkeypatch.setattr(evaluation_api, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(evaluation_api, "CHART_FORMAT", "svg")
+    # 预热的第一步（加载历史）等待放行
+    release = threading.Event()
+    load_history = evaluation_api.get_evaluation_history
+
+    def blocked_load_history():
+        release.wait(5)
+        return load_history()
+
+    monkeypatch.setattr(evaluation_api, "get_evaluation_history", blocked_load_history)
+
+    with TestClient(main.app) as client:
+        assert client.get("/api/evaluation/health").status_code == 200
+        response = client.get("/api/evaluation/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+
+        release.set()
+        body = _wait_for_status(client, "ready")
+        assert body["status"] == "ready"
+        assert client.get("/api/evaluation/ready").status_code == 200
+        assert {"history", "engine", "chart_template"} <= set(body["timings"])
+        assert body["spark"] is None
+
+
+class ProbedSparkAPI:
+    """连通性探测结果可切换的星火API"""
+
+    def __init__(self):
+        self.error = ConnectionRefusedError("连接被拒绝")
+
+    async def probe(self) -> float:
+        if self.error is not None:
+            raise self.error
+        return 0.01
+
+
+def test_ready_follows_spark_probe(app_env, monkeypatch):
+    spark_api = ProbedSparkAPI()
+    monkeypatch.setattr(evaluation_api, "SPARK_PROBE_INTERVAL", 0.02)
+    monkeypatch.setattr(evaluation_api, "spark_status", dict(evaluation_api.spark_status, reachable=None, error=None))
+    monkeypatch.setattr(evaluation_api, "get_spark_api", lambda: (spark_api, None))
+
+    with TestClient(main.app) as client:
+        body = _wait_for_status(client, "spark_unreachable")
+        assert body["status"] == "spark_unreachable"
+        assert body["spark"]["error"] == "连接被拒绝"
+        assert client.get("/api/evaluation/ready").status_code == 503
+
+        # 星火API恢复后，探测任务仍在运行并把服务标记为就绪
+        spark_api.error = None
+        body = _wait_for_status(client, "ready")
+        assert body["status"] == "ready"
+        assert body["spark"]["reachable"] is True and body["spark"]["error"] is None
+
+
+def test_ready_ignores_spark_probe_in_fast_mode(app_env, monkeypatch):
+    monkeypatch.setattr(evaluation_api, "SPARK_PROBE_INTERVAL", 0.02)
+
+    with TestClient(main.app) as client:
+        body = _wait_for_status(client, "ready")
+        assert body["status"] == "ready"
+        assert body["spark"] is None
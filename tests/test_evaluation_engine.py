@@ -0,0 +1,176 @@
+import asyncio
+import json
+
+from src.models.evaluation_models import InterviewInput, SixDimensionScore
+from src.services import model_routing
+from src.services.evaluation_engine import (
+    CHUNK_SYSTEM_PROMPT, DEFAULT_SUMMARY, FUSED_SYSTEM_PROMPT, SCORES_SYSTEM_PROMPT, EvaluationEngine
+)
+from src.services.prompt_budget import PromptBudget
+from src.services.response_cache import LLMResponseCache
+from src.services.spark_api import SparkConnectionError
+from src.services.spark_control import SparkTimeoutError
+
+SCORES = {
+    "skill_match": 81, "communication": 72, "emotional_stability": 73,
+    "professionalism": 74, "logical_thinking": 75, "learning_potential": 76,
+}
+
+
+class FakeSparkAPI:
+    """按顺序返回预设响应的星火API，响应为异常时抛出；响应为列表时逐段返回，其中的异常在该位置抛出"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.system_prompts = []
+        self.contents = []
+
+    async def stream_message(self, content, system_prompt="", route=None, timeout=None):
+        self.system_prompts.append(system_prompt)
+        self.contents.append(content)
+        response = self.responses.pop(0)
+        for chunk in response if isinstance(response, list) else [response]:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+def _evaluate(spark_api):
+    async def run():
+        routes = model_routing.start_request()
+        engine = EvaluationEngine(spark_api, mode="fused")
+        result = await engine.generate_evaluation(InterviewInput(resume_match_score=90))
+        return result, routes
+
+    return asyncio.run(run())
+
+
+def test_fused_single_call():
+    spark_api = FakeSparkAPI([json.dumps(dict(SCORES, summary="总结", recommendations=["建议"]))])
+    (scores, summary, recommendations), routes = _evaluate(spark_api)
+
+    assert spark_api.system_prompts == [FUSED_SYSTEM_PROMPT]
+    assert scores.skill_match == 81
+    assert (summary, recommendations) == ("总结", ["建议"])
+    assert routes == {"fused": "x1"}
+
+
+def test_fused_incomplete_response_falls_back_to_two_calls():
+    spark_api = FakeSparkAPI([
+        json.dumps(SCORES),
+        json.dumps(SCORES),
+        json.dumps({"summary": "分阶段总结", "recommendations": ["a"]}),
+    ])
+    (scores, summary, recommendations), routes = _evaluate(spark_api)
+
+    assert len(spark_api.system_prompts) == 3
+    assert scores.skill_match == 81
+    assert summary == "分阶段总结"
+    assert routes["scores"] == "x1" and routes["summary"] == "x1"
+
+
+def test_fused_connection_error_does_not_retry_per_stage():
+    spark_api = FakeSparkAPI([SparkConnectionError("WebSocket错误: 连接被拒绝")])
+    (scores, summary, _), routes = _evaluate(spark_api)
+
+    assert len(spark_api.system_prompts) == 1
+    assert scores.skill_match == 90
+    assert summary == DEFAULT_SUMMARY
+    assert routes == {"fused": "local"}
+
+
+def test_fused_timeout_does_not_retry_per_stage():
+    spark_api = FakeSparkAPI([SparkTimeoutError("星火API调用超时")])
+    (_, summary, _), routes = _evaluate(spark_api)
+
+    assert len(spark_api.system_prompts) == 1
+    assert summary == DEFAULT_SUMMARY
+    assert routes == {"fused": "local"}
+
+
+SUMMARY_RESPONSE = '好的：\n{"summary": "沟通\\"清晰\\"，逻辑严谨", "recommendations": ["多练习"]}\n以上'
+
+
+def _stream_summary(spark_api, cache=None):
+    async def run():
+        model_routing.start_request()
+        engine = EvaluationEngine(spark_api, cache=cache)
+        events = [event async for event in engine.stream_summary_and_recommendations(
+            InterviewInput(), SixDimensionScore(**SCORES))]
+        deltas = [payload for kind, payload in events if kind == "delta"]
+        return deltas, events[-1][1]
+
+    return asyncio.run(run())
+
+
+def _split(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_summary_stream_yields_decoded_text_only():
+    deltas, (summary, recommendations) = _stream_summary(FakeSparkAPI([_split(SUMMARY_RESPONSE)]))
+
+    assert summary == '沟通"清晰"，逻辑严谨'
+    assert "".join(deltas) == summary
+    assert recommendations == ["多练习"]
+
+
+def test_summary_stream_from_cache_has_same_format(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"))
+    _stream_summary(FakeSparkAPI([SUMMARY_RESPONSE]), cache)
+
+    deltas, (summary, _) = _stream_summary(FakeSparkAPI([]), cache)
+    assert deltas == ['沟通"清晰"，逻辑严谨'] and summary == deltas[0]
+
+
+def test_summary_stream_failure_falls_back_to_default():
+    chunks = _split(SUMMARY_RESPONSE)[:8] + [SparkConnectionError("连接断开")]
+    deltas, (summary, _) = _stream_summary(FakeSparkAPI([chunks]))
+
+    assert deltas and "{" not in "".join(deltas)
+    assert summary == DEFAULT_SUMMARY
+
+
+def _long_interview(pairs: int) -> InterviewInput:
+    return InterviewInput(interview_qa_pairs=[
+        {"question": f"第{i}题：请介绍你负责过的项目", "answer": "我负责了订单系统的重构和性能优化工作。" * 10}
+        for i in range(pairs)
+    ])
+
+
+def _score_with_budget(input_data: InterviewInput, map_response: str = None):
+    """在较小的token预算下评分，每个分段的提炼调用都返回 map_response"""
+    async def run():
+        routes = model_routing.start_request()
+        spark_api = FakeSparkAPI([])
+        engine = EvaluationEngine(spark_api, budget=PromptBudget(max_tokens=600, chunk_tokens=300))
+        chunks = engine.budget.chunk(engine._transcript_segments(input_data))
+        if map_response is not None:
+            spark_api.responses.extend([map_response] * len(chunks))
+        spark_api.responses.append(json.dumps(SCORES))
+        scores = await engine.generate_six_dimension_scores(input_data)
+        return spark_api, chunks, scores, routes
+
+    return asyncio.run(run())
+
+
+def test_scores_prompt_over_budget_is_condensed_by_map_reduce():
+    spark_api, chunks, scores, routes = _score_with_budget(_long_interview(12), json.dumps({"summary": "项目经验丰富"}))
+
+    # 每段提炼一次要点，再用要点评分一次
+    assert len(chunks) > 1
+    assert spark_api.system_prompts == [CHUNK_SYSTEM_PROMPT] * len(chunks) + [SCORES_SYSTEM_PROMPT]
+    scores_input = spark_api.contents[-1]
+    assert "面试记录要点" in scores_input and "片段1：项目经验丰富" in scores_input
+    assert "订单系统" not in scores_input
+    assert scores.skill_match == 81
+    assert routes == {"map": "x1", "scores": "x1"}
+
+
+def test_scores_prompt_within_budget_skips_map_reduce():
+    spark_api, _, scores, routes = _score_with_budget(_long_interview(1))
+
+    assert spark_api.system_prompts == [SCORES_SYSTEM_PROMPT]
+    assert "订单系统" in spark_api.contents[0]
+    assert scores.skill_match == 81
+    assert routes == {"scores": "x1"}
@@ -0,0 +1,18 @@
+from src.models.evaluation_models import SCORE_DIMENSIONS, EvaluationJob
+
+SCORES = dict.fromkeys(SCORE_DIMENSIONS, 70.0)
+
+
+def _job(result):
+    return EvaluationJob(job_id="j", status="succeeded", created_at=0, updated_at=0, result=result)
+
+
+def test_job_result_keeps_profile_fields():
+    scores_only = _job({"scores": SCORES}).model_dump()["result"]
+    summary = _job({"scores": SCORES, "summary": "s", "recommendations": ["r"], "routes": None}).model_dump()["result"]
+    full = _job({"scores": SCORES, "summary": "s", "recommendations": [], "radar_chart_base64": "data",
+                 "radar_chart_url": None, "routes": None}).model_dump()["result"]
+
+    assert set(scores_only) == {"scores"}
+    assert set(summary) == {"scores", "summary", "recommendations", "routes"}
+    assert full["radar_chart_base64"] == "data"
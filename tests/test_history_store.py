@@ -0,0 +1,59 @@
+import sqlite3
+import time
+
+from src.models.evaluation_models import SCORE_DIMENSIONS, InterviewInput, SixDimensionScore
+from src.services.history_store import EvaluationHistory
+
+
+def _scores(value: float) -> SixDimensionScore:
+    return SixDimensionScore(**dict.fromkeys(SCORE_DIMENSIONS, value))
+
+
+def _cohort_size(history: EvaluationHistory, position=None) -> int:
+    return int(history.cohort_histogram(position, window_days=1)[0].sum())
+
+
+def test_repeated_input_counts_once(tmp_path):
+    history = EvaluationHistory(str(tmp_path / "history.sqlite3"))
+    input_hash = history.make_input_hash(InterviewInput(position="后端", resume_match_score=80))
+
+    first = history.record(_scores(80), "后端", input_hash)
+    second = history.record(_scores(60), "后端", input_hash)
+
+    assert first == second
+    assert _cohort_size(history, "后端") == 1
+    assert _cohort_size(history) == 1
+
+
+def test_different_inputs_count_separately(tmp_path):
+    history = EvaluationHistory(str(tmp_path / "history.sqlite3"))
+    for score in (70, 80):
+        input_hash = history.make_input_hash(InterviewInput(resume_match_score=score))
+        history.record(_scores(score), None, input_hash)
+
+    assert _cohort_size(history) == 2
+
+
+def test_existing_duplicates_are_removed(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE evaluations (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, "
+        "position TEXT, input_hash TEXT NOT NULL, "
+        + ", ".join(f"{dim} REAL NOT NULL" for dim in SCORE_DIMENSIONS) + ")"
+    )
+    conn.execute("CREATE INDEX idx_evaluations_input_hash ON evaluations(input_hash)")
+    for input_hash in ("a", "a", "a", "b"):
+        conn.execute(
+            "INSERT INTO evaluations (created_at, position, input_hash, " + ", ".join(SCORE_DIMENSIONS)
+            + ") VALUES (?, NULL, ?, " + ", ".join("?" * len(SCORE_DIMENSIONS)) + ")",
+            [time.time(), input_hash] + [70.0] * len(SCORE_DIMENSIONS),
+        )
+    conn.commit()
+    conn.close()
+
+    history = EvaluationHistory(path)
+
+    assert _cohort_size(history) == 2
+    history.record(_scores(90), None, "a")
+    assert _cohort_size(history) == 2
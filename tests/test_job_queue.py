@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+from src.services.job_queue import EvaluationJobQueue
+
+
+def _run_jobs(queue: EvaluationJobQueue, count: int, timeout: float = 5):
+    """启动worker，从线程池提交任务并等待全部完成，返回各任务最终状态"""
+
+    async def run():
+        await queue.start()
+        try:
+            jobs = [await asyncio.to_thread(queue.submit, {"index": i}) for i in range(count)]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while True:
+                states = [await asyncio.to_thread(queue.get, job["job_id"]) for job in jobs]
+                if all(state["status"] in ("succeeded", "failed") for state in states) or loop.time() > deadline:
+                    return states
+                await asyncio.sleep(0.02)
+        finally:
+            await queue.stop()
+
+    return asyncio.run(run())
+
+
+def test_jobs_run_without_touching_sqlite_on_the_loop(tmp_path):
+    loop_threads = set()
+
+    async def handler(payload, options):
+        loop_threads.add(threading.get_ident())
+        return {"index": payload["index"]}
+
+    queue = EvaluationJobQueue(handler, db_path=str(tmp_path / "jobs.sqlite3"), workers=2, poll_interval=10)
+    claim_threads = []
+    claim = queue._claim
+
+    def recording_claim():
+        claim_threads.append(threading.get_ident())
+        return claim()
+
+    queue._claim = recording_claim
+    states = _run_jobs(queue, 3)
+
+    # 提交后立即唤醒worker，不需要等待轮询间隔
+    assert [state["status"] for state in states] == ["succeeded"] * 3
+    assert [state["result"]["index"] for state in states] == [0, 1, 2]
+    assert claim_threads and not loop_threads & set(claim_threads)
+
+
+def test_job_that_keeps_crashing_is_failed_after_max_attempts(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def handler(payload, options):
+        return {}
+
+    queue = EvaluationJobQueue(handler, db_path=path, lease_seconds=0, max_attempts=2)
+    job = queue.submit({})
+    # 模拟两次执行中进程退出：认领后租约立即过期，不写入结果
+    for _ in range(2):
+        row, exhausted = queue._claim()
+        assert row["id"] == job["job_id"] and not exhausted
+
+    row, exhausted = queue._claim()
+    assert row is None
+    assert [failed["id"] for failed in exhausted] == [job["job_id"]]
+    state = queue.get(job["job_id"])
+    assert state["status"] == "failed" and "2次" in state["error"]
+
+
+def test_graceful_requeue_does_not_count_as_attempt(tmp_path):
+    async def handler(payload, options):
+        return {}
+
+    queue = EvaluationJobQueue(handler, db_path=str(tmp_path / "jobs.sqlite3"), max_attempts=1)
+    job = queue.submit({})
+    for _ in range(3):
+        row, _ = queue._claim()
+        assert row["id"] == job["job_id"]
+        queue._requeue(row["id"])
+
+
+def test_stop_waits_for_webhook_notifications(tmp_path):
+    notified = []
+
+    async def handler(payload, options):
+        return {"ok": True}
+
+    queue = EvaluationJobQueue(handler, db_path=str(tmp_path / "jobs.sqlite3"), poll_interval=10)
+
+    async def slow_notify(url, job):
+        await asyncio.sleep(0.2)
+        notified.append((url, job["status"]))
+
+    queue._notify = slow_notify
+
+    async def run():
+        await queue.start()
+        await asyncio.to_thread(queue.submit, {}, None, "http://example.invalid/hook")
+        while not queue._notifications:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        assert not queue._notifications
+
+    asyncio.run(run())
+    assert notified == [("http://example.invalid/hook", "succeeded")]
@@ -0,0 +1,42 @@
+import json
+import random
+
+from src.services.json_stream import IncrementalJSONExtractor, JSONStringFieldStreamer
+
+SUMMARY = '表现良好，"沟通"清晰\\路径 C:\\tmp\n换行 😀 结束'
+
+
+def _response() -> str:
+    body = json.dumps({"summary": SUMMARY, "recommendations": ["a", "b"]}, ensure_ascii=True, indent=2)
+    return "好的，以下是评估结果：\n" + body + "\n以上仅供参考"
+
+
+def _chunks(text: str, seed: int):
+    rng = random.Random(seed)
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 5)
+        yield text[i:i + size]
+        i += size
+
+
+def test_streams_only_the_decoded_field_value():
+    for seed in range(50):
+        streamer = JSONStringFieldStreamer("summary")
+        decoded = "".join(streamer.feed(chunk) for chunk in _chunks(_response(), seed))
+        assert decoded == SUMMARY
+        assert streamer.done
+
+
+def test_field_missing_yields_nothing():
+    streamer = JSONStringFieldStreamer("summary")
+    assert streamer.feed('{"recommendations": ["a"]}') == ""
+    assert not streamer.done
+
+
+def test_extractor_finds_object_in_surrounding_text():
+    extractor = IncrementalJSONExtractor(["summary", "recommendations"])
+    result = None
+    for chunk in _chunks(_response(), 1):
+        result = extractor.feed(chunk) or result
+    assert result["summary"] == SUMMARY
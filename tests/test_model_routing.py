@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from src.models.evaluation_models import InterviewInput
+from src.services import model_routing
+from src.services.evaluation_engine import EvaluationEngine
+from src.services.model_routing import LOCAL_ROUTE, ModelRoute, ModelRouter
+
+PRIMARY = ModelRoute(domain="x1")
+FAST = ModelRoute(domain="lite")
+SCORES = {
+    "skill_match": 81, "communication": 72, "emotional_stability": 73,
+    "professionalism": 74, "logical_thinking": 75, "learning_potential": 76,
+}
+
+
+class RecordingSparkAPI:
+    """记录每次调用使用的路由，评分阶段返回固定评分，总结阶段返回固定总结"""
+
+    def __init__(self):
+        self.routes = []
+
+    async def stream_message(self, content, system_prompt="", route=None, timeout=None):
+        self.routes.append(route.domain)
+        if "recommendations" in system_prompt:
+            yield json.dumps({"summary": "总结", "recommendations": ["建议"]})
+        else:
+            yield json.dumps(SCORES)
+
+
+def _router(primary_seconds: float, fast_route=None, fast_seconds: float = 0.0) -> ModelRouter:
+    router = ModelRouter({"scores": PRIMARY, "summary": PRIMARY}, fast_route, budget_seconds=1.0)
+    for stage in ("scores", "summary"):
+        router.observe(stage, PRIMARY, primary_seconds)
+        if fast_route is not None:
+            router.observe(stage, fast_route, fast_seconds)
+    return router
+
+
+def _evaluate(router: ModelRouter):
+    async def run():
+        routes = model_routing.start_request(router.budget_seconds)
+        spark_api = RecordingSparkAPI()
+        engine = EvaluationEngine(spark_api, router=router)
+        input_data = InterviewInput(resume_match_score=90)
+        scores, summary, recommendations = await engine.generate_evaluation(input_data)
+        return spark_api.routes, routes, scores, summary, engine.scorer.score(input_data)
+
+    return asyncio.run(run())
+
+
+def test_select_uses_primary_without_budget():
+    router = _router(primary_seconds=5.0)
+    assert router.select("scores") == PRIMARY
+
+
+def test_select_falls_back_to_fast_route_then_local():
+    async def run():
+        model_routing.start_request(1.0)
+        assert _router(5.0, FAST, 0.2).select("scores") == FAST
+        assert _router(5.0, FAST, 3.0).select("scores") is None
+        assert _router(5.0).select("scores") is None
+
+    asyncio.run(run())
+
+
+def test_evaluation_over_budget_uses_local_results():
+    calls, routes, scores, summary, local_scores = _evaluate(_router(primary_seconds=5.0))
+
+    assert calls == []
+    assert routes == {"scores": LOCAL_ROUTE, "summary": LOCAL_ROUTE}
+    assert scores == local_scores
+    assert summary
+
+
+def test_evaluation_over_budget_prefers_fast_route():
+    calls, routes, scores, summary, _ = _evaluate(_router(5.0, FAST, 0.2))
+
+    assert calls == ["lite", "lite"]
+    assert routes == {"scores": "lite", "summary": "lite"}
+    assert scores.skill_match == 81 and summary == "总结"
+
+
+def test_skipped_route_estimate_decays():
+    async def run():
+        model_routing.start_request(1.0)
+        router = _router(primary_seconds=1.3)
+        # 每次因预算不足被跳过，预估耗时下降10%，恢复后重新被选中
+        assert router.select("scores") is None
+        assert router.select("scores") is None
+        assert router.select("scores") is None
+        assert router.select("scores") == PRIMARY
+
+    asyncio.run(run())
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from src.cli import rescore
+
+
+def _write_input(path, ids):
+    with open(path, "w", encoding="utf-8") as f:
+        for record_id in ids:
+            f.write(json.dumps({"id": record_id, "resume_match_score": 80}) + "\n")
+
+
+def _run(tmp_path, monkeypatch, *extra):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    args = rescore.build_parser().parse_args(
+        [str(tmp_path / "input.jsonl"), "--output", str(tmp_path / "output.jsonl"), "--mode", "fast",
+         "--concurrency", "2", *extra]
+    )
+    asyncio.run(rescore.run(args))
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_unserializable_row_fails_only_that_record(tmp_path, monkeypatch):
+    _write_input(tmp_path / "input.jsonl", ["a", "b", "c"])
+    evaluate = rescore.Rescorer.evaluate
+
+    async def evaluate_with_bad_row(self, record_id, record):
+        row = await evaluate(self, record_id, record)
+        if record_id == "b":
+            row["recommendations"] = [object()]
+        return row
+
+    monkeypatch.setattr(rescore.Rescorer, "evaluate", evaluate_with_bad_row)
+    _run(tmp_path, monkeypatch)
+
+    assert sorted(row["id"] for row in _read_jsonl(tmp_path / "output.jsonl")) == ["a", "c"]
+    errors = _read_jsonl(tmp_path / "output.jsonl.errors.jsonl")
+    assert [error["id"] for error in errors] == ["b"]
+    assert "无法写入输出" in errors[0]["error"]
+
+
+def test_resume_skips_completed_and_keeps_previous_errors(tmp_path, monkeypatch):
+    _write_input(tmp_path / "input.jsonl", ["a", "b", "c", "d"])
+    evaluate = rescore.Rescorer.evaluate
+    attempts = []
+
+    async def flaky_evaluate(self, record_id, record):
+        attempts.append(record_id)
+        if record_id == "b":
+            raise RuntimeError("星火API调用超时")
+        return await evaluate(self, record_id, record)
+
+    monkeypatch.setattr(rescore.Rescorer, "evaluate", flaky_evaluate)
+    _run(tmp_path, monkeypatch, "--limit", "2")
+    assert sorted(attempts) == ["a", "b"]
+
+    attempts.clear()
+    _run(tmp_path, monkeypatch)
+
+    # 已写入的a被跳过，失败的b再次尝试
+    assert sorted(attempts) == ["b", "c", "d"]
+    assert sorted(row["id"] for row in _read_jsonl(tmp_path / "output.jsonl")) == ["a", "c", "d"]
+    errors = _read_jsonl(tmp_path / "output.jsonl.errors.jsonl")
+    assert [error["id"] for error in errors] == ["b", "b"]
+
+
+def test_resume_rescores_record_with_partially_written_line(tmp_path, monkeypatch):
+    _write_input(tmp_path / "input.jsonl", ["a", "b", "c"])
+    _run(tmp_path, monkeypatch, "--limit", "2")
+    rows = _read_jsonl(tmp_path / "output.jsonl")
+    assert len(rows) == 2
+
+    # 模拟写入第二条记录时中断：末行只写了一半
+    with open(tmp_path / "output.jsonl", "rb+") as f:
+        content = f.read()
+        f.seek(0)
+        f.truncate()
+        f.write(content[:-20])
+
+    _run(tmp_path, monkeypatch)
+
+    rows = _read_jsonl(tmp_path / "output.jsonl")
+    assert sorted(row["id"] for row in rows) == ["a", "b", "c"]
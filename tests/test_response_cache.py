@@ -0,0 +1,34 @@
+import asyncio
+
+from src.services.response_cache import LLMResponseCache
+
+
+def _rows(cache: LLMResponseCache) -> int:
+    return cache._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def test_async_get_set_round_trip(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), memory_size=1)
+
+    async def run():
+        await cache.aset("a", "1")
+        await cache.aset("b", "2")
+        # a 已被挤出内存层，从SQLite读取
+        return await cache.aget("b"), await cache.aget("a"), await cache.aget("c")
+
+    assert asyncio.run(run()) == ("2", "1", None)
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_eviction_is_batched(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=20, evict_interval=3600)
+
+    for i in range(21):
+        cache.set(f"k{i}", "v")
+    # 未达到批量时不清理
+    assert _rows(cache) == 21
+
+    cache.set("k21", "v")
+    assert _rows(cache) == 20
+    assert cache.stats()["evictions"] == 2
@@ -0,0 +1,23 @@
+import pytest
+
+from src.services import response_encoding
+
+
+@pytest.fixture
+def without_msgpack(monkeypatch):
+    monkeypatch.setattr(response_encoding, "_msgpack", False)
+
+
+def test_default_is_json():
+    assert response_encoding.negotiate(None) == "json"
+    assert response_encoding.negotiate("application/json") == "json"
+
+
+def test_msgpack_only_is_not_acceptable_without_msgpack(without_msgpack):
+    with pytest.raises(response_encoding.NotAcceptableError):
+        response_encoding.negotiate("application/msgpack")
+
+
+def test_msgpack_falls_back_to_json_when_json_accepted(without_msgpack):
+    assert response_encoding.negotiate("application/msgpack, application/json;q=0.5") == "json"
+    assert response_encoding.negotiate("application/x-msgpack, */*;q=0.1") == "json"
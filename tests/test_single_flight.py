@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    calls = []
+
+    async def evaluate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"score": 80}
+
+    async def run():
+        flight = SingleFlight("test")
+        key = flight.make_key({"b": 2, "a": 1})
+        # 键与字段顺序无关
+        assert key == flight.make_key({"a": 1, "b": 2})
+        results = await asyncio.gather(*(flight.do(key, evaluate) for _ in range(5)))
+        assert results == [{"score": 80}] * 5
+        assert flight.inflight() == 0
+
+        # 上一次调用完成后再次调用会重新执行
+        await flight.do(key, evaluate)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_leader_cancellation_does_not_cancel_shared_call():
+    started = []
+
+    async def evaluate():
+        started.append(1)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def run():
+        flight = SingleFlight("test")
+        leader = asyncio.create_task(flight.do("key", evaluate))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("key", evaluate))
+        await asyncio.sleep(0.01)
+
+        # 首个调用方断开后，共享的评估继续执行，其余调用方仍拿到结果
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await asyncio.wait_for(follower, 1) == "done"
+        assert flight.inflight() == 0
+
+    asyncio.run(run())
+    assert len(started) == 1
+
+
+def test_errors_are_shared_and_not_cached():
+    calls = []
+
+    async def evaluate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("星火API调用失败")
+
+    async def run():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("key", evaluate) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        with pytest.raises(ValueError):
+            await flight.do("key", evaluate)
+
+    asyncio.run(run())
+    assert len(calls) == 2
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from src.services.spark_control import SparkCallController
+
+
+def test_cancel_during_hedge_cleanup_propagates():
+    """落选的对冲请求正在清理时调用方被取消，CancelledError 必须抛出而不是继续输出内容"""
+
+    async def primary():
+        await asyncio.sleep(0.1)
+        yield "a"
+        await asyncio.sleep(0.5)
+        yield "b"
+
+    async def secondary():
+        try:
+            await asyncio.sleep(10)
+            yield "x"
+        finally:
+            # 关闭连接需要一点时间
+            await asyncio.sleep(0.3)
+
+    async def run():
+        controller = SparkCallController(hedge=True, hedge_min_delay=0.05)
+        controller._ttft_samples.extend([0.05] * controller.hedge_min_samples)
+        streams = iter([primary(), secondary()])
+        received = []
+
+        async def consume():
+            async for chunk in controller.stream(lambda: next(streams), timeout=5):
+                received.append(chunk)
+
+        task = asyncio.create_task(consume())
+        # 对冲请求在0.05秒发起，主请求在0.1秒返回首个片段，此时正在等待落选请求清理
+        await asyncio.sleep(0.15)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, 2)
+        assert received == []
+        assert controller.limiter.inflight == 0
+
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+import asyncio
+
+from src.services.spark_pool import SparkConnectionPool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.open = True
+
+    async def close(self):
+        self.open = False
+
+
+def test_idle_connections_are_reaped_without_requests():
+    async def run():
+        pool = SparkConnectionPool(size=2, max_idle=0.1)
+        opened = []
+
+        async def connect():
+            opened.append(FakeConnection())
+            return opened[-1]
+
+        await pool.warm_up(["wss://spark"], lambda key: connect())
+        await asyncio.sleep(0.2)
+
+        assert len(opened) == 2
+        assert not any(ws.open for ws in opened)
+        assert not pool._idle["wss://spark"]
+        # 池空后清理任务退出，服务空闲时不会反复建连
+        assert pool._reaper.done()
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_fresh_connections_are_kept():
+    async def run():
+        pool = SparkConnectionPool(size=1, max_idle=5)
+        ws = FakeConnection()
+
+        async def connect():
+            return ws
+
+        await pool.fill("wss://spark", connect)
+        await asyncio.sleep(0.05)
+        assert ws.open and len(pool._idle["wss://spark"]) == 1
+
+        await pool.close()
+        assert not ws.open
+        assert pool._reaper.done()
+
+    asyncio.run(run())